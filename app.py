@@ -1,21 +1,20 @@
 import os
-import logging
 from flask import Flask
-from flask_mail import Mail
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 # Try to load environment variables from .env file for local development
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    # python-dotenv not installed, continue without it
-    pass
+# (python-dotenv is only imported when there is one; deployments set real env vars)
+if any(os.path.exists(os.path.join(folder, '.env')) for folder in (os.path.dirname(os.path.abspath(__file__)), os.getcwd())):
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        # python-dotenv not installed, continue without it
+        pass
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
-
-mail = Mail()
+# Structured JSON logging through a background writer (LOG_LEVEL, LOG_LEVELS, LOG_SAMPLE)
+from utils.log import configure_logging
+configure_logging()
 
 # create the app
 app = Flask(__name__)
@@ -38,10 +37,11 @@ def patched_set_cookie(self, *args, **kwargs):
 Response.set_cookie = patched_set_cookie
 
 # Only add ProxyFix for production environments (Heroku, Railway, etc.)
+# x_for makes request.remote_addr the visitor's IP, which the rate limiter keys on
 if os.environ.get("DYNO") or os.environ.get("RAILWAY_ENVIRONMENT"):
-    app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
 
-# Mail configuration
+# Mail configuration (Flask-Mail is set up with the first e-mail, see utils/mail_dispatch.py)
 app.config['MAIL_SERVER'] = os.environ.get('MAIL_SERVER', 'smtp.gmail.com')
 app.config['MAIL_PORT'] = int(os.environ.get('MAIL_PORT', '587'))
 app.config['MAIL_USE_TLS'] = os.environ.get('MAIL_USE_TLS', 'true').lower() in ['true', 'on', '1']
@@ -49,11 +49,36 @@ app.config['MAIL_USERNAME'] = os.environ.get('MAIL_USERNAME')
 app.config['MAIL_PASSWORD'] = os.environ.get('MAIL_PASSWORD')
 app.config['MAIL_DEFAULT_SENDER'] = os.environ.get('MAIL_DEFAULT_SENDER')
 
-# initialize extensions
-mail.init_app(app)
+# Responsive gallery image helpers (responsive_image, background_image) for templates
+from utils.images import init_app as init_images
+init_images(app)
+
+# Content-hashed static URLs with immutable caching (see build_assets.py)
+from utils.assets import init_app as init_assets
+init_assets(app)
+
+# Request latency/status metrics, scraped from /metrics
+from utils.metrics import init_app as init_metrics
+init_metrics(app)
+
+# Retry failed lead notifications from the outbox (restarted workers resume pending ones)
+from utils.outbox import init_app as init_outbox
+init_outbox(app)
+
+# gzip/brotli for rendered pages (there is no reverse proxy in front on Heroku/Railway)
+from utils.compression import init_app as init_compression
+init_compression(app)
 
 # Import routes (no database models needed)
 import routes
 
+
+def __getattr__(name):
+    # `from app import mail` still works; it registers Flask-Mail on first access
+    if name == 'mail':
+        from utils.mail_dispatch import get_mail
+        return get_mail(app)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,288 @@
+"""
+ASGI entry point with an async lead-ingestion path
+
+    pip install uvicorn httpx      # httpx is optional, see utils/async_http.py
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 3 --proxy-headers
+
+POST /submit-lead and /callback-request run on the event loop: the form is
+validated with utils.leads, journaled, answered, and WhatsApp (CallMeBot,
+with the Business API as fallback) and e-mail are awaited concurrently in a
+background task (utils.notify_async). Every other request goes to the
+Flask app on a thread pool, so pages, sessions and flash messages behave
+exactly as under gunicorn.
+"""
+
+import asyncio
+import io
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from itsdangerous import BadSignature
+from werkzeug.utils import redirect
+from werkzeug.wrappers import Request, Response
+
+from app import app as flask_app
+from utils import async_http, notify_async, rate_limit
+from utils.leads import LeadError, lead_from_form, callback_from_form, record_lead
+from utils.metrics import inc, observe
+
+logger = logging.getLogger(__name__)
+
+# Threads running the Flask app for everything that is not handled natively
+WSGI_THREADS = int(os.environ.get('ASGI_WSGI_THREADS', '8'))
+MAX_BODY = int(os.environ.get('ASGI_MAX_BODY', str(1024 * 1024)))
+
+_executor = ThreadPoolExecutor(max_workers=WSGI_THREADS, thread_name_prefix='asgi-wsgi')
+
+
+class _Disconnected(Exception):
+    pass
+
+
+class _BodyTooLarge(Exception):
+    pass
+
+
+async def _read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise _Disconnected()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY:
+            raise _BodyTooLarge()
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+def build_environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope whose body has been read"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1')
+        value = value.decode('latin-1')
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'content-length':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            if key in environ:
+                value = environ[key] + ('; ' if key == 'HTTP_COOKIE' else ',') + value
+            environ[key] = value
+    return environ
+
+
+def _call_flask(environ):
+    captured = []
+    chunks = []
+
+    def start_response(status, headers, exc_info=None):
+        captured[:] = [status, headers]
+        return chunks.append
+
+    app_iter = flask_app(environ, start_response)
+    try:
+        chunks.extend(app_iter)
+    finally:
+        if hasattr(app_iter, 'close'):
+            app_iter.close()
+    status, headers = captured
+    return int(status.split(' ', 1)[0]), headers, b''.join(chunks)
+
+
+async def _send(send, status, headers, body):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+# Flask-compatible session cookie, so the pages served by Flask see the
+# flash messages and lead_submitted flag set here
+
+def _serializer():
+    return flask_app.session_interface.get_signing_serializer(flask_app)
+
+
+def load_session(request):
+    cookie = request.cookies.get(flask_app.config['SESSION_COOKIE_NAME'])
+    if not cookie:
+        return {}
+    try:
+        max_age = int(flask_app.permanent_session_lifetime.total_seconds())
+        return dict(_serializer().loads(cookie, max_age=max_age))
+    except BadSignature:
+        return {}
+
+
+def save_session(response, session):
+    interface = flask_app.session_interface
+    expires = None
+    if session.get('_permanent'):
+        expires = datetime.now(timezone.utc) + flask_app.permanent_session_lifetime
+    response.set_cookie(
+        flask_app.config['SESSION_COOKIE_NAME'],
+        _serializer().dumps(session),
+        expires=expires,
+        domain=interface.get_cookie_domain(flask_app),
+        path=interface.get_cookie_path(flask_app),
+        secure=interface.get_cookie_secure(flask_app),
+        httponly=interface.get_cookie_httponly(flask_app),
+        samesite=interface.get_cookie_samesite(flask_app),
+    )
+    response.vary.add('Cookie')
+
+
+def flash(session, message, category):
+    session.setdefault('_flashes', []).append((category, message))
+
+
+def url_for(environ, endpoint, **values):
+    return flask_app.url_map.bind_to_environ(environ).build(endpoint, values)
+
+
+async def submit_lead(request, environ):
+    session = load_session(request)
+    language = request.form.get('language', 'tr')
+    try:
+        try:
+            lead_data = lead_from_form(request.form, request.remote_addr, request.user_agent.string)
+        except LeadError as e:
+            flash(session, str(e), 'error')
+            response = redirect(url_for(environ, 'index', lang=language))
+        else:
+            # The journal waits for its fsync, so keep it off the event loop
+            if await asyncio.get_running_loop().run_in_executor(None, record_lead, lead_data):
+                notify_async.schedule(lead_data)
+
+            flash(session, 'Thank you! We will contact you soon.', 'success')
+            session['lead_submitted'] = True
+            session['lead_name'] = lead_data['name']
+            session['lead_whatsapp'] = lead_data['whatsapp_optin'] == 'Evet'
+            response = redirect(url_for(environ, 'success', lang=language))
+
+    except Exception as e:
+        logger.error(f"Lead submission error: {e}")
+        flash(session, 'An error occurred. Please try again.', 'error')
+        response = redirect(url_for(environ, 'index', lang=language))
+
+    save_session(response, session)
+    return response
+
+
+async def callback_request(request, environ):
+    try:
+        try:
+            lead_data = callback_from_form(request.form, request.remote_addr, request.user_agent.string)
+        except LeadError as e:
+            return flask_app.json.response({'success': False, 'message': str(e)})
+
+        if await asyncio.get_running_loop().run_in_executor(None, record_lead, lead_data):
+            notify_async.schedule(lead_data)
+
+        return flask_app.json.response({'success': True, 'message': 'Callback requested successfully'})
+
+    except Exception as e:
+        logger.error(f"Callback request error: {e}")
+        return flask_app.json.response({'success': False, 'message': 'Error occurred'})
+
+
+# path -> (handler, whether its errors are JSON)
+NATIVE_ROUTES = {
+    '/submit-lead': (submit_lead, False),
+    '/callback-request': (callback_request, True),
+}
+
+
+async def _handle_natively(route, environ):
+    handler, as_json = route
+    started = time.perf_counter()
+    inc('http_requests_in_flight', 1)
+    try:
+        request = Request(environ)
+        # Same per-IP buckets as the Flask views (run uvicorn with --proxy-headers behind a proxy)
+        retry_after = await asyncio.get_running_loop().run_in_executor(
+            None, rate_limit.check, 'leads', request.remote_addr)
+        if retry_after:
+            response = rate_limit.too_many_requests(retry_after, request.form.get('language', 'tr'), as_json)
+        else:
+            response = await handler(request, environ)
+    except Exception as e:
+        logger.error(f"Lead endpoint error: {e}")
+        if as_json:
+            response = flask_app.json.response({'success': False, 'message': 'Error occurred'})
+            response.status_code = 500
+        else:
+            response = Response('Internal Server Error', status=500, mimetype='text/plain')
+    finally:
+        inc('http_requests_in_flight', -1)
+    inc('http_requests_total', endpoint=handler.__name__, method='POST', status=response.status_code)
+    observe('http_request_duration_seconds', time.perf_counter() - started, endpoint=handler.__name__, method='POST')
+    return response.status_code, response.headers.to_wsgi_list(), response.get_data()
+
+
+async def _lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            # Let scheduled notifications go out before the worker exits
+            await notify_async.drain()
+            await async_http.close()
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    try:
+        body = await _read_body(receive)
+    except _Disconnected:
+        return
+    except _BodyTooLarge:
+        await _send(send, 413, [('Content-Type', 'text/plain')], b'Request body too large')
+        return
+
+    environ = build_environ(scope, body)
+    route = NATIVE_ROUTES.get(scope['path']) if scope['method'] == 'POST' else None
+    if route is not None:
+        status, headers, body = await _handle_natively(route, environ)
+    else:
+        status, headers, body = await asyncio.get_running_loop().run_in_executor(_executor, _call_flask, environ)
+    await _send(send, status, headers, body)
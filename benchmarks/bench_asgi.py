@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Sync vs Async Lead Ingestion Benchmark
+Drives /submit-lead and /callback-request at high concurrency against the
+gunicorn deployment (gunicorn.conf.py) and the ASGI entry point
+(uvicorn asgi:app) with the same number of worker processes, while the
+mock CallMeBot answers slowly. The landing page is included for reference
+(the ASGI app hands it to Flask on a thread pool).
+
+Requires uvicorn (pip install uvicorn httpx).
+
+Usage:
+    python benchmarks/bench_asgi.py
+    python benchmarks/bench_asgi.py --concurrency 64,256 --requests 2000
+"""
+
+import argparse
+import importlib.util
+import multiprocessing
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import GunicornServer, UvicornServer, run_suite
+
+SCENARIOS = ['submit_lead', 'callback_request', 'index']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare gunicorn and the ASGI lead path')
+    parser.add_argument('--concurrency', default='64,256', help='comma separated client concurrency levels')
+    parser.add_argument('--requests', type=int, default=1000, help='requests per scenario')
+    parser.add_argument('--workers', type=int, default=multiprocessing.cpu_count() + 1)
+    parser.add_argument('--upstream-delay', type=float, default=0.5, help='mock CallMeBot latency in seconds')
+    args = parser.parse_args(argv)
+
+    if importlib.util.find_spec('uvicorn') is None:
+        print("uvicorn is not installed (pip install uvicorn httpx)")
+        return 1
+
+    env = {
+        'WEB_CONCURRENCY': str(args.workers),
+        'LOG_LEVEL': 'WARNING',
+        # One upstream call per lead, so both servers do the same outbound work
+        'NOTIFY_RATE_LIMIT': '1000000',
+    }
+    servers = [
+        ('gunicorn gthread', GunicornServer, ['-c', 'gunicorn.conf.py']),
+        ('uvicorn asgi', UvicornServer, ['--workers', str(args.workers)]),
+    ]
+
+    print(f"{args.workers} worker process(es), CallMeBot delay {args.upstream_delay}s\n")
+    print(f"{'server':<18}{'clients':>8}{'scenario':>18}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'err':>6}")
+    for concurrency in [int(value) for value in args.concurrency.split(',')]:
+        for name, server_class, server_args in servers:
+            results = run_suite(SCENARIOS, args.requests, concurrency, server_args, args.upstream_delay,
+                                extra_env=env, server_class=server_class)
+            for scenario, stats in results.items():
+                print(f"{name:<18}{concurrency:>8}{scenario:>18}{stats['rps']:>9.0f}{stats['p50_ms']:>9.1f}"
+                      f"{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['errors']:>6}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
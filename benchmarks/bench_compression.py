@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Response Compression Benchmark
+Reports bytes on the wire and CPU per request for the rendered landing
+page at each gzip level and brotli quality, and the per-request cost of
+the compression middleware with and without reuse of render-cached bytes
+"""
+
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.compression import CompressionMiddleware, brotli, compress
+
+
+def cpu_per_call(func, number):
+    started = time.process_time()
+    for _ in range(number):
+        func()
+    return (time.process_time() - started) / number * 1000
+
+
+def run(number=200):
+    logging.disable(logging.CRITICAL)
+    from app import app
+    from utils.render_cache import compressed_body
+
+    client = app.test_client()
+    body = client.get('/', headers={'Accept-Encoding': 'identity'}).data
+    print(f"Rendered / : {len(body):,} bytes\n")
+
+    print(f"{'encoding':<12}{'bytes':>10}{'ratio':>8}{'CPU ms/req':>12}")
+    print(f"{'identity':<12}{len(body):>10,}{1:>8.2f}{0:>12.3f}")
+    levels = [('gzip', level) for level in (1, 3, 6, 9)]
+    if brotli is not None:
+        levels += [('br', quality) for quality in (1, 4, 5, 8, 11)]
+    for encoding, level in levels:
+        kwargs = {'gzip_level': level} if encoding == 'gzip' else {'brotli_quality': level}
+        data = compress(body, encoding, **kwargs)
+        cost = cpu_per_call(lambda: compress(body, encoding, **kwargs), max(number // (20 if level >= 9 else 1), 5))
+        print(f"{f'{encoding}-{level}':<12}{len(data):>10,}{len(data) / len(body):>8.2f}{cost:>12.3f}")
+
+    print(f"\nEnd-to-end GET / (render cache warm), CPU ms per request:")
+    inner = app.wsgi_app.app if isinstance(app.wsgi_app, CompressionMiddleware) else app.wsgi_app
+    encoding = 'br' if brotli is not None else 'gzip'
+    setups = [
+        ('no compression', inner, 'identity'),
+        (f'{encoding}, recompress', CompressionMiddleware(inner), encoding),
+        (f'{encoding}, reuse cached', CompressionMiddleware(inner, cache=compressed_body), encoding),
+    ]
+    for label, wsgi_app, accept in setups:
+        app.wsgi_app = wsgi_app
+        client.get('/', headers={'Accept-Encoding': accept})
+        size = len(client.get('/', headers={'Accept-Encoding': accept}).data)
+        cost = cpu_per_call(lambda: client.get('/', headers={'Accept-Encoding': accept}), number)
+        print(f"  {label:<24}{cost:>8.3f} ms   {size:>7,} bytes")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Notification Coalescing Check
+Fires a burst of leads at a throttling CallMeBot stand-in, once with one
+message per lead (old behaviour) and once through the DigestAggregator,
+and verifies that every lead reaches the upstream exactly once
+"""
+
+import contextlib
+import io
+import logging
+import os
+import re
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_upstream import MockUpstream
+
+UPSTREAM_LIMIT = (5, 2.0)  # messages per window seconds accepted by the stand-in
+
+
+def make_lead(number):
+    return {
+        'name': f'Lead {number}', 'phone': f'0555{number:07d}', 'email': 'Belirtilmedi',
+        'language': 'tr', 'unit_interest': '3+1', 'budget_range': 'Belirtilmedi',
+        'timeline': 'Belirtilmedi', 'best_call_time': 'Belirtilmedi', 'whatsapp_optin': 'Evet',
+        'marketing_consent': 'Hayir', 'utm_source': 'meta', 'utm_medium': 'cpc',
+        'utm_campaign': 'launch', 'timestamp': '2025-02-16 13:19:44', 'ip_address': '127.0.0.1',
+    }
+
+
+def burst(submit, leads, threads=8):
+    chunks = [leads[i::threads] for i in range(threads)]
+    workers = [threading.Thread(target=lambda chunk=chunk: [submit(lead) for lead in chunk]) for chunk in chunks]
+    [worker.start() for worker in workers]
+    [worker.join() for worker in workers]
+
+
+def delivered_phones(upstream):
+    return re.findall(r'0555\d{7}', '\n'.join(upstream.messages))
+
+
+def run(count=200):
+    leads = [make_lead(i) for i in range(count)]
+    os.environ['CALLMEBOT_API_KEY'] = 'benchmark'
+    logging.disable(logging.CRITICAL)
+    results = {}
+
+    for mode in ['per-lead', 'digest']:
+        with MockUpstream(rate_limit=UPSTREAM_LIMIT) as upstream, contextlib.redirect_stdout(io.StringIO()):
+            import app  # noqa: F401  utils.mail imports the Flask app's Mail instance
+            from utils import mail
+            from utils.notify_digest import DigestAggregator
+            mail.CALLMEBOT_API_URL = f'{upstream.base_url}/whatsapp.php'
+
+            started = time.perf_counter()
+            if mode == 'per-lead':
+                burst(lambda lead: mail.send_via_callmebot(mail.format_lead_message(lead)), leads)
+                stats = {}
+            else:
+                aggregator = DigestAggregator(
+                    mail.send_via_callmebot, mail.format_lead_message, mail.format_digest_message,
+                    rate_limit=UPSTREAM_LIMIT[0], rate_window=UPSTREAM_LIMIT[1],
+                    digest_size=25, flush_interval=0.5,
+                )
+                burst(aggregator.submit, leads)
+                while aggregator.get_stats()['buffered']:
+                    time.sleep(0.1)
+                stats = aggregator.get_stats()
+            elapsed = time.perf_counter() - started
+
+            phones = delivered_phones(upstream)
+            results[mode] = (upstream.requests, upstream.throttled, len(set(phones)), len(phones), elapsed, stats)
+
+    print(f"{count} leads, upstream accepts {UPSTREAM_LIMIT[0]} messages per {UPSTREAM_LIMIT[1]}s")
+    print(f"{'mode':<10}{'requests':>10}{'throttled':>11}{'leads delivered':>17}{'seconds':>9}")
+    for mode, (requests_made, throttled, unique, _, elapsed, _) in results.items():
+        print(f"{mode:<10}{requests_made:>10}{throttled:>11}{unique:>17}{elapsed:>9.1f}")
+    print(f"Digest counters: {results['digest'][5]}")
+
+    _, throttled, unique, total, _, stats = results['digest']
+    assert throttled == 0, 'aggregator exceeded the upstream rate'
+    assert unique == total == count - stats['dropped'], 'leads lost or duplicated'
+    print('OK: every lead delivered exactly once without hitting the throttle')
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Outbound HTTP Transport Benchmark
+Sends CallMeBot-style requests to a local HTTPS mock, once with a fresh
+requests.get per call (old behaviour) and once through the pooled
+keep-alive session in utils/http_client.py
+"""
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_upstream import MockUpstream, make_self_signed_cert
+
+PARAMS = {'phone': '905525242866', 'text': 'YENI MUSTERI BASVURUSU - Benchmark', 'apikey': 'benchmark'}
+
+
+def timed(upstream, count, send):
+    connections = upstream.connections
+    started = time.perf_counter()
+    for _ in range(count):
+        assert send().status_code == 200
+    elapsed = time.perf_counter() - started
+    return elapsed / count * 1000, upstream.connections - connections
+
+
+def run(count=200):
+    certfile, keyfile = make_self_signed_cert()
+    # requests picks the CA bundle up for both plain calls and sessions
+    os.environ['REQUESTS_CA_BUNDLE'] = certfile
+
+    import requests
+    from utils import http_client
+
+    with MockUpstream(certfile=certfile, keyfile=keyfile) as upstream:
+        url = f'{upstream.base_url}/whatsapp.php'
+        fresh = timed(upstream, count, lambda: requests.get(url, params=PARAMS, timeout=15))
+        pooled = timed(upstream, count, lambda: http_client.get(url, params=PARAMS))
+
+    print(f"{count} HTTPS requests to {url}")
+    print(f"{'transport':<22}{'ms/request':>12}{'TLS handshakes':>16}")
+    print(f"{'requests.get':<22}{fresh[0]:>12.2f}{fresh[1]:>16}")
+    print(f"{'pooled session':<22}{pooled[0]:>12.2f}{pooled[1]:>16}")
+    print(f"Saved {fresh[0] - pooled[0]:.2f} ms per notification ({fresh[0] / pooled[0]:.1f}x)")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
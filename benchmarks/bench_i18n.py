@@ -0,0 +1,42 @@
+#!/usr/bin/env python3
+"""
+Translation Lookup Benchmark
+Compares the old per-request json.load of lang/<lang>.json with the
+preloaded catalog in utils/i18n.py
+"""
+
+import json
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.i18n import LANG_DIR, get_translations
+
+
+def legacy_get_translations(language='tr'):
+    """Previous implementation: open and parse the file on every call"""
+    try:
+        with open(os.path.join(LANG_DIR, f'{language}.json'), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except:
+        try:
+            with open(os.path.join(LANG_DIR, 'tr.json'), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return {}
+
+
+def run(number=5000):
+    print(f"{'case':<28}{'legacy us/call':>16}{'catalog us/call':>18}{'speedup':>10}")
+    for language in ['tr', 'en', 'ar', 'de']:
+        legacy = timeit.timeit(lambda: legacy_get_translations(language), number=number)
+        catalog = timeit.timeit(lambda: get_translations(language), number=number)
+        label = f"{language}{' (fallback)' if language == 'de' else ''}"
+        print(f"{label:<28}{legacy / number * 1e6:>16.2f}{catalog / number * 1e6:>18.3f}{legacy / catalog:>9.0f}x")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
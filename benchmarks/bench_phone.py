@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Phone Validation Benchmark
+Compares the previous validate_phone (re.sub plus four uncompiled patterns)
+with normalize_phone over a corpus of realistic and junk inputs, and checks
+that both accept the same inputs from it. Outside the corpus normalize_phone
+is stricter on purpose (no leading 0 country codes, Turkish numbers start
+with 2-5) and also reads Arabic-Indic digits; see test_phone_validation.py
+"""
+
+import os
+import random
+import re
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.validation import normalize_phone
+
+
+def legacy_validate_phone(phone):
+    """Previous implementation from utils/validation.py"""
+    if not phone:
+        return False
+    phone = phone.strip()
+    clean_phone = re.sub(r'[\s\-\(\)\+\.]', '', phone)
+    patterns = [
+        r'^90[0-9]{10}$',
+        r'^0[0-9]{10}$',
+        r'^5[0-9]{9}$',
+        r'^[0-9]{10}$',
+    ]
+    for pattern in patterns:
+        if re.match(pattern, clean_phone):
+            return True
+    if len(clean_phone) >= 10 and len(clean_phone) <= 15 and clean_phone.isdigit():
+        return True
+    return False
+
+
+def build_corpus(size=10000, seed=42):
+    rng = random.Random(seed)
+
+    def digits(n):
+        return ''.join(rng.choice('0123456789') for _ in range(n))
+
+    realistic = [
+        lambda: f"0{rng.choice(['532', '542', '555', '505'])} {digits(3)} {digits(2)} {digits(2)}",
+        lambda: f"+90 {rng.choice(['532', '542', '555'])} {digits(3)} {digits(4)}",
+        lambda: f"(0{rng.choice(['216', '212', '544'])}) {digits(3)}-{digits(2)}-{digits(2)}",
+        lambda: f"5{digits(9)}",
+        lambda: f"90{rng.choice(['5', '2'])}{digits(9)}",
+        lambda: f"+{rng.choice(['1', '44', '971', '966'])} {digits(3)} {digits(3)} {digits(4)}",
+        lambda: f"{rng.choice(['532', '555'])}.{digits(3)}.{digits(2)}.{digits(2)}",
+    ]
+    junk = [
+        lambda: digits(rng.randint(1, 9)),
+        # Too long; no leading 00, which the legacy check counted as two more digits
+        lambda: rng.choice('123456789') + digits(rng.randint(15, 19)),
+        lambda: 'call me maybe',
+        lambda: f"0555 {digits(3)} ext {digits(2)}",
+        lambda: '',
+        lambda: f"{digits(4)}/{digits(7)}",
+    ]
+    return [rng.choice(realistic if rng.random() < 0.8 else junk)() for _ in range(size)]
+
+
+def run(size=10000, repeat=5):
+    corpus = build_corpus(size)
+
+    mismatches = [phone for phone in corpus if legacy_validate_phone(phone) != normalize_phone(phone).valid]
+    assert not mismatches, f"validity differs for {mismatches[:5]}"
+
+    legacy = min(timeit.repeat(lambda: [legacy_validate_phone(p) for p in corpus], number=1, repeat=repeat))
+    current = min(timeit.repeat(lambda: [normalize_phone(p) for p in corpus], number=1, repeat=repeat))
+
+    valid = sum(1 for phone in corpus if normalize_phone(phone).valid)
+    print(f"{size} inputs ({valid} valid), identical accept/reject decisions on this corpus")
+    print(f"{'function':<24}{'us/call':>10}{'calls/sec':>14}")
+    print(f"{'legacy validate_phone':<24}{legacy / size * 1e6:>10.2f}{size / legacy:>14,.0f}")
+    print(f"{'normalize_phone':<24}{current / size * 1e6:>10.2f}{size / current:>14,.0f}")
+    print(f"Speedup: {legacy / current:.1f}x (normalize_phone also returns E.164 and operator)")
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
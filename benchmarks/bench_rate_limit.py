@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Rate Limiter Overhead Benchmark
+Times one token-bucket check against a limiter already tracking 1k, 10k
+and 100k client IPs, for the in-memory shards and the shared SQLite
+backend. The per-check cost should stay flat as the number of tracked
+clients grows. Also runs 8 threads against 1 shard and 16 shards to show
+the effect of lock sharding.
+
+Usage:
+    python benchmarks/bench_rate_limit.py
+    python benchmarks/bench_rate_limit.py --sizes 1000,100000,1000000 --backends memory
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils.rate_limit import MemoryBuckets, SharedBuckets
+
+CAPACITY = 10
+RATE = 10 / 60
+
+
+def ip(number):
+    return f'leads:10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}'
+
+
+def fill(buckets, size, now):
+    for number in range(size):
+        buckets.acquire(ip(number), CAPACITY, RATE, now=now)
+
+
+def time_checks(buckets, size, checks, now):
+    rng = random.Random(size)
+    keys = [ip(rng.randrange(size)) for _ in range(checks)]
+    started = time.perf_counter()
+    for key in keys:
+        buckets.acquire(key, CAPACITY, RATE, now=now)
+    return (time.perf_counter() - started) / checks
+
+
+def make(backend, size, workdir):
+    if backend == 'memory':
+        # Large enough that nothing is evicted while filling
+        return MemoryBuckets(max_keys_per_shard=size)
+    return SharedBuckets(store_path=os.path.join(workdir, f'rate_limit_{size}.sqlite3'), prune_every=10 ** 9)
+
+
+def threaded(shards, threads=8, checks=20000):
+    buckets = MemoryBuckets(shards=shards)
+    keys = [ip(number) for number in range(1000)]
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():
+        barrier.wait()
+        for number in range(checks):
+            buckets.acquire(keys[number % len(keys)], CAPACITY, RATE)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in pool:
+        thread.join()
+    return threads * checks / (time.perf_counter() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure rate limiter overhead per request')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='comma separated tracked client counts')
+    parser.add_argument('--backends', default='memory,sqlite')
+    parser.add_argument('--checks', type=int, default=20000, help='timed checks per configuration')
+    args = parser.parse_args(argv)
+
+    sizes = [int(value) for value in args.sizes.split(',')]
+    print(f"{'backend':<10}{'clients':>10}{'us/check':>10}{'checks/sec':>13}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for backend in args.backends.split(','):
+            for size in sizes:
+                buckets = make(backend, size, workdir)
+                now = time.time()
+                fill(buckets, size, now)
+                per_check = time_checks(buckets, size, args.checks if backend == 'memory' else args.checks // 4, now)
+                print(f"{backend:<10}{size:>10}{per_check * 1e6:>10.2f}{1 / per_check:>13,.0f}")
+
+    print(f"\n{'memory shards':<14}{'threads':>8}{'checks/sec':>13}")
+    for shards in (1, 16):
+        print(f"{shards:<14}{8:>8}{threaded(shards):>13,.0f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+SMTP Delivery Benchmark
+Sends lead e-mails to a local SMTP stand-in (STARTTLS with a throwaway
+certificate, AUTH, and a greeting delay modelling the network) in two ways:
+Flask-Mail's mail.send(), which opens a session per message, and the
+e-mail dispatcher, which keeps one session open per worker. Reports
+messages/sec and how many SMTP sessions were opened.
+
+Usage:
+    python benchmarks/bench_smtp.py
+    python benchmarks/bench_smtp.py --messages 500 --greeting-delay 0.05
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_smtp import MockSMTP
+from mock_upstream import make_self_signed_cert
+
+
+def run(messages, greeting_delay, tls):
+    certfile, keyfile = make_self_signed_cert() if tls else (None, None)
+    with MockSMTP(greeting_delay=greeting_delay, certfile=certfile, keyfile=keyfile) as smtp:
+        os.environ.update({
+            'MAIL_SERVER': smtp.host,
+            'MAIL_PORT': str(smtp.port),
+            'MAIL_USE_TLS': 'true' if tls else 'false',
+            'MAIL_USERNAME': 'benchmark',
+            'MAIL_PASSWORD': 'benchmark',
+            'MAIL_DEFAULT_SENDER': 'bench@example.com',
+        })
+        logging.disable(logging.CRITICAL)
+
+        from flask_mail import Message
+        from app import app, mail
+        from utils.mail_dispatch import EmailDispatcher
+
+        def message(number):
+            return Message(subject=f'New Lead: Lead {number}', recipients=['sales@example.com'],
+                           body=f'Name: Lead {number}\nPhone: +90555{number:07d}\n')
+
+        results = []
+        with app.app_context():
+            sessions, delivered = smtp.sessions, smtp.messages
+            started = time.perf_counter()
+            for number in range(messages):
+                mail.send(message(number))
+            elapsed = time.perf_counter() - started
+            results.append(('mail.send per message', elapsed, smtp.sessions - sessions, smtp.messages - delivered))
+
+            dispatcher = EmailDispatcher(max_pending=messages)
+            sessions, delivered = smtp.sessions, smtp.messages
+            started = time.perf_counter()
+            for number in range(messages):
+                dispatcher.submit(message(number))
+            queued = time.perf_counter() - started
+            dispatcher.drain(timeout=600)
+            elapsed = time.perf_counter() - started
+            results.append(('dispatcher', elapsed, smtp.sessions - sessions, smtp.messages - delivered))
+            assert dispatcher.stats['failed'] == 0, dispatcher.stats
+    return results, queued
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare per-message SMTP sessions with the e-mail dispatcher')
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--greeting-delay', type=float, default=0.02,
+                        help='seconds the stand-in waits before greeting each new session')
+    parser.add_argument('--no-tls', action='store_true', help='plain SMTP instead of STARTTLS')
+    args = parser.parse_args(argv)
+
+    results, queued = run(args.messages, args.greeting_delay, not args.no_tls)
+    print(f"{args.messages} messages, {'STARTTLS' if not args.no_tls else 'plain'} + AUTH, "
+          f"greeting delay {args.greeting_delay * 1000:.0f} ms")
+    print(f"{'mode':<24}{'msgs/sec':>10}{'sessions':>10}{'delivered':>11}")
+    for mode, elapsed, sessions, delivered in results:
+        print(f"{mode:<24}{delivered / elapsed:>10.1f}{sessions:>10}{delivered:>11}")
+    print(f"Speedup: {results[0][1] / results[1][1]:.1f}x "
+          f"(request threads spent {queued / args.messages * 1e6:.0f} us per message queueing)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
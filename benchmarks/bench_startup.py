@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Measures how quickly a fresh worker can serve: the time to import the app
+in a new interpreter (median of several runs), and the time-to-first-byte
+of GET / from launching gunicorn with one worker, the way a scaled-up or
+woken-up dyno starts. Also checks that the modules loaded on first use
+(Flask-Mail, requests, python-dotenv) are not imported at boot. Exits
+with 1 when a threshold is exceeded.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --runs 10 --max-import-ms 120 --max-ttfb-ms 1500
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from load_test import free_port
+
+# Loaded with the first e-mail / outbound request / .env file, never at boot
+LAZY_MODULES = ('flask_mail', 'requests', 'dotenv')
+
+IMPORT_SNIPPET = f"""
+import json, sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+print(json.dumps({{'ms': elapsed * 1000, 'loaded': [m for m in {LAZY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def measure_import(env):
+    output = subprocess.run([sys.executable, '-c', IMPORT_SNIPPET], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_ttfb(env, timeout=30):
+    """Milliseconds from launching gunicorn to the first byte of GET /"""
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{port}',
+               '--workers', '1', 'main:app']
+    started = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError('gunicorn exited early')
+            try:
+                # The master binds before the worker boots; the request waits in the backlog
+                with socket.create_connection(('127.0.0.1', port), timeout=timeout) as sock:
+                    sock.sendall(b'GET / HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n')
+                    first = sock.recv(1)
+                    elapsed = time.perf_counter() - started
+                    status = (first + sock.recv(64)).split(b' ', 2)[1]
+                if status != b'200':
+                    raise RuntimeError(f'GET / returned {status.decode()}')
+                return elapsed * 1000
+            except ConnectionRefusedError:
+                time.sleep(0.002)
+        raise RuntimeError(f'gunicorn did not answer within {timeout}s')
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure app import time and time-to-first-byte of a fresh worker')
+    parser.add_argument('--runs', type=int, default=5, help='fresh processes per measurement')
+    parser.add_argument('--max-import-ms', type=float, default=150)
+    parser.add_argument('--max-ttfb-ms', type=float, default=1000)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env.update({
+            'LEAD_JOURNAL_PATH': os.path.join(workdir, 'leads.jsonl'),
+            'LOCAL_STORE_PATH': os.path.join(workdir, 'local_store.sqlite3'),
+            'METRICS_DIR': os.path.join(workdir, 'metrics'),
+            'LOG_LEVEL': 'WARNING',
+            'GUNICORN_LOG_LEVEL': 'warning',
+        })
+        imports = [measure_import(env) for _ in range(args.runs)]
+        ttfbs = [measure_ttfb(env) for _ in range(args.runs)]
+
+    import_ms = statistics.median(run['ms'] for run in imports)
+    ttfb_ms = statistics.median(ttfbs)
+    loaded = sorted({module for run in imports for module in run['loaded']})
+
+    print(f"{'measurement':<28}{'median ms':>10}{'min ms':>9}{'max ms':>9}{'limit ms':>10}")
+    print(f"{'import app':<28}{import_ms:>10.1f}{min(run['ms'] for run in imports):>9.1f}"
+          f"{max(run['ms'] for run in imports):>9.1f}{args.max_import_ms:>10.0f}")
+    print(f"{'gunicorn launch -> GET /':<28}{ttfb_ms:>10.1f}{min(ttfbs):>9.1f}{max(ttfbs):>9.1f}{args.max_ttfb_ms:>10.0f}")
+
+    failures = []
+    if import_ms > args.max_import_ms:
+        failures.append(f"import app took {import_ms:.1f} ms (limit {args.max_import_ms:.0f} ms)")
+    if ttfb_ms > args.max_ttfb_ms:
+        failures.append(f"first byte after {ttfb_ms:.1f} ms (limit {args.max_ttfb_ms:.0f} ms)")
+    if loaded:
+        failures.append(f"imported at boot instead of on first use: {', '.join(loaded)}")
+    if failures:
+        print("\n❌ Startup regression:")
+        for message in failures:
+            print(f"   {message}")
+        return 1
+    print("\n✅ Within startup limits")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
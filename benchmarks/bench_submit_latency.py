@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Lead Submission Latency Benchmark
+Posts leads to /submit-lead while the mock CallMeBot upstream answers after
+increasing delays, once with inline sending and once through the
+notification queue, and reports the visitor-facing latency
+"""
+
+import contextlib
+import io
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_upstream import MockUpstream
+
+LEAD = {
+    'name': 'Benchmark User',
+    'phone': '05551234567',
+    'email': 'bench@example.com',
+    'language': 'tr',
+    'kvkk_consent': 'on',
+}
+
+
+def measure(client, count):
+    latencies = []
+    for _ in range(count):
+        started = time.perf_counter()
+        response = client.post('/submit-lead', data=LEAD)
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 302, response.status_code
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.95) - 1]
+
+
+def run(count=20, delays=(0.0, 0.25, 1.0)):
+    rows = []
+    # utils.mail logs every send; keep the report readable
+    with MockUpstream() as upstream, tempfile.TemporaryDirectory() as workdir, \
+            contextlib.redirect_stdout(io.StringIO()):
+        os.environ['CALLMEBOT_API_KEY'] = 'benchmark'
+        os.environ['CALLMEBOT_API_URL'] = f'{upstream.base_url}/whatsapp.php'
+        # Measure one upstream call per lead, not digest coalescing
+        os.environ['NOTIFY_RATE_LIMIT'] = '1000000'
+        # Every request submits the same lead from the same address
+        os.environ['LEAD_DEDUPE'] = 'false'
+        os.environ['RATE_LIMIT'] = 'false'
+        # Keep benchmark leads out of the real outbox
+        os.environ['LOCAL_STORE_PATH'] = os.path.join(workdir, 'local_store.sqlite3')
+        logging.disable(logging.CRITICAL)
+
+        from app import app
+        from utils import notify_queue
+
+        client = app.test_client()
+        for delay in delays:
+            upstream.delay = delay
+            for mode, workers in [('inline', 0), ('queued', 4)]:
+                notify_queue.WORKERS = workers
+                p50, p95 = measure(client, count)
+                notify_queue.drain(timeout=count * delay + 30)
+                rows.append((delay, mode, p50, p95))
+        stats = notify_queue.get_stats()
+
+    print(f"{'upstream delay':>15}{'mode':>10}{'p50 ms':>10}{'p95 ms':>10}")
+    for delay, mode, p50, p95 in rows:
+        print(f"{delay:>14.2f}s{mode:>10}{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}")
+    print(f"\nQueue stats: {stats}")
+
+
+if __name__ == '__main__':
+    run()
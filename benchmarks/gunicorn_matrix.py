@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Gunicorn Configuration Matrix
+Runs our traffic pattern (mostly page views with a steady trickle of lead
+submissions, CallMeBot answering slowly) against several gunicorn.conf.py
+settings plus the old bare `gunicorn main:app`, and reports page and lead
+latency, throughput and the total memory (PSS) of master and workers.
+
+Usage:
+    python benchmarks/gunicorn_matrix.py
+    python benchmarks/gunicorn_matrix.py --page-requests 3000 --concurrency 32 --upstream-delay 1.0
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import GunicornServer, drive
+from mock_upstream import MockUpstream
+
+
+def _gunicorn_conf():
+    # Worker counts as gunicorn.conf.py computes them (CPU quota, cap)
+    spec = importlib.util.spec_from_file_location('gunicorn_conf', os.path.join(ROOT, 'gunicorn.conf.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+_conf = _gunicorn_conf()
+CPUS = _conf._cpus
+WORKERS = min(_conf._max_workers, CPUS + 1)
+ASYNC_WORKERS = min(_conf._max_workers, CPUS)
+
+# name -> (extra gunicorn args, environment for gunicorn.conf.py, required module).
+# GunicornServer passes -c /dev/null when no config is given, so the bare row
+# really runs without gunicorn.conf.py.
+CONFIGURATIONS = {
+    'bare (old)': ([], {}, None),
+    f'sync x{WORKERS}': (['-c', 'gunicorn.conf.py'], {'GUNICORN_WORKER_CLASS': 'sync'}, None),
+    f'gthread {WORKERS}x4': (['-c', 'gunicorn.conf.py'], {'GUNICORN_THREADS': '4'}, None),
+    f'gthread {WORKERS}x8': (['-c', 'gunicorn.conf.py'], {'GUNICORN_THREADS': '8'}, None),
+    f'gthread {WORKERS}x4 no preload': (['-c', 'gunicorn.conf.py'], {'GUNICORN_PRELOAD': 'false'}, None),
+    f'gevent x{ASYNC_WORKERS}': (['-c', 'gunicorn.conf.py'], {'GUNICORN_WORKER_CLASS': 'gevent'}, 'gevent'),
+}
+
+
+def _children(pid):
+    children = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # Fields after the parenthesised command: state, ppid, ...
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if ppid == pid:
+                children.append(int(entry))
+    return children
+
+
+def total_pss_mb(pid):
+    """Proportional set size of a process and its children in MB (Linux only, else None)"""
+    total = 0
+    try:
+        for process in [pid] + _children(pid):
+            with open(f'/proc/{process}/smaps_rollup') as f:
+                for line in f:
+                    if line.startswith('Pss:'):
+                        total += int(line.split()[1])
+                        break
+    except OSError:
+        return None
+    return total / 1024
+
+
+def run_configuration(args, env, page_requests, lead_requests, concurrency, upstream_delay):
+    with MockUpstream(delay=upstream_delay) as upstream, tempfile.TemporaryDirectory() as workdir:
+        environment = dict(os.environ)
+        environment.update({
+            'CALLMEBOT_API_KEY': 'matrix',
+            'CALLMEBOT_API_URL': f'{upstream.base_url}/whatsapp.php',
+            'LEAD_JOURNAL_PATH': os.path.join(workdir, 'leads.jsonl'),
+            'LOCAL_STORE_PATH': os.path.join(workdir, 'local_store.sqlite3'),
+            # Every request submits the same lead from the same address; measure the full notification path
+            'LEAD_DEDUPE': 'false',
+            'RATE_LIMIT': 'false',
+            'METRICS_DIR': os.path.join(workdir, 'metrics'),
+            'LOG_LEVEL': 'WARNING',
+        })
+        environment.update(env)
+        with GunicornServer(environment, args) as server:
+            drive(server.base_url, 'index', 50, min(concurrency, 10))
+            results = {}
+            # Page views and lead posts at the same time, as on the live site
+            jobs = [
+                ('pages', 'index', page_requests, concurrency),
+                ('leads', 'submit_lead', lead_requests, max(1, concurrency // 8)),
+            ]
+            threads = [threading.Thread(target=lambda job=job: results.__setitem__(job[0], drive(server.base_url, *job[1:])))
+                       for job in jobs]
+            [thread.start() for thread in threads]
+            [thread.join() for thread in threads]
+            results['pss_mb'] = total_pss_mb(server.process.pid)
+            return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Compare gunicorn configurations on our traffic pattern')
+    parser.add_argument('--page-requests', type=int, default=2000)
+    parser.add_argument('--lead-requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--upstream-delay', type=float, default=0.5, help='mock CallMeBot latency in seconds')
+    parser.add_argument('--only', help='comma separated configuration names')
+    args = parser.parse_args(argv)
+
+    selected = [name.strip() for name in args.only.split(',')] if args.only else list(CONFIGURATIONS)
+    print(f"{CPUS} CPU(s), CallMeBot delay {args.upstream_delay}s, concurrency {args.concurrency}\n")
+    print(f"{'configuration':<28}{'page/s':>8}{'page p50':>10}{'page p95':>10}{'page p99':>10}"
+          f"{'lead p95':>10}{'errors':>8}{'PSS MB':>8}")
+    for name in selected:
+        gunicorn_args, env, module = CONFIGURATIONS[name]
+        if module and importlib.util.find_spec(module) is None:
+            print(f"{name:<28}  skipped ({module} not installed)")
+            continue
+        results = run_configuration(gunicorn_args, env, args.page_requests, args.lead_requests,
+                                    args.concurrency, args.upstream_delay)
+        pages, leads = results['pages'], results['leads']
+        pss = f"{results['pss_mb']:>8.0f}" if results['pss_mb'] is not None else f"{'-':>8}"
+        print(f"{name:<28}{pages['rps']:>8.0f}{pages['p50_ms']:>10.1f}{pages['p95_ms']:>10.1f}{pages['p99_ms']:>10.1f}"
+              f"{leads['p95_ms']:>10.1f}{pages['errors'] + leads['errors']:>8}{pss}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
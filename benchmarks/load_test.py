@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+HTTP Load Benchmark
+Boots the app under gunicorn on a local port, points outbound WhatsApp
+notifications at a local mock, and drives /, /<lang>, /submit-lead,
+/callback-request and /health at a configurable concurrency. Reports
+throughput and p50/p95/p99 latency per scenario and compares them with
+benchmarks/baseline.json; a regression beyond the tolerance exits with 1.
+
+Usage:
+    python benchmarks/load_test.py                      # run and compare
+    python benchmarks/load_test.py --update-baseline    # record a new baseline
+    python benchmarks/load_test.py --concurrency 32 --requests 2000
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+
+from mock_upstream import MockUpstream
+
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+LEAD_FORM = {
+    'name': 'Load Test',
+    'phone': '0555 123 45 67',
+    'email': 'load@example.com',
+    'language': 'tr',
+    'unit_interest': '3+1',
+    'kvkk_consent': 'on',
+}
+CALLBACK_FORM = {'callback_name': 'Load Test', 'callback_phone': '05551234567', 'language': 'tr'}
+
+# name -> (method, path, form data, expected status)
+SCENARIOS = {
+    'index': ('GET', '/', None, 200),
+    'index_en': ('GET', '/en', None, 200),
+    'index_ar': ('GET', '/ar', None, 200),
+    'submit_lead': ('POST', '/submit-lead', LEAD_FORM, 302),
+    'callback_request': ('POST', '/callback-request', CALLBACK_FORM, 200),
+    'health': ('GET', '/health', None, 200),
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class ServerProcess:
+    """Runs a web server command in a subprocess for the duration of a with block"""
+
+    def __init__(self, command, env, port):
+        self.command = command
+        self.port = port
+        self.base_url = f'http://127.0.0.1:{port}'
+        self.env = env
+        self.process = None
+
+    def __enter__(self):
+        self.log = tempfile.TemporaryFile()
+        self.process = subprocess.Popen(self.command, cwd=ROOT, env=self.env, stdout=self.log, stderr=subprocess.STDOUT)
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                self.log.seek(0)
+                raise RuntimeError(f"{self.command[2]} exited early:\n{self.log.read().decode(errors='replace')}")
+            try:
+                if requests.get(f'{self.base_url}/health', timeout=1).status_code == 200:
+                    return self
+            except requests.RequestException:
+                time.sleep(0.2)
+        raise RuntimeError(f'{self.command[2]} did not become ready within 30s')
+
+    def __exit__(self, *exc):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=20)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+
+
+class GunicornServer(ServerProcess):
+    """
+    Runs `gunicorn main:app` with extra command line arguments. Without a -c
+    among them gunicorn runs with its built-in defaults: gunicorn >= 20 would
+    otherwise load ./gunicorn.conf.py from the working directory on its own.
+    """
+
+    def __init__(self, env, args=(), port=None):
+        port = port or free_port()
+        args = list(args)
+        if not any(arg in ('-c', '--config') or arg.startswith('--config=') for arg in args):
+            args = ['-c', os.devnull] + args
+        command = [sys.executable, '-m', 'gunicorn', '--bind', f'127.0.0.1:{port}',
+                   '--log-level', 'warning'] + args + ['main:app']
+        super().__init__(command, env, port)
+
+
+class UvicornServer(ServerProcess):
+    """Runs the ASGI entry point (`uvicorn asgi:app`) with extra command line arguments"""
+
+    def __init__(self, env, args=(), port=None):
+        port = port or free_port()
+        command = [sys.executable, '-m', 'uvicorn', '--host', '127.0.0.1', '--port', str(port),
+                   '--log-level', 'warning', '--no-access-log'] + list(args) + ['asgi:app']
+        super().__init__(command, env, port)
+
+
+def drive(base_url, scenario, total, concurrency):
+    """Send `total` requests for one scenario from `concurrency` threads with keep-alive sessions"""
+    method, path, data, expected = SCENARIOS[scenario]
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    remaining = [total]
+
+    def worker():
+        session = requests.Session()
+        local = []
+        failed = 0
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    break
+                remaining[0] -= 1
+            started = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, data=data, allow_redirects=False, timeout=30)
+                ok = response.status_code == expected
+            except requests.RequestException:
+                ok = False
+            local.append(time.perf_counter() - started)
+            failed += not ok
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+        session.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    started = time.perf_counter()
+    [thread.start() for thread in threads]
+    [thread.join() for thread in threads]
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def run_suite(scenarios, total, concurrency, server_args=(), upstream_delay=0.2, extra_env=None, warmup=20,
+              server_class=GunicornServer):
+    """Boot the server (gunicorn by default) against a mock upstream and return {scenario: stats}"""
+    with MockUpstream(delay=upstream_delay) as upstream, tempfile.TemporaryDirectory() as workdir:
+        env = dict(os.environ)
+        env.update({
+            'CALLMEBOT_API_KEY': 'loadtest',
+            'CALLMEBOT_API_URL': f'{upstream.base_url}/whatsapp.php',
+            'LEAD_JOURNAL_PATH': os.path.join(workdir, 'leads.jsonl'),
+            'LOCAL_STORE_PATH': os.path.join(workdir, 'local_store.sqlite3'),
+            # Every request submits the same lead from the same address; measure the full notification path
+            'LEAD_DEDUPE': 'false',
+            'RATE_LIMIT': 'false',
+            'PYTHONUNBUFFERED': '1',
+        })
+        env.update(extra_env or {})
+        results = {}
+        with server_class(env, server_args) as server:
+            for scenario in scenarios:
+                drive(server.base_url, scenario, warmup, min(concurrency, warmup))
+                results[scenario] = drive(server.base_url, scenario, total, concurrency)
+        return results
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages (empty when within tolerance)"""
+    regressions = []
+    for scenario, current in results.items():
+        reference = baseline.get(scenario)
+        if not reference:
+            continue
+        if current['errors']:
+            regressions.append(f"{scenario}: {current['errors']} failed requests")
+        if current['p95_ms'] > reference['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{scenario}: p95 {current['p95_ms']:.1f} ms vs baseline {reference['p95_ms']:.1f} ms")
+        if current['rps'] < reference['rps'] * (1 - tolerance):
+            regressions.append(f"{scenario}: {current['rps']:.0f} req/s vs baseline {reference['rps']:.0f} req/s")
+    return regressions
+
+
+def print_results(results, baseline=None):
+    print(f"{'scenario':<18}{'req':>7}{'err':>5}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'p95 base':>10}")
+    for scenario, stats in results.items():
+        base = (baseline or {}).get(scenario, {}).get('p95_ms')
+        base = f"{base:>10.1f}" if base is not None else f"{'-':>10}"
+        print(f"{scenario:<18}{stats['requests']:>7}{stats['errors']:>5}{stats['rps']:>9.0f}"
+              f"{stats['p50_ms']:>9.1f}{stats['p95_ms']:>9.1f}{stats['p99_ms']:>9.1f}{base}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Load test the app under gunicorn')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='comma separated (default: all)')
+    parser.add_argument('--requests', type=int, default=1000, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--upstream-delay', type=float, default=0.2, help='mock CallMeBot latency in seconds')
+    parser.add_argument('--gunicorn-args', default='--workers 2 --threads 4 --worker-class gthread',
+                        help='extra gunicorn arguments (default: %(default)s)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--tolerance', type=float, default=0.3, help='allowed slowdown fraction (default: %(default)s)')
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args(argv)
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    results = run_suite(scenarios, args.requests, args.concurrency, args.gunicorn_args.split(), args.upstream_delay)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('scenarios', {})
+    print_results(results, baseline)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'recorded_with': {'requests': args.requests, 'concurrency': args.concurrency,
+                                  'upstream_delay': args.upstream_delay, 'gunicorn_args': args.gunicorn_args},
+                'scenarios': results,
+            }, f, indent=2)
+        print(f"\n📝 Baseline written to {os.path.relpath(args.baseline, ROOT)}")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\n❌ Performance regression:")
+        for message in regressions:
+            print(f"   {message}")
+        return 1
+    print("\n✅ Within tolerance of baseline" if baseline else "\nℹ️  No baseline to compare against (use --update-baseline)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
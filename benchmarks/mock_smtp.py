@@ -0,0 +1,97 @@
+"""
+Local stand-in for MAIL_SERVER used by the benchmarks. Speaks enough SMTP
+for smtplib and Flask-Mail (EHLO, STARTTLS, AUTH, MAIL, RCPT, DATA, RSET,
+NOOP, QUIT), accepts any credentials and counts sessions and messages.
+greeting_delay models the network round trips and server work of opening
+a session, which is what connection reuse saves.
+"""
+
+import socketserver
+import ssl
+import threading
+import time
+
+
+class MockSMTP:
+    def __init__(self, host='127.0.0.1', port=0, greeting_delay=0.0, certfile=None, keyfile=None):
+        self.greeting_delay = greeting_delay
+        self.sessions = 0
+        self.messages = 0
+        self._lock = threading.Lock()
+        self._tls = None
+        if certfile:
+            self._tls = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            self._tls.load_cert_chain(certfile, keyfile)
+        smtp = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            disable_nagle_algorithm = True
+
+            def reply(self, line):
+                self.wfile.write(line.encode('ascii') + b'\r\n')
+                self.wfile.flush()
+
+            def starttls(self):
+                self.reply('220 Ready to start TLS')
+                self.connection = self.request = smtp._tls.wrap_socket(self.request, server_side=True)
+                self.rfile = self.connection.makefile('rb')
+                self.wfile = self.connection.makefile('wb')
+
+            def read_data(self):
+                while True:
+                    line = self.rfile.readline()
+                    if not line or line == b'.\r\n':
+                        return
+
+            def handle(self):
+                with smtp._lock:
+                    smtp.sessions += 1
+                if smtp.greeting_delay:
+                    time.sleep(smtp.greeting_delay)
+                self.reply('220 mock-smtp ESMTP')
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode('ascii', 'replace').strip()
+                    verb = command.split(' ', 1)[0].upper()
+                    if verb == 'EHLO':
+                        extensions = ['250-mock-smtp', '250-AUTH PLAIN LOGIN', '250-8BITMIME']
+                        if smtp._tls and not isinstance(self.connection, ssl.SSLSocket):
+                            extensions.append('250-STARTTLS')
+                        extensions.append('250 SIZE 10485760')
+                        self.reply('\r\n'.join(extensions))
+                    elif verb == 'HELO':
+                        self.reply('250 mock-smtp')
+                    elif verb == 'STARTTLS' and smtp._tls:
+                        self.starttls()
+                    elif verb == 'AUTH':
+                        self.reply('235 Authentication successful')
+                    elif verb == 'DATA':
+                        self.reply('354 End data with <CR><LF>.<CR><LF>')
+                        self.read_data()
+                        with smtp._lock:
+                            smtp.messages += 1
+                        self.reply('250 OK queued')
+                    elif verb == 'QUIT':
+                        self.reply('221 Bye')
+                        return
+                    else:
+                        # MAIL, RCPT, RSET, NOOP
+                        self.reply('250 OK')
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self.server = Server((host, port), Handler)
+        self.host, self.port = self.server.server_address
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
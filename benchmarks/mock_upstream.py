@@ -0,0 +1,117 @@
+"""
+Local stand-in for the CallMeBot and WhatsApp Business APIs used by the
+benchmarks. Every request is answered after a configurable delay, over
+plain HTTP or HTTPS with a throwaway self-signed certificate.
+"""
+
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+def make_self_signed_cert(directory=None):
+    """Create a self-signed certificate for 127.0.0.1 with openssl, return (certfile, keyfile)"""
+    directory = directory or tempfile.mkdtemp(prefix='mock-upstream-')
+    certfile = os.path.join(directory, 'cert.pem')
+    keyfile = os.path.join(directory, 'key.pem')
+    subprocess.run(
+        ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+         '-subj', '/CN=127.0.0.1', '-addext', 'subjectAltName=IP:127.0.0.1',
+         '-keyout', keyfile, '-out', certfile],
+        check=True, capture_output=True,
+    )
+    return certfile, keyfile
+
+
+class MockUpstream:
+    """
+    Threaded HTTP server that answers notification calls with 200 after delay
+    seconds. With rate_limit=(count, window) it behaves like a throttling API
+    and answers 429 once more than count messages arrive within window seconds.
+    """
+
+    def __init__(self, delay=0.0, host='127.0.0.1', port=0, certfile=None, keyfile=None, rate_limit=None):
+        self.delay = delay
+        self.rate_limit = rate_limit
+        self.requests = 0
+        self.connections = 0
+        self.throttled = 0
+        self.messages = []
+        self._accepted_at = []
+        self._lock = threading.Lock()
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                with upstream._lock:
+                    upstream.connections += 1
+                super().setup()
+
+            def _reply(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                if length:
+                    self.rfile.read(length)
+                query = parse_qs(urlparse(self.path).query)
+                with upstream._lock:
+                    upstream.requests += 1
+                    accepted = upstream._accept()
+                    if accepted:
+                        upstream.messages.append(query.get('text', [''])[0])
+                    else:
+                        upstream.throttled += 1
+                if upstream.delay:
+                    time.sleep(upstream.delay)
+                body = b'Message queued' if accepted else b'Too many requests'
+                self.send_response(200 if accepted else 429)
+                self.send_header('Content-Type', 'text/plain')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _reply
+            do_POST = _reply
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.scheme = 'http'
+        if certfile:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(certfile, keyfile)
+            self.server.socket = context.wrap_socket(self.server.socket, server_side=True)
+            self.scheme = 'https'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _accept(self):
+        if not self.rate_limit:
+            return True
+        count, window = self.rate_limit
+        now = time.monotonic()
+        self._accepted_at = [at for at in self._accepted_at if now - at < window]
+        if len(self._accepted_at) >= count:
+            return False
+        self._accepted_at.append(now)
+        return True
+
+    @property
+    def base_url(self):
+        host, port = self.server.server_address[:2]
+        return f'{self.scheme}://{host}:{port}'
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
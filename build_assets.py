@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Static Asset Build
+Copies CSS, JS and images from static/ to static/dist/ under content-hashed
+names, pre-compresses text assets with gzip and brotli, and writes
+static/dist/manifest.json. utils/assets.py uses the manifest to rewrite
+url_for('static', ...) and serve the hashed files with immutable caching.
+
+Run after build_images.py (the Dockerfile does this at build time):
+    python build_assets.py
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT, 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+FINGERPRINT_EXTENSIONS = ('.css', '.js', '.svg', '.jpg', '.jpeg', '.png', '.webp', '.ico', '.woff', '.woff2')
+COMPRESS_EXTENSIONS = ('.css', '.js', '.svg', '.json')
+# Skip compressed variants that save less than this fraction
+MIN_SAVING = 0.05
+
+CSS_URL = re.compile(r'''url\(\s*(['"]?)(?!data:|https?:|//|/)([^'")?#]+)([?#][^'")]*)?\1\s*\)''')
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:10]
+
+
+def hashed_name(logical, data):
+    stem, ext = posixpath.splitext(logical)
+    return f'dist/{stem}.{content_hash(data)}{ext}'
+
+
+def rewrite_css_urls(logical, data, manifest):
+    """Point relative url() references in a stylesheet at the fingerprinted files"""
+    css = data.decode('utf-8')
+    base = posixpath.dirname(logical)
+    hashed_base = posixpath.dirname(f'dist/{logical}')
+
+    def replace(match):
+        quote, target, suffix = match.group(1), match.group(2), match.group(3) or ''
+        referenced = posixpath.normpath(posixpath.join(base, target))
+        entry = manifest.get(referenced)
+        new_target = entry['path'] if entry else referenced
+        return f'url({quote}{posixpath.relpath(new_target, hashed_base)}{suffix}{quote})'
+
+    return CSS_URL.sub(replace, css).encode('utf-8')
+
+
+def write_compressed(path, data):
+    encodings = []
+    variants = [('gzip', '.gz', lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.insert(0, ('br', '.br', lambda d: brotli.compress(d, quality=11)))
+    for encoding, suffix, compress in variants:
+        compressed = compress(data)
+        if len(compressed) <= len(data) * (1 - MIN_SAVING):
+            with open(path + suffix, 'wb') as f:
+                f.write(compressed)
+            encodings.append(encoding)
+    return encodings
+
+
+def collect_sources():
+    sources = []
+    for directory, dirnames, filenames in os.walk(STATIC_DIR):
+        if os.path.abspath(directory).startswith(DIST_DIR):
+            continue
+        dirnames[:] = [d for d in dirnames if os.path.join(directory, d) != DIST_DIR]
+        for filename in filenames:
+            if filename.lower().endswith(FINGERPRINT_EXTENSIONS):
+                path = os.path.join(directory, filename)
+                sources.append(os.path.relpath(path, STATIC_DIR).replace(os.sep, '/'))
+    # Stylesheets last so their url() references can point at hashed files
+    return sorted(sources, key=lambda logical: (logical.endswith('.css'), logical))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fingerprint and pre-compress static assets')
+    parser.parse_args(argv)
+
+    if brotli is None:
+        print("⚠️  brotli not installed, writing gzip variants only (pip install Brotli)")
+
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    manifest = {}
+    original_bytes = compressed_bytes = 0
+
+    for logical in collect_sources():
+        with open(os.path.join(STATIC_DIR, logical), 'rb') as f:
+            data = f.read()
+        if logical.endswith('.css'):
+            data = rewrite_css_urls(logical, data, manifest)
+
+        target = hashed_name(logical, data)
+        target_path = os.path.join(STATIC_DIR, target)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        with open(target_path, 'wb') as f:
+            f.write(data)
+
+        encodings = write_compressed(target_path, data) if logical.endswith(COMPRESS_EXTENSIONS) else []
+        manifest[logical] = {'path': target, 'encodings': encodings}
+
+        if encodings:
+            best = min(os.path.getsize(target_path + ('.br' if e == 'br' else '.gz')) for e in encodings)
+            original_bytes += len(data)
+            compressed_bytes += best
+
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+    print(f"✅ {len(manifest)} assets fingerprinted into {os.path.relpath(DIST_DIR, ROOT)}/")
+    if original_bytes:
+        print(f"📦 Text assets: {original_bytes / 1024:.0f} KB -> {compressed_bytes / 1024:.0f} KB compressed")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Responsive Image Build
+Generates resized WebP variants and progressive JPEG fallbacks for the
+gallery photos, with EXIF/ICC metadata stripped, plus a manifest that the
+responsive_image() template helper (utils/images.py) reads.
+
+Run before deploying (the Dockerfile does this at build time):
+    python build_images.py
+    python build_images.py --force        # rebuild everything
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT, 'static')
+SOURCE_DIR = os.path.join(STATIC_DIR, 'images', 'gallery')
+OUTPUT_DIR = os.path.join(SOURCE_DIR, 'responsive')
+MANIFEST_PATH = os.path.join(OUTPUT_DIR, 'manifest.json')
+
+WIDTHS = (480, 768, 1200, 1600)
+WEBP_QUALITY = 75
+JPEG_QUALITY = 78
+SOURCE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+
+def slugify(filename):
+    stem = os.path.splitext(filename)[0].lower()
+    return re.sub(r'[^a-z0-9]+', '-', stem).strip('-')
+
+
+def static_path(path):
+    return os.path.relpath(path, STATIC_DIR).replace(os.sep, '/')
+
+
+def build_variants(Image, source, force=False):
+    """Write every width/format variant for one image and return its manifest entry"""
+    slug = slugify(os.path.basename(source))
+    source_mtime = os.path.getmtime(source)
+
+    with Image.open(source) as original:
+        # Apply the camera orientation before the EXIF block is dropped
+        from PIL import ImageOps
+        image = ImageOps.exif_transpose(original)
+        image = image.convert('RGB')
+        width, height = image.size
+
+        widths = [w for w in WIDTHS if w < width] + [min(width, WIDTHS[-1])]
+        entry = {'width': width, 'height': height, 'webp': [], 'jpeg': []}
+        for target in sorted(set(widths)):
+            target_height = round(height * target / width)
+            resized = None
+            for fmt, ext in (('webp', 'webp'), ('jpeg', 'jpg')):
+                out_path = os.path.join(OUTPUT_DIR, f'{slug}-{target}w.{ext}')
+                if force or not os.path.exists(out_path) or os.path.getmtime(out_path) < source_mtime:
+                    if resized is None:
+                        resized = image.resize((target, target_height), Image.LANCZOS)
+                    if fmt == 'webp':
+                        resized.save(out_path, 'WEBP', quality=WEBP_QUALITY, method=6)
+                    else:
+                        resized.save(out_path, 'JPEG', quality=JPEG_QUALITY, optimize=True, progressive=True)
+                entry[fmt].append({'file': static_path(out_path), 'width': target, 'bytes': os.path.getsize(out_path)})
+    return entry
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build responsive gallery image variants')
+    parser.add_argument('--force', action='store_true', help='rebuild variants that are up to date')
+    args = parser.parse_args(argv)
+
+    try:
+        from PIL import Image
+    except ImportError:
+        print("❌ Pillow is required: pip install Pillow")
+        return 1
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    manifest = {}
+    for filename in sorted(os.listdir(SOURCE_DIR)):
+        source = os.path.join(SOURCE_DIR, filename)
+        if not os.path.isfile(source) or not filename.lower().endswith(SOURCE_EXTENSIONS):
+            continue
+        entry = build_variants(Image, source, force=args.force)
+        manifest[static_path(source)] = entry
+
+        original = os.path.getsize(source)
+        smallest = entry['webp'][0]
+        print(f"✅ {filename}: {original / 1024:.0f} KB -> "
+              f"{smallest['width']}w webp {smallest['bytes'] / 1024:.0f} KB "
+              f"({len(entry['webp'])} widths)")
+
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    print(f"📝 Manifest written to {static_path(MANIFEST_PATH)}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
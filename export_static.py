@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Static Site Export
+Renders every landing page (/, /<lang>, /kvkk/<lang>, /success/<lang>) in
+every supported language through the Flask app and its templates, and
+writes them with the static files into a directory that nginx or a CDN
+can serve. Flask then only has to handle the form posts (/submit-lead,
+/callback-request) and the operational endpoints.
+
+Pages are written as <path>/index.html with gzip/brotli variants next to
+them. The site is built in a temporary directory next to --output and
+swapped in when complete; an existing --output is only replaced if it is
+empty or an earlier export (it holds the .static-export marker file). References to /static/ are rewritten to --asset-url, and the form
+posts to --app-url when the pages are served from another origin than
+the app. Run build_images.py and build_assets.py first so the pages point
+at the fingerprinted assets:
+    python export_static.py --base-url https://example.com
+    python export_static.py --base-url https://example.com --output /var/www/site \\
+        --asset-url https://cdn.example.com/static/ --app-url https://app.example.com
+
+nginx in front of the exported directory and the app:
+    location = /submit-lead      { proxy_pass http://127.0.0.1:5000; }
+    location = /callback-request { proxy_pass http://127.0.0.1:5000; }
+    location / {
+        gzip_static on;
+        try_files $uri $uri/index.html @app;
+    }
+    location @app { proxy_pass http://127.0.0.1:5000; }
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+from build_assets import write_compressed
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATIC_DIR = os.path.join(ROOT, 'static')
+DEFAULT_OUTPUT = os.path.join(ROOT, 'site')
+# Written into every export; only directories holding it are replaced
+MARKER = '.static-export'
+
+# Endpoints that stay dynamic; forms on the exported pages post to the app
+DYNAMIC_PATHS = ('/submit-lead', '/callback-request')
+
+# /static/ at the start of an attribute value, a url() or a srcset entry
+STATIC_URL = re.compile(r'''(?<=["'(\s,])/static/''')
+
+
+def page_paths(languages):
+    """Every URL path that renders a landing page, default language first"""
+    paths = ['/', '/kvkk', '/success']
+    for lang in languages:
+        paths.extend([f'/{lang}', f'/kvkk/{lang}', f'/success/{lang}'])
+    return paths
+
+
+def output_file(output, path):
+    return os.path.join(output, *path.strip('/').split('/'), 'index.html')
+
+
+def rewrite_urls(html, asset_url, app_url):
+    if asset_url != '/static/':
+        html = STATIC_URL.sub(asset_url, html)
+    if app_url:
+        for path in DYNAMIC_PATHS:
+            html = html.replace(f'action="{path}"', f'action="{app_url}{path}"')
+    return html
+
+
+def replaceable(output):
+    """Whether output is missing, empty or an earlier export"""
+    if not os.path.lexists(output):
+        return True
+    if not os.path.isdir(output) or os.path.islink(output):
+        return False
+    return not os.listdir(output) or os.path.isfile(os.path.join(output, MARKER))
+
+
+def swap_in(staging, output):
+    """Move the finished export to output, then remove the previous one"""
+    previous = None
+    if os.path.lexists(output):
+        previous = f'{staging}.previous'
+        os.rename(output, previous)
+    os.rename(staging, output)
+    if previous:
+        shutil.rmtree(previous)
+
+
+def export(app, staging, base_url, asset_url, app_url):
+    """Render every page into staging; returns (pages, html bytes) or None when a page fails"""
+    from utils.i18n import get_supported_languages
+
+    pages = 0
+    html_bytes = 0
+    client = app.test_client()
+    for path in page_paths(get_supported_languages()):
+        response = client.get(path, base_url=base_url)
+        if response.status_code != 200:
+            print(f"❌ {path}: HTTP {response.status_code}")
+            return None
+        html = rewrite_urls(response.get_data(as_text=True), asset_url, app_url)
+        target = output_file(staging, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        data = html.encode('utf-8')
+        with open(target, 'wb') as f:
+            f.write(data)
+        write_compressed(target, data)
+        pages += 1
+        html_bytes += len(data)
+
+    shutil.copytree(STATIC_DIR, os.path.join(staging, 'static'))
+    with open(os.path.join(staging, MARKER), 'w', encoding='utf-8') as f:
+        f.write(f"{base_url}\n")
+    return pages, html_bytes
+
+
+def load_app():
+    # Rendering pages must not start the outbox relay (it would send pending
+    # notifications from here) or add to the running workers' metrics
+    os.environ.setdefault('NOTIFY_OUTBOX', 'false')
+    os.environ.setdefault('METRICS_DIR', '')
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    sys.path.insert(0, ROOT)
+    from app import app
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Render the landing pages into a static site')
+    parser.add_argument('--base-url', required=True,
+                        help='public URL of the site, used for og:url (e.g. https://example.com)')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT,
+                        help='directory to write (replaced if empty or an earlier export)')
+    parser.add_argument('--asset-url', default='/static/',
+                        help='where the static files are served from (default /static/)')
+    parser.add_argument('--app-url', default='',
+                        help='origin of the Flask app when it differs from the pages')
+    args = parser.parse_args(argv)
+    base_url = args.base_url.rstrip('/')
+    asset_url = args.asset_url if args.asset_url.endswith('/') else args.asset_url + '/'
+    app_url = args.app_url.rstrip('/')
+    output = os.path.abspath(args.output)
+
+    if not replaceable(output):
+        print(f"❌ {output} is not empty and holds no {MARKER} file from an earlier export; "
+              "refusing to replace it")
+        return 1
+
+    app = load_app()
+
+    parent = os.path.dirname(output)
+    os.makedirs(parent, exist_ok=True)
+    # Same file system as output, so the swap is a rename
+    staging = tempfile.mkdtemp(prefix=f'.{os.path.basename(output)}.', dir=parent)
+    try:
+        os.chmod(staging, 0o755)
+        result = export(app, staging, base_url, asset_url, app_url)
+        if result is None:
+            return 1
+        swap_in(staging, output)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    pages, html_bytes = result
+
+    print(f"✅ {pages} pages ({html_bytes / 1024:.0f} KB) exported to {output}")
+    if asset_url != '/static/':
+        print(f"📦 Upload {os.path.join(output, 'static')} to {asset_url}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Gunicorn configuration (Procfile, Dockerfile: gunicorn -c gunicorn.conf.py main:app)
+
+Environment:
+    PORT                   listen port (default 5000)
+    GUNICORN_WORKER_CLASS  gthread (default), sync, gevent or eventlet
+    WEB_CONCURRENCY        worker processes (default: usable CPUs + 1, usable CPUs for async
+                           classes, at most GUNICORN_MAX_WORKERS)
+    GUNICORN_MAX_WORKERS   cap on the default worker count (default 8)
+    GUNICORN_THREADS       threads per gthread worker (default 4)
+    GUNICORN_CONNECTIONS   concurrent connections per worker (default 1000)
+    GUNICORN_PRELOAD       import the app once in the master and fork (default true)
+    GUNICORN_TIMEOUT, GUNICORN_GRACEFUL_TIMEOUT, GUNICORN_KEEPALIVE
+    GUNICORN_MAX_REQUESTS  recycle workers after this many requests (default 0 = never)
+"""
+
+import gc
+import math
+import os
+
+ASYNC_WORKER_CLASSES = ('gevent', 'eventlet')
+
+
+def _available_cpus():
+    # os.cpu_count() reports every CPU of the host; containers (Railway,
+    # Docker) are limited by the affinity mask and the cgroup CPU quota
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    quota = period = None
+    try:
+        # cgroup v2: "<quota|max> <period>"
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+    except (OSError, ValueError):
+        try:
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+                quota = f.read().strip()
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+                period = f.read().strip()
+        except OSError:
+            pass
+    if quota not in (None, 'max', '-1') and period:
+        cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    return cpus
+
+
+_cpus = _available_cpus()
+# Every worker has its own notification threads, SMTP session and breakers
+_max_workers = int(os.environ.get('GUNICORN_MAX_WORKERS', '8'))
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+_async = worker_class in ASYNC_WORKER_CLASSES
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+# Async workers multiplex connections themselves; thread/sync workers need a few more processes
+workers = int(os.environ.get('WEB_CONCURRENCY') or min(_max_workers, _cpus if _async else _cpus + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', '4')) if worker_class == 'gthread' else 1
+worker_connections = int(os.environ.get('GUNICORN_CONNECTIONS', '1000'))
+
+# Translations, templates and manifests are loaded once and shared copy-on-write
+preload_app = os.environ.get('GUNICORN_PRELOAD', 'true').lower() in ['true', 'on', '1']
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+# Long enough for the notification queue to drain (NOTIFY_SHUTDOWN_TIMEOUT)
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+
+# Application logs are JSON on stdout (utils/log.py); keep gunicorn's on stderr
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+if _async and preload_app:
+    # The app starts threads and creates locks at import time, so patch the
+    # standard library before the master imports it rather than in the workers
+    if worker_class == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+    else:
+        import eventlet
+        eventlet.monkey_patch()
+
+
+def on_starting(server):
+    # Metrics snapshots from a previous run would be summed into this one
+    from utils.metrics import clear_snapshots
+    clear_snapshots()
+
+
+def when_ready(server):
+    server.log.info(
+        f"Serving with {workers} {worker_class} worker(s)"
+        + (f" x {threads} threads" if worker_class == 'gthread' else '')
+        + (', preloaded' if preload_app else '')
+    )
+
+
+def pre_fork(server, worker):
+    # Move everything the master has loaded out of the collector's reach so
+    # GC passes in the workers do not touch (and copy) the shared pages
+    if preload_app:
+        gc.freeze()
+
+
+def post_worker_init(worker):
+    # Gunicorn resets worker signal handlers during init, so this has to run
+    # afterwards. Reload translations with: kill -USR2 <worker pid>
+    from utils.i18n import install_reload_signal
+    install_reload_signal()
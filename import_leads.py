@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Bulk Lead Import
+Validates, normalizes and dedupes lead lists (fairs, partner agencies)
+using the same rules as the web forms in utils/validation.py
+
+Usage:
+    python import_leads.py leads.csv --out-dir imported/
+    python import_leads.py leads.csv --phone-column "Telefon" --name-column "Ad Soyad"
+
+Writes <out-dir>/<name>.clean.csv (name, phone as E.164, email, operator and
+the original columns) and <out-dir>/<name>.rejected.csv (original row plus
+a reason). Rows are processed in fixed-size batches and written as they go,
+so memory stays flat; only the set of seen phone numbers grows with the
+number of unique leads.
+"""
+
+import argparse
+import csv
+import os
+import resource
+import sys
+import time
+from itertools import islice
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.validation import normalize_name, normalize_phone, validate_email
+
+REJECT_REASONS = ('required_name', 'required_phone', 'invalid_phone', 'invalid_email', 'duplicate_phone')
+
+
+def check_batch(rows, name_column, phone_column, email_column, seen_phones):
+    """
+    Validate one batch column by column.
+    Returns a list of (row, name, phone, email, reason) where reason is None for clean rows.
+    """
+    names = [normalize_name(row.get(name_column)) for row in rows]
+    phones = [normalize_phone(row.get(phone_column) or '') for row in rows]
+    emails = [(row.get(email_column) or '').strip().lower() for row in rows]
+    emails_ok = [validate_email(email) for email in emails]
+
+    results = []
+    for row, name, phone, email, email_ok, raw_phone in zip(
+            rows, names, phones, emails, emails_ok, (row.get(phone_column) for row in rows)):
+        if not name:
+            reason = 'required_name'
+        elif not (raw_phone or '').strip():
+            reason = 'required_phone'
+        elif not phone.valid:
+            reason = 'invalid_phone'
+        elif not email_ok:
+            reason = 'invalid_email'
+        else:
+            if phone.e164 in seen_phones:
+                reason = 'duplicate_phone'
+            else:
+                seen_phones.add(phone.e164)
+                reason = None
+        results.append((row, name, phone, email, reason))
+    return results
+
+
+def sniff_dialect(f):
+    sample = f.read(64 * 1024)
+    f.seek(0)
+    try:
+        return csv.Sniffer().sniff(sample, delimiters=',;\t')
+    except csv.Error:
+        return csv.excel
+
+
+def import_leads(path, out_dir, name_column='name', phone_column='phone', email_column='email',
+                 batch_size=5000, encoding='utf-8-sig', progress=True):
+    """Stream path through validation and write clean/rejected CSVs, return the counters"""
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.splitext(os.path.basename(path))[0]
+    clean_path = os.path.join(out_dir, f'{base}.clean.csv')
+    rejected_path = os.path.join(out_dir, f'{base}.rejected.csv')
+
+    counts = {'rows': 0, 'clean': 0}
+    counts.update({reason: 0 for reason in REJECT_REASONS})
+    seen_phones = set()
+    started = time.perf_counter()
+
+    with open(path, newline='', encoding=encoding) as source, \
+            open(clean_path, 'w', newline='', encoding='utf-8') as clean_file, \
+            open(rejected_path, 'w', newline='', encoding='utf-8') as rejected_file:
+        reader = csv.DictReader(source, dialect=sniff_dialect(source))
+        columns = reader.fieldnames or []
+        missing = [column for column in (name_column, phone_column) if column not in columns]
+        if missing:
+            raise SystemExit(f"Missing column(s) {', '.join(missing)} in {path}; found: {', '.join(columns)}")
+
+        extra_columns = [column for column in columns if column not in (name_column, phone_column, email_column)]
+        clean = csv.writer(clean_file)
+        clean.writerow(['name', 'phone', 'email', 'operator'] + extra_columns)
+        rejected = csv.writer(rejected_file)
+        rejected.writerow(['reason'] + columns)
+
+        while True:
+            rows = list(islice(reader, batch_size))
+            if not rows:
+                break
+            clean_rows = []
+            rejected_rows = []
+            for row, name, phone, email, reason in check_batch(rows, name_column, phone_column, email_column, seen_phones):
+                if reason is None:
+                    clean_rows.append([name, phone.e164, email, phone.operator or ''] + [row.get(c, '') for c in extra_columns])
+                else:
+                    counts[reason] += 1
+                    rejected_rows.append([reason] + [row.get(c, '') for c in columns])
+            clean.writerows(clean_rows)
+            rejected.writerows(rejected_rows)
+            counts['rows'] += len(rows)
+            counts['clean'] += len(clean_rows)
+
+            if progress:
+                elapsed = time.perf_counter() - started
+                print(f"\r{counts['rows']:,} rows  {counts['rows'] / elapsed:,.0f} rows/sec", end='', file=sys.stderr)
+
+    counts['seconds'] = time.perf_counter() - started
+    counts['rows_per_sec'] = counts['rows'] / counts['seconds'] if counts['seconds'] else 0.0
+    # ru_maxrss is in kilobytes on Linux
+    counts['peak_rss_mb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    counts['clean_path'] = clean_path
+    counts['rejected_path'] = rejected_path
+    if progress:
+        print(file=sys.stderr)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Validate, normalize and dedupe a CSV of leads')
+    parser.add_argument('csv_file', help='input CSV (comma, semicolon or tab separated)')
+    parser.add_argument('--out-dir', default='imported_leads', help='output directory (default: %(default)s)')
+    parser.add_argument('--name-column', default='name')
+    parser.add_argument('--phone-column', default='phone')
+    parser.add_argument('--email-column', default='email')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--encoding', default='utf-8-sig')
+    parser.add_argument('--quiet', action='store_true', help='no progress output')
+    args = parser.parse_args(argv)
+
+    counts = import_leads(
+        args.csv_file, args.out_dir,
+        name_column=args.name_column, phone_column=args.phone_column, email_column=args.email_column,
+        batch_size=args.batch_size, encoding=args.encoding, progress=not args.quiet,
+    )
+
+    print(f"✅ {counts['clean']:,} clean leads -> {counts['clean_path']}")
+    rejected = counts['rows'] - counts['clean']
+    print(f"❌ {rejected:,} rejected -> {counts['rejected_path']}")
+    for reason in REJECT_REASONS:
+        if counts[reason]:
+            print(f"   {reason}: {counts[reason]:,}")
+    print(f"⏱️  {counts['rows']:,} rows in {counts['seconds']:.2f}s "
+          f"({counts['rows_per_sec']:,.0f} rows/sec, peak RSS {counts['peak_rss_mb']:.1f} MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,112 +1,69 @@
-from flask import render_template, request, flash, redirect, url_for, jsonify, session
+from flask import request, flash, redirect, url_for, jsonify, session, Response
 from app import app
 from utils.mail import send_whatsapp_notification_simple
-from utils.i18n import get_translations, get_supported_languages
-from utils.validation import validate_email, validate_phone, get_validation_error_message
+from utils.log import get_stats as get_logging_stats
+from utils.journal import get_stats as get_journal_stats
+from utils.dedupe import get_stats as get_dedupe_stats
+from utils.notify_digest import notify_lead, get_stats as get_digest_stats
+from utils.notify_queue import enqueue as enqueue_notification, get_stats as get_notification_stats
+from utils.i18n import get_supported_languages
+from utils.metrics import render as render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
+from utils.render_cache import render_page
+from utils.leads import LeadError, lead_from_form, callback_from_form, record_lead
+from utils.rate_limit import rate_limited, get_stats as get_rate_limit_stats
+from utils.circuit_breaker import get_stats as get_breaker_stats
+from utils.outbox import get_stats as get_outbox_stats
+from utils.mail_dispatch import get_stats as get_email_stats
 import logging
 import os
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 @app.route('/')
 @app.route('/<lang>')
 def index(lang='tr'):
     if lang not in get_supported_languages():
         lang = 'tr'
     
-    session['language'] = lang
-    translations = get_translations(lang)
+    if session.get('language') != lang:
+        session['language'] = lang
     
     # Check if we need to show success message and then clear it
     show_success = session.get('lead_submitted', False)
     if show_success:
         session.pop('lead_submitted', None)  # Clear the flag after showing once
     
-    return render_template('index.html', 
-                         translations=translations, 
-                         current_lang=lang,
-                         supported_languages=get_supported_languages(),
-                         show_success_message=show_success)
+    return render_page('index.html', lang, show_success_message=show_success)
 
 @app.route('/submit-lead', methods=['POST'])
+@rate_limited('leads')
 def submit_lead():
+    language = request.form.get('language', 'tr')
     try:
-        # Get form data
-        name = request.form.get('name', '').strip()
-        phone = request.form.get('phone', '').strip()
-        email = request.form.get('email', '').strip()
-        language = request.form.get('language', 'tr')
-        unit_interest = request.form.get('unit_interest', '')
-        budget_range = request.form.get('budget_range', '')
-        timeline = request.form.get('timeline', '')
-        best_call_time = request.form.get('best_call_time', '')
-        whatsapp_optin = request.form.get('whatsapp_optin') == 'on'
-        marketing_consent = request.form.get('marketing_consent') == 'on'
-        kvkk_consent = request.form.get('kvkk_consent') == 'on'
-        
-        # UTM parameters
-        utm_source = request.form.get('utm_source', '')
-        utm_medium = request.form.get('utm_medium', '')
-        utm_campaign = request.form.get('utm_campaign', '')
-        utm_content = request.form.get('utm_content', '')
-        utm_term = request.form.get('utm_term', '')
-        
-        # Validation
-        if not name or not phone:
-            flash(get_validation_error_message('required_name', language) if not name else get_validation_error_message('required_phone', language), 'error')
-            return redirect(url_for('index', lang=language))
-        
-        # Validate phone number format
-        if not validate_phone(phone):
-            flash(get_validation_error_message('invalid_phone', language), 'error')
-            return redirect(url_for('index', lang=language))
-        
-        # Validate email format (if provided)
-        if email and not validate_email(email):
-            flash(get_validation_error_message('invalid_email', language), 'error')
-            return redirect(url_for('index', lang=language))
-        
-        if not kvkk_consent:
-            flash('KVKK consent is required', 'error')
+        try:
+            lead_data = lead_from_form(request.form, request.remote_addr, request.user_agent.string)
+        except LeadError as e:
+            flash(str(e), 'error')
             return redirect(url_for('index', lang=language))
         
-        # Create lead data object (no database save)
-        lead_data = {
-            'name': name,
-            'phone': phone,
-            'email': email or 'Belirtilmedi',
-            'language': language,
-            'unit_interest': unit_interest or 'Belirtilmedi',
-            'budget_range': budget_range or 'Belirtilmedi',
-            'timeline': timeline or 'Belirtilmedi',
-            'best_call_time': best_call_time or 'Belirtilmedi',
-            'whatsapp_optin': 'Evet' if whatsapp_optin else 'Hayir',
-            'marketing_consent': 'Evet' if marketing_consent else 'Hayir',
-            'kvkk_consent': 'Evet' if kvkk_consent else 'Hayir',
-            'utm_source': utm_source or 'Direkt',
-            'utm_medium': utm_medium or 'Yok',
-            'utm_campaign': utm_campaign or 'Yok',
-            'utm_content': utm_content or 'Yok',
-            'utm_term': utm_term or 'Yok',
-            'ip_address': request.remote_addr,
-            'user_agent': request.user_agent.string,
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        }
-        
-        # Send WhatsApp notification
-        try:
-            send_whatsapp_notification_simple(lead_data)
-        except Exception as e:
-            logging.error(f"WhatsApp notification error: {e}")
+        # A repeat of a recent lead is merged into it without notifying sales again
+        if record_lead(lead_data):
+            # Send WhatsApp notification in the background
+            try:
+                enqueue_notification(notify_lead, lead_data)
+            except Exception as e:
+                logger.error(f"WhatsApp notification error: {e}")
         
         flash('Thank you! We will contact you soon.', 'success')
         session['lead_submitted'] = True
-        session['lead_name'] = name
-        session['lead_whatsapp'] = whatsapp_optin
+        session['lead_name'] = lead_data['name']
+        session['lead_whatsapp'] = lead_data['whatsapp_optin'] == 'Evet'
         
         return redirect(url_for('success', lang=language))
         
     except Exception as e:
-        logging.error(f"Lead submission error: {e}")
+        logger.error(f"Lead submission error: {e}")
         flash('An error occurred. Please try again.', 'error')
         return redirect(url_for('index', lang=language))
 
@@ -116,12 +73,30 @@ def success(lang='tr'):
     if lang not in get_supported_languages():
         lang = 'tr'
     
-    translations = get_translations(lang)
-    
-    return render_template('success.html', 
-                         translations=translations, 
-                         current_lang=lang,
-                         supported_languages=get_supported_languages())
+    return render_page('success.html', lang)
+
+@app.route('/callback-request', methods=['POST'])
+@rate_limited('leads', as_json=True)
+def callback_request():
+    try:
+        try:
+            lead_data = callback_from_form(request.form, request.remote_addr, request.user_agent.string)
+        except LeadError as e:
+            return jsonify({'success': False, 'message': str(e)})
+        
+        # A repeat of a recent lead is merged into it without notifying sales again
+        if record_lead(lead_data):
+            # Send WhatsApp notification in the background
+            try:
+                enqueue_notification(notify_lead, lead_data)
+            except Exception as e:
+                logger.error(f"Callback notification error: {e}")
+        
+        return jsonify({'success': True, 'message': 'Callback requested successfully'})
+        
+    except Exception as e:
+        logger.error(f"Callback request error: {e}")
+        return jsonify({'success': False, 'message': 'Error occurred'})
 
 @app.route('/kvkk')
 @app.route('/kvkk/<lang>')
@@ -129,13 +104,10 @@ def kvkk(lang='tr'):
     if lang not in get_supported_languages():
         lang = 'tr'
     
-    session['language'] = lang
-    translations = get_translations(lang)
+    if session.get('language') != lang:
+        session['language'] = lang
     
-    return render_template('kvkk.html',
-                         translations=translations,
-                         current_lang=lang,
-                         supported_languages=get_supported_languages())
+    return render_page('kvkk.html', lang)
 
 # Health check endpoint for deployment
 @app.route('/health')
@@ -143,11 +115,26 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.now().isoformat(),
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'notifications': get_notification_stats(),
+        'circuit_breakers': get_breaker_stats(),
+        'outbox': get_outbox_stats(),
+        'email': get_email_stats(),
+        'digest': get_digest_stats(),
+        'journal': get_journal_stats(),
+        'dedupe': get_dedupe_stats(),
+        'rate_limit': get_rate_limit_stats(),
+        'logging': get_logging_stats()
     })
 
+# Prometheus scrape endpoint (summed over all gunicorn workers)
+@app.route('/metrics')
+def metrics():
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
 # Admin test endpoint for WhatsApp
 @app.route('/admin/test-whatsapp')
+@rate_limited('admin', as_json=True)
 def test_whatsapp():
     try:
         test_data = {
@@ -172,7 +159,12 @@ def test_whatsapp():
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
         
-        send_whatsapp_notification_simple(test_data)
+        if not send_whatsapp_notification_simple(test_data):
+            return jsonify({
+                'status': 'error',
+                'message': 'Test WhatsApp message could not be sent',
+                'timestamp': datetime.now().isoformat()
+            }), 502
         
         return jsonify({
             'status': 'success',
@@ -181,7 +173,7 @@ def test_whatsapp():
         })
         
     except Exception as e:
-        logging.error(f"Test WhatsApp error: {e}")
+        logger.error(f"Test WhatsApp error: {e}")
         return jsonify({
             'status': 'error',
             'message': str(e),
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Circuit Breaker Test
+Walks a CircuitBreaker with a fake clock through closed -> open ->
+half open -> closed (or open again) and checks the per-channel settings
+Run directly or with pytest
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.circuit_breaker import CircuitBreaker, get_breaker, CLOSED, OPEN, HALF_OPEN
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(**kwargs):
+    clock = FakeClock()
+    kwargs.setdefault('failure_threshold', 3)
+    kwargs.setdefault('cooldown', 30)
+    kwargs.setdefault('half_open_probes', 1)
+    return CircuitBreaker('test', clock=clock, **kwargs), clock
+
+
+def fail(breaker, times):
+    for _ in range(times):
+        assert breaker.allow()
+        breaker.record(False)
+
+
+def test_opens_after_consecutive_failures():
+    breaker, clock = make_breaker()
+    fail(breaker, 2)
+    # A success resets the streak
+    assert breaker.allow()
+    breaker.record(True)
+    fail(breaker, 2)
+    assert breaker.state == CLOSED
+    fail(breaker, 1)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    stats = breaker.get_stats()
+    assert stats['opened'] == 1 and stats['skipped'] == 1 and stats['retry_in'] == 30
+
+
+def test_half_open_probe_closes_on_success():
+    breaker, clock = make_breaker(half_open_probes=2)
+    fail(breaker, 3)
+    clock.now = 30
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow() and breaker.allow()
+    # Only half_open_probes sends are let through
+    assert not breaker.allow()
+    breaker.record(True)
+    assert breaker.state == HALF_OPEN
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_half_open_probe_failure_reopens():
+    breaker, clock = make_breaker()
+    fail(breaker, 3)
+    clock.now = 30
+    fail(breaker, 1)
+    assert breaker.state == OPEN
+    # The cooldown starts over from the failed probe
+    clock.now = 59
+    assert not breaker.allow()
+    clock.now = 60
+    assert breaker.allow()
+
+
+def test_late_results_are_ignored_while_open():
+    breaker, clock = make_breaker()
+    assert breaker.allow()
+    fail(breaker, 3)
+    # The send started before the breaker opened reports in late
+    breaker.record(True)
+    assert breaker.state == OPEN
+
+
+def test_channel_settings_from_environment():
+    os.environ['CIRCUIT_TEST_CHANNEL_COOLDOWN'] = '120'
+    try:
+        breaker = get_breaker('test_channel')
+    finally:
+        del os.environ['CIRCUIT_TEST_CHANNEL_COOLDOWN']
+    assert breaker.cooldown == 120
+    assert get_breaker('test_channel') is breaker
+
+
+if __name__ == "__main__":
+    test_opens_after_consecutive_failures()
+    test_half_open_probe_closes_on_success()
+    test_half_open_probe_failure_reopens()
+    test_late_results_are_ignored_while_open()
+    test_channel_settings_from_environment()
+    print("✅ Circuit breakers open, probe and close")
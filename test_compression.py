@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Response Compression Test
+Sends requests with and without Accept-Encoding through the compression
+middleware and checks the encoding, the ETag and that every text response
+carries Vary: Accept-Encoding, and that compressed ETags revalidate to 304
+Run directly or with pytest
+"""
+
+import sys
+import os
+import gzip
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from werkzeug.test import Client
+from werkzeug.wrappers import Request, Response
+
+from utils.compression import CompressionMiddleware
+
+PAGE = ('<html>' + 'Beylerbeyi Residences ' * 200 + '</html>').encode('utf-8')
+
+
+@Request.application
+def app(request):
+    if request.path == '/small':
+        return Response('ok', mimetype='text/html')
+    if request.path == '/image':
+        return Response(b'\x89PNG' + bytes(4096), mimetype='image/png')
+    response = Response(PAGE, mimetype='text/html')
+    response.set_etag('page')
+    response.make_conditional(request)
+    return response
+
+
+client = Client(CompressionMiddleware(app, min_size=1024))
+
+
+def test_compressed_when_accepted():
+    response = client.get('/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(response.get_data()) == PAGE
+    assert response.headers['ETag'] == '"page-gzip"'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+
+
+def test_vary_without_accept_encoding():
+    response = client.get('/')
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_data() == PAGE
+    assert response.headers['Vary'] == 'Accept-Encoding'
+
+
+def test_vary_below_threshold():
+    for headers in ({}, {'Accept-Encoding': 'gzip'}):
+        response = client.get('/small', headers=headers)
+        assert 'Content-Encoding' not in response.headers
+        assert response.headers['Vary'] == 'Accept-Encoding'
+
+
+def test_revalidate_compressed_etag():
+    response = client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': '"page-gzip"'})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == '"page-gzip"'
+    assert response.headers['Vary'] == 'Accept-Encoding'
+
+
+def test_revalidate_identity_etag():
+    response = client.get('/', headers={'If-None-Match': '"page"'})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == '"page"'
+
+
+def test_stale_etag_gets_full_body():
+    response = client.get('/', headers={'Accept-Encoding': 'gzip', 'If-None-Match': '"other-gzip", "stale"'})
+    assert response.status_code == 200
+    assert response.headers['ETag'] == '"page-gzip"'
+
+
+def test_no_vary_for_binary_types():
+    response = client.get('/image', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert 'Vary' not in response.headers
+
+
+if __name__ == "__main__":
+    test_compressed_when_accepted()
+    test_vary_without_accept_encoding()
+    test_vary_below_threshold()
+    test_revalidate_compressed_etag()
+    test_revalidate_identity_etag()
+    test_stale_etag_gets_full_body()
+    test_no_vary_for_binary_types()
+    print("✅ Compression negotiates, revalidates and always varies on Accept-Encoding")
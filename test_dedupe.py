@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Lead Dedupe Test
+Claims lead keys in DedupeIndex instances sharing a throwaway local_store
+file, standing in for two workers, and checks the sliding window, the
+shared table and releasing the keys of a lead that was not persisted
+Run directly or with pytest
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.dedupe import DedupeIndex, lead_keys
+
+WINDOW = 60
+
+
+def make_workers(count=2):
+    store_path = os.path.join(tempfile.mkdtemp(), 'local_store.sqlite3')
+    return [DedupeIndex(window=WINDOW, store_path=store_path) for _ in range(count)]
+
+
+def test_window_slides_on_every_hit():
+    index = DedupeIndex(window=WINDOW, shared=False)
+    keys = lead_keys({'phone': '+905551234567'})
+    assert index.claim(keys, 'first', now=0) is None
+    assert index.claim(keys, 'second', now=50) == 'first'
+    # Still inside the window measured from the last hit
+    assert index.claim(keys, 'third', now=100) == 'first'
+    assert index.claim(keys, 'fourth', now=100 + WINDOW) is None
+
+
+def test_email_matches_only_when_enabled():
+    lead = {'phone': '+905551234567', 'email': 'Ali@Example.com '}
+    assert lead_keys(lead) == ['phone:+905551234567']
+    assert lead_keys(lead, match_email=True) == ['phone:+905551234567', 'email:ali@example.com']
+    assert lead_keys({'phone': '+905551234567', 'email': 'Belirtilmedi'}, match_email=True) == ['phone:+905551234567']
+
+
+def test_workers_share_claims():
+    first, second = make_workers()
+    keys = lead_keys({'phone': '+905551234567'})
+    assert first.claim(keys, 'first', now=0) is None
+    assert second.claim(keys, 'second', now=10) == 'first'
+    assert second.get_stats()['store_hits'] == 1
+
+
+def test_memory_hit_slides_shared_window():
+    first, second = make_workers()
+    keys = lead_keys({'phone': '+905551234567'})
+    assert first.claim(keys, 'first', now=0) is None
+    assert first.claim(keys, 'second', now=50) == 'first'
+    assert first.get_stats()['memory_hits'] == 1
+    # The other worker only knows the shared table, which must have moved too
+    assert second.claim(keys, 'third', now=100) == 'first'
+
+
+def test_release_frees_keys_everywhere():
+    first, second = make_workers()
+    keys = lead_keys({'phone': '+905551234567'})
+    assert first.claim(keys, 'lost', now=0) is None
+    first.release(keys, 'lost')
+    assert first.claim(keys, 'retry', now=10) is None
+    assert second.claim(keys, 'again', now=20) == 'retry'
+
+
+def test_release_keeps_keys_owned_by_others():
+    index = make_workers(1)[0]
+    phone_keys = lead_keys({'phone': '+905551234567'})
+    both_keys = lead_keys({'phone': '+905551234567', 'email': 'a@example.com'}, match_email=True)
+    assert index.claim(phone_keys, 'first', now=0) is None
+    assert index.claim(both_keys, 'second', now=10) == 'first'
+    index.release(both_keys, 'second')
+    assert index.claim(phone_keys, 'third', now=20) == 'first'
+
+
+if __name__ == "__main__":
+    test_window_slides_on_every_hit()
+    test_email_matches_only_when_enabled()
+    test_workers_share_claims()
+    test_memory_hit_slides_shared_window()
+    test_release_frees_keys_everywhere()
+    test_release_keeps_keys_owned_by_others()
+    print("✅ Lead dedupe windows, shares and releases keys")
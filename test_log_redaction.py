@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Log Redaction Test
+Checks that phone numbers, e-mail addresses and secrets are masked in
+free-text log messages, including URL-encoded phone numbers
+Run directly or with pytest
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.log import redact
+
+REDACTED_CASES = [
+    ('lead +905551234567 saved', 'lead +905*******67 saved'),
+    ('call +90 555 123 45 67', 'call +90 5** *** ** 67'),
+    ('0555-123-45-67', '055*-***-**-67'),
+    ('GET /lead?phone=%2B905551234567', 'GET /lead?phone=%2B905*******67'),
+    ('GET /lead?phone=%2b905551234567', 'GET /lead?phone=%2b905*******67'),
+    ('phone=%2B90%20555%20123%2045%2067', 'phone=%2B90%205**%20***%20**%2067'),
+    ('mail ali.veli@example.com', 'mail a***@example.com'),
+    ('https://api.callmebot.com/whatsapp.php?apikey=123456&text=Yeni%20lead',
+     'https://api.callmebot.com/whatsapp.php?apikey=[REDACTED]&text=[REDACTED]'),
+]
+
+UNCHANGED = [
+    'id 2025-02-16 13:19:44',
+    'order 12345678901234567890',
+    'lead 3f2a9c0e1b7d4a55 from 10.0.0.1',
+]
+
+
+def test_redacts_pii():
+    for text, expected in REDACTED_CASES:
+        assert redact(text) == expected, (text, redact(text))
+
+
+def test_leaves_other_numbers():
+    for text in UNCHANGED:
+        assert redact(text) == text, text
+
+
+if __name__ == "__main__":
+    test_redacts_pii()
+    test_leaves_other_numbers()
+    print("✅ Log messages are redacted")
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Metrics Aggregation Test
+Writes worker snapshots into a throwaway metrics directory and checks that
+/metrics keeps the counters of exited workers, folds their snapshots into
+the retired totals, and never goes backwards when a pid is reused
+Run directly or with pytest
+"""
+
+import sys
+import os
+import subprocess
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import metrics
+
+
+def use_fresh_dir():
+    metrics.METRICS_DIR = tempfile.mkdtemp()
+    metrics._values.clear()
+    metrics._process.update(pid=None, started=None, checked=False)
+
+
+def dead_pid():
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    return process.pid
+
+
+def write_worker_snapshot(pid, requests, started=1.0):
+    data = {
+        'pid': pid, 'started': started, 'time': time.time(),
+        'series': [
+            ['http_requests_total', [['endpoint', 'index'], ['method', 'GET'], ['status', '200']], requests],
+            ['http_requests_in_flight', [], 3],
+        ],
+    }
+    metrics._write(metrics._snapshot_path(pid), data)
+
+
+def total_requests():
+    for line in metrics.render().splitlines():
+        if line.startswith('http_requests_total{endpoint="index"'):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+def test_exited_workers_are_retired():
+    use_fresh_dir()
+    write_worker_snapshot(dead_pid(), 5)
+    write_worker_snapshot(dead_pid(), 7)
+    assert total_requests() == 12
+    files = sorted(os.listdir(metrics.METRICS_DIR))
+    assert files == ['.lock', metrics.RETIRED_FILE]
+    # The retired totals are counted exactly once on every later scrape
+    assert total_requests() == 12
+    assert '\nhttp_requests_in_flight ' not in metrics.render()
+
+
+def test_reused_pid_does_not_reset_counters():
+    use_fresh_dir()
+    # A previous process with this pid served 5 requests
+    write_worker_snapshot(os.getpid(), 5, started=1.0)
+    metrics.inc('http_requests_total', endpoint='index', method='GET', status='200')
+    metrics.write_snapshot()
+    assert total_requests() == 6
+    metrics.inc('http_requests_total', endpoint='index', method='GET', status='200')
+    metrics.write_snapshot()
+    assert total_requests() == 7
+
+
+def test_scrape_before_first_write_keeps_previous_process():
+    use_fresh_dir()
+    write_worker_snapshot(os.getpid(), 5, started=1.0)
+    metrics.inc('http_requests_total', endpoint='index', method='GET', status='200')
+    assert total_requests() == 6
+    metrics.write_snapshot()
+    assert total_requests() == 6
+
+
+if __name__ == "__main__":
+    test_exited_workers_are_retired()
+    test_reused_pid_does_not_reset_counters()
+    test_scrape_before_first_write_keeps_previous_process()
+    print("✅ Metrics of exited workers are kept and folded")
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Notification Digest Test
+Pushes bursts of leads through DigestAggregator with a fake sender and
+checks single sends under the rate limit, digests during a burst, the
+shared rate window between workers and outbox ids held while buffered
+Run directly or with pytest
+"""
+
+import sys
+import os
+import tempfile
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import local_store, outbox
+from utils.notify_digest import DigestAggregator
+
+
+def use_fresh_store():
+    local_store.STORE_PATH = os.path.join(tempfile.mkdtemp(), 'local_store.sqlite3')
+    # No relay thread: the test settles every row itself
+    outbox._relay_pid[0] = os.getpid()
+
+
+def make_lead(number):
+    return {'lead_id': f'lead-{number}', 'name': f'Lead {number}', 'phone': f'+90555000{number:04d}'}
+
+
+def make_aggregator(sent, ok=True, **kwargs):
+    def send(message):
+        sent.append(message)
+        return ok
+    # A long flush interval keeps the background flusher out of the way
+    kwargs.setdefault('flush_interval', 3600)
+    kwargs.setdefault('digest_size', 50)
+    return DigestAggregator(send, lambda lead: lead['lead_id'],
+                            lambda batch: [lead['lead_id'] for lead in batch], **kwargs)
+
+
+def test_burst_becomes_digest():
+    use_fresh_store()
+    sent = []
+    aggregator = make_aggregator(sent, rate_limit=2, rate_window=60)
+    for number in range(5):
+        assert aggregator.submit(make_lead(number))
+    assert sent == ['lead-0', 'lead-1']
+    assert aggregator.get_stats()['buffered'] == 3
+
+    # Out of tokens: a flush inside the window sends nothing
+    aggregator.flush()
+    assert len(sent) == 2
+    aggregator.flush(ignore_rate=True)
+    assert sent[2] == ['lead-2', 'lead-3', 'lead-4']
+    stats = aggregator.get_stats()
+    assert stats['sent_single'] == 2 and stats['sent_digests'] == 1 and stats['coalesced'] == 3
+    assert stats['buffered'] == 0
+
+
+def test_digests_are_split_by_size():
+    use_fresh_store()
+    sent = []
+    aggregator = make_aggregator(sent, rate_limit=1, rate_window=60, digest_size=2)
+    for number in range(4):
+        aggregator.submit(make_lead(number))
+    aggregator.flush(ignore_rate=True)
+    assert sent == ['lead-0', ['lead-1', 'lead-2'], 'lead-3']
+
+
+def test_shared_rate_limit_spans_workers():
+    use_fresh_store()
+    sent = []
+    workers = [make_aggregator(sent, rate_limit=3, rate_window=60, rate_key='callmebot') for _ in range(2)]
+    for number in range(6):
+        workers[number % 2].submit(make_lead(number))
+    assert sent == ['lead-0', 'lead-1', 'lead-2']
+    assert sum(worker.get_stats()['buffered'] for worker in workers) == 3
+
+
+def test_rate_window_slides():
+    use_fresh_store()
+    sent = []
+    aggregator = make_aggregator(sent, rate_limit=1, rate_window=0.05, rate_key='callmebot')
+    aggregator.submit(make_lead(0))
+    aggregator.submit(make_lead(1))
+    assert sent == ['lead-0']
+    time.sleep(0.1)
+    aggregator.flush()
+    assert sent == ['lead-0', 'lead-1']
+
+
+def test_held_outbox_ids_are_not_buffered_twice():
+    use_fresh_store()
+    sent = []
+    aggregator = make_aggregator(sent, rate_limit=0, rate_window=60)
+    lead = make_lead(1)
+    lead['outbox_id'] = outbox.add(lead)
+    assert aggregator.admit(dict(lead)) is False
+    # The outbox relay claims the same row again before the digest went out
+    assert aggregator.admit(dict(lead)) is False
+    stats = aggregator.get_stats()
+    assert stats['buffered'] == 1 and stats['already_held'] == 1
+
+    aggregator.flush(ignore_rate=True)
+    assert sent == ['lead-1']
+    assert outbox.backlog()['pending'] == 0
+    # Released once sent, so a later claim is admitted again
+    assert aggregator.admit(dict(lead)) is False
+    assert aggregator.get_stats()['buffered'] == 1
+
+
+def test_failed_send_goes_back_to_outbox():
+    use_fresh_store()
+    sent = []
+    aggregator = make_aggregator(sent, ok=False, rate_limit=5, rate_window=60)
+    lead = make_lead(1)
+    lead['outbox_id'] = outbox.add(lead)
+    assert aggregator.submit(lead) is False
+    assert aggregator.get_stats()['failed'] == 1
+    assert outbox.backlog()['pending'] == 1
+
+
+if __name__ == "__main__":
+    test_burst_becomes_digest()
+    test_digests_are_split_by_size()
+    test_shared_rate_limit_spans_workers()
+    test_rate_window_slides()
+    test_held_outbox_ids_are_not_buffered_twice()
+    test_failed_send_goes_back_to_outbox()
+    print("✅ Notification digests respect the shared rate limit")
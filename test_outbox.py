@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Notification Outbox Test
+Runs leads through add -> failed -> dead letter -> replay -> delivered
+against a throwaway local_store file and checks the counts at every step
+Run directly or with pytest
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import local_store, outbox
+
+
+def use_fresh_store():
+    local_store.STORE_PATH = os.path.join(tempfile.mkdtemp(), 'local_store.sqlite3')
+    # No relay thread: the test settles every row itself
+    outbox._relay_pid[0] = os.getpid()
+
+
+def make_lead(number):
+    return {'lead_id': f'lead-{number}', 'name': f'Lead {number}', 'phone': f'+90555000{number:04d}'}
+
+
+def test_ids_are_not_reused():
+    use_fresh_store()
+    first = outbox.add(make_lead(1))
+    outbox.delivered([first])
+    assert outbox.backlog()['pending'] == 0
+    second = outbox.add(make_lead(2))
+    assert second != first
+
+
+def test_failed_rows_are_retried_then_dead_lettered():
+    use_fresh_store()
+    outbox_id = outbox.add(make_lead(1))
+    for attempt in range(1, outbox.MAX_ATTEMPTS):
+        outbox.failed([outbox_id], 'HTTP 503')
+        state = outbox.backlog(now=0)
+        assert state['pending'] == 1 and state['dead'] == 0, f"attempt {attempt}: {state}"
+    outbox.failed([outbox_id], 'HTTP 503')
+    state = outbox.backlog()
+    assert state['pending'] == 0 and state['dead'] == 1, state
+
+
+def test_dead_letter_replay_cycle():
+    use_fresh_store()
+    original_max_attempts = outbox.MAX_ATTEMPTS
+    outbox.MAX_ATTEMPTS = 1
+    try:
+        # Each lead dies while the outbox is otherwise empty, the case that reused ids
+        for number in range(3):
+            outbox_id = outbox.add(make_lead(number))
+            outbox.record_result([{'outbox_id': outbox_id}], False, 'HTTP 503')
+            assert outbox.backlog() == {'pending': 0, 'due': 0, 'dead': number + 1, 'oldest_seconds': 0.0}
+        assert outbox.get_stats()['errors'] == 0
+
+        conn = local_store.connect()
+        dead_ids = [row[0] for row in conn.execute("SELECT id FROM outbox_dead ORDER BY id")]
+        leads = outbox.replay(dead_ids[:1])
+        assert [lead['lead_id'] for lead in leads] == ['lead-0']
+        assert outbox.backlog()['pending'] == 1 and outbox.backlog()['dead'] == 2
+
+        # Replayed rows are due right away and start over with fresh attempts
+        claimed = outbox.claim_due()
+        assert [lead['outbox_id'] for lead in claimed] == [leads[0]['outbox_id']]
+        outbox.record_result(claimed, False, 'HTTP 503')
+        assert outbox.backlog()['dead'] == 3
+
+        leads = outbox.replay(claim=True)
+        assert len(leads) == 3 and len({lead['outbox_id'] for lead in leads}) == 3
+        assert outbox.claim_due() == [], 'claimed replays must not be handed out again'
+        outbox.record_result(leads, True)
+        assert outbox.backlog() == {'pending': 0, 'due': 0, 'dead': 0, 'oldest_seconds': 0.0}
+        assert outbox.get_stats()['errors'] == 0
+    finally:
+        outbox.MAX_ATTEMPTS = original_max_attempts
+
+
+def test_renew_keeps_rows_from_being_claimed():
+    use_fresh_store()
+    outbox_id = outbox.add(make_lead(1))
+    outbox.renew([outbox_id])
+    assert outbox.claim_due(now=outbox.time.time() + outbox.LEASE / 2) == []
+    assert len(outbox.claim_due(now=outbox.time.time() + outbox.LEASE * 2)) == 1
+
+
+if __name__ == "__main__":
+    test_ids_are_not_reused()
+    test_failed_rows_are_retried_then_dead_lettered()
+    test_dead_letter_replay_cycle()
+    test_renew_keeps_rows_from_being_claimed()
+    print("✅ Outbox add/fail/dead-letter/replay cycle works")
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Phone Validation Test
+Checks normalize_phone against a table of inputs and their expected E.164
+form (None for inputs that must be rejected)
+Run directly or with pytest
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.validation import normalize_phone, validate_phone
+
+CASES = [
+    # Turkish numbers in the formats people type
+    ('0555 123 45 67', '+905551234567'),
+    ('+90 555 123 45 67', '+905551234567'),
+    ('0090 555 123 45 67', '+905551234567'),
+    ('905551234567', '+905551234567'),
+    ('5551234567', '+905551234567'),
+    ('(0216) 123-45-67', '+902161234567'),
+    ('555.123.45.67', '+905551234567'),
+    ('٠٥٥٥١٢٣٤٥٦٧', '+905551234567'),  # Arabic-Indic digits
+    ('۰۵۵۵۱۲۳۴۵۶۷', '+905551234567'),  # Persian digits
+    # International numbers
+    ('+1 555 123 4567', '+15551234567'),
+    ('+44 20 7946 0958', '+442079460958'),
+    ('00971 50 123 4567', '+971501234567'),
+    ('+966 50 123 4567', '+966501234567'),
+    # A + is an international prefix like 00: short foreign numbers stay foreign
+    ('+45 12 34 56 78', '+4512345678'),
+    ('0045 12345678', '+4512345678'),
+    ('+47 912 34 567', '+4791234567'),
+    ('+32 2 123 45 67', '+3221234567'),
+    ('+65 6123 4567', '+6561234567'),
+    # ...and +90 is still Turkish, with or without the trunk 0
+    ('+90 (0555) 123 45 67', '+905551234567'),
+    ('0090 0216 123 45 67', '+902161234567'),
+    # Country codes never start with 0
+    ('012345678901', None),
+    ('+012345678901', None),
+    ('000123456789', None),
+    # Turkish national numbers start with 2-5
+    ('0012345678', None),
+    ('1234567890', None),
+    ('0123456789', None),
+    ('01234567890', None),
+    ('6123456789', None),
+    # A + only at the start
+    ('0555 + 123 45 67', None),
+    ('++45 12345678', None),
+    # Too short, too long or not a number
+    ('+45 1234567', None),
+    ('+1 234 567 890 123 456', None),
+    ('555 123 45', None),
+    ('1234567890123456', None),
+    ('0555 123 45 67 ext 12', None),
+    ('call me maybe', None),
+    ('', None),
+    (None, None),
+]
+
+
+def test_normalize_phone():
+    failures = []
+    for phone, expected in CASES:
+        result = normalize_phone(phone)
+        if result.e164 != expected or result.valid != (expected is not None) or validate_phone(phone) != result.valid:
+            failures.append(f"{phone!r}: expected {expected}, got {result.e164} (valid={result.valid})")
+    assert not failures, '\n'.join(failures)
+
+
+def test_operator():
+    assert normalize_phone('0532 123 45 67').operator == 'Turkcell'
+    assert normalize_phone('0216 123 45 67').operator is None
+    assert normalize_phone('+1 555 123 4567').is_national is False
+
+
+if __name__ == "__main__":
+    test_normalize_phone()
+    test_operator()
+    print(f"✅ {len(CASES)} phone numbers normalized as expected")
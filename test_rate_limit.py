@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Rate Limit Test
+Drains and refills token buckets with explicit clocks, in memory and in a
+throwaway local_store file shared by two SharedBuckets (two workers)
+Run directly or with pytest
+"""
+
+import sys
+import os
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils.rate_limit import MemoryBuckets, SharedBuckets, parse_rule, too_many_requests
+
+# 3 requests, then one more every 2 seconds
+CAPACITY, RATE = 3.0, 0.5
+
+
+def drain_and_refill(acquire):
+    for _ in range(3):
+        assert acquire('leads:10.0.0.1', CAPACITY, RATE, now=100.0) == 0
+    assert acquire('leads:10.0.0.1', CAPACITY, RATE, now=100.0) == 2.0
+    # Half a token refilled: the wait shrinks accordingly
+    assert acquire('leads:10.0.0.1', CAPACITY, RATE, now=101.0) == 1.0
+    assert acquire('leads:10.0.0.1', CAPACITY, RATE, now=102.0) == 0
+    # Other clients have their own buckets
+    assert acquire('leads:10.0.0.2', CAPACITY, RATE, now=102.0) == 0
+
+
+def test_parse_rule():
+    assert parse_rule('10/60') == (10.0, 60.0)
+
+
+def test_memory_buckets():
+    drain_and_refill(MemoryBuckets(shards=4).acquire)
+
+
+def test_shared_buckets():
+    drain_and_refill(SharedBuckets(store_path=os.path.join(tempfile.mkdtemp(), 'local_store.sqlite3')).acquire)
+
+
+def test_shared_buckets_span_workers():
+    store_path = os.path.join(tempfile.mkdtemp(), 'local_store.sqlite3')
+    workers = [SharedBuckets(store_path=store_path) for _ in range(2)]
+    waits = [workers[i % 2].acquire('leads:10.0.0.1', CAPACITY, RATE, now=100.0) for i in range(4)]
+    assert waits == [0, 0, 0, 2.0]
+
+
+def test_full_buckets_are_evicted():
+    buckets = MemoryBuckets(shards=1, max_keys_per_shard=100)
+    buckets.acquire('leads:10.0.0.1', CAPACITY, RATE, now=0.0)
+    buckets.acquire('leads:10.0.0.2', CAPACITY, RATE, now=1.0)
+    assert len(buckets) == 2
+    # The first bucket has been full again since t=2
+    buckets.acquire('leads:10.0.0.3', CAPACITY, RATE, now=2.5)
+    assert len(buckets) == 2
+
+
+def test_key_limit_evicts_least_recently_used():
+    buckets = MemoryBuckets(shards=1, max_keys_per_shard=2)
+    for number in range(3):
+        buckets.acquire(f'leads:10.0.0.{number}', CAPACITY, RATE, now=0.0)
+    assert len(buckets) == 2
+    # The evicted client starts over with a full bucket
+    assert buckets.acquire('leads:10.0.0.0', CAPACITY, RATE, now=0.0) == 0
+
+
+def test_too_many_requests_rounds_retry_after_up():
+    response = too_many_requests(0.2, as_json=True)
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '1'
+    assert too_many_requests(2.5).headers['Retry-After'] == '3'
+
+
+if __name__ == "__main__":
+    test_parse_rule()
+    test_memory_buckets()
+    test_shared_buckets()
+    test_shared_buckets_span_workers()
+    test_full_buckets_are_evicted()
+    test_key_limit_evicts_least_recently_used()
+    test_too_many_requests_rounds_retry_after_up()
+    print("✅ Token buckets drain, refill and are shared between workers")
@@ -0,0 +1,87 @@
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+
+from flask import current_app, request, send_from_directory
+
+logger = logging.getLogger(__name__)
+
+# Written by build_assets.py; without it static files are served as before
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'static', 'dist', 'manifest.json')
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+
+_manifest = {}
+_encodings = {}
+# Content hash of the loaded manifest, part of page ETags
+manifest_digest = None
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """Load the fingerprinted asset manifest (call again after rebuilding assets)"""
+    global _manifest, _encodings, manifest_digest
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        entries = json.loads(raw.decode('utf-8'))
+        manifest_digest = hashlib.blake2b(raw, digest_size=12).hexdigest()
+    except FileNotFoundError:
+        entries = {}
+        manifest_digest = None
+    except Exception as e:
+        logger.error(f"Could not read asset manifest {path}: {e}")
+        entries = {}
+        manifest_digest = None
+    _manifest = {logical: entry['path'] for logical, entry in entries.items()}
+    _encodings = {entry['path']: tuple(entry.get('encodings', ())) for entry in entries.values()}
+    return _manifest
+
+
+def _rewrite_static_url(endpoint, values):
+    if endpoint == 'static':
+        hashed = _manifest.get(values.get('filename'))
+        if hashed:
+            values['filename'] = hashed
+
+
+def _pick_encoding(available):
+    accepted = request.accept_encodings
+    best = None
+    for encoding in available:
+        quality = accepted[encoding]
+        if quality and (best is None or quality > best[1]):
+            best = (encoding, quality)
+    return best[0] if best else None
+
+
+def send_static_asset(filename):
+    """Static view: fingerprinted files get immutable caching and precompressed bodies"""
+    available = _encodings.get(filename)
+    if available is None:
+        return current_app.send_static_file(filename)
+
+    encoding = _pick_encoding(available)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    if encoding:
+        response = send_from_directory(current_app.static_folder, filename + _SUFFIXES[encoding],
+                                       mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_from_directory(current_app.static_folder, filename,
+                                       mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    if available:
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+def init_app(app):
+    """Rewrite url_for('static') to fingerprinted files and serve them"""
+    load_manifest()
+    app.url_defaults(_rewrite_static_url)
+    app.view_functions['static'] = send_static_asset
@@ -0,0 +1,61 @@
+import asyncio
+import functools
+
+from utils import http_client
+
+# Async counterpart of utils.http_client for the ASGI entry point (asgi.py),
+# with the same pool size, timeouts and connect retries. Uses httpx when it is
+# installed; otherwise requests run on the default executor.
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+_clients = {}
+
+
+def _build_client():
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(http_client.READ_TIMEOUT, connect=http_client.CONNECT_TIMEOUT),
+        limits=httpx.Limits(max_connections=http_client.POOL_MAXSIZE,
+                            max_keepalive_connections=http_client.POOL_MAXSIZE),
+        # httpx retries connection failures only, like the sync transport
+        transport=httpx.AsyncHTTPTransport(retries=http_client.RETRIES),
+    )
+
+
+def get_client():
+    """Get the pooled httpx client of the running event loop (None without httpx)"""
+    if httpx is None:
+        return None
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = _build_client()
+    return client
+
+
+async def request(method, url, read_timeout=None, **kwargs):
+    """Send a request without blocking the event loop"""
+    client = get_client()
+    if client is None:
+        call = functools.partial(http_client.request, method, url, read_timeout=read_timeout, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(None, call)
+    if read_timeout:
+        kwargs.setdefault('timeout', httpx.Timeout(read_timeout, connect=http_client.CONNECT_TIMEOUT))
+    return await client.request(method, url, **kwargs)
+
+
+async def get(url, **kwargs):
+    return await request('GET', url, **kwargs)
+
+
+async def post(url, **kwargs):
+    return await request('POST', url, **kwargs)
+
+
+async def close():
+    """Close the client of the running event loop"""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
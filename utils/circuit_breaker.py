@@ -0,0 +1,149 @@
+import logging
+import os
+import threading
+import time
+
+from utils.metrics import define, inc, set_gauge, register_collector
+
+logger = logging.getLogger(__name__)
+
+# A channel whose last FAILURE_THRESHOLD sends failed is skipped for COOLDOWN
+# seconds; then HALF_OPEN_PROBES sends are let through and the channel closes
+# again once they all succeed (any failure reopens it). Each setting can be
+# overridden per channel, e.g. CIRCUIT_CALLMEBOT_COOLDOWN=120.
+FAILURE_THRESHOLD = int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', '5'))
+COOLDOWN = float(os.environ.get('CIRCUIT_COOLDOWN', '30'))
+HALF_OPEN_PROBES = int(os.environ.get('CIRCUIT_HALF_OPEN_PROBES', '1'))
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+STATES = (CLOSED, HALF_OPEN, OPEN)
+
+define('circuit_breaker_state', 'gauge', 'Workers whose breaker for the channel is in the given state')
+define('circuit_breaker_transitions_total', 'counter', 'Circuit breaker state changes by channel and new state')
+
+
+class CircuitBreaker:
+    """
+    Per-process breaker for one notification channel. Callers ask allow()
+    before a send and report the outcome with record(); while the breaker
+    is open, allow() returns False without waiting on the upstream.
+    """
+
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN,
+                 half_open_probes=HALF_OPEN_PROBES, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.half_open_probes = half_open_probes
+        self.clock = clock
+
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probes_started = 0
+        self._probes_succeeded = 0
+        self._lock = threading.Lock()
+        self.stats = {'opened': 0, 'skipped': 0}
+
+    def _transition(self, state):
+        # Called with the lock held
+        self._state = state
+        if state == OPEN:
+            self._opened_at = self.clock()
+            self.stats['opened'] += 1
+        if state != CLOSED:
+            self._probes_started = self._probes_succeeded = 0
+        self._failures = 0
+        inc('circuit_breaker_transitions_total', channel=self.name, state=state)
+        log = logger.warning if state == OPEN else logger.info
+        log(f"Circuit breaker for {self.name} is now {state}")
+
+    def _current_state(self):
+        if self._state == OPEN and self.clock() - self._opened_at >= self.cooldown:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def allow(self):
+        """True if a send may be attempted now; every True must be followed by record()"""
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes_started < self.half_open_probes:
+                self._probes_started += 1
+                return True
+            self.stats['skipped'] += 1
+            return False
+
+    def record(self, ok):
+        """Report the outcome of a send that allow() let through"""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if not ok:
+                    self._transition(OPEN)
+                else:
+                    self._probes_succeeded += 1
+                    if self._probes_succeeded >= self.half_open_probes:
+                        self._transition(CLOSED)
+            elif self._state == CLOSED:
+                if ok:
+                    self._failures = 0
+                else:
+                    self._failures += 1
+                    if self._failures >= self.failure_threshold:
+                        self._transition(OPEN)
+            # Late results of sends started before the breaker opened are ignored
+
+    def get_stats(self):
+        with self._lock:
+            state = self._current_state()
+            stats = dict(self.stats)
+            stats['state'] = state
+            stats['consecutive_failures'] = self._failures
+            if state == OPEN:
+                stats['retry_in'] = round(max(0.0, self.cooldown - (self.clock() - self._opened_at)), 1)
+        return stats
+
+
+def _setting(channel, name, default, cast):
+    return cast(os.environ.get(f'CIRCUIT_{channel.upper()}_{name}', default))
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(channel):
+    """The breaker of a channel ('callmebot', 'whatsapp_api', ...), created on first use"""
+    breaker = _breakers.get(channel)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(channel)
+            if breaker is None:
+                breaker = _breakers[channel] = CircuitBreaker(
+                    channel,
+                    failure_threshold=_setting(channel, 'FAILURE_THRESHOLD', FAILURE_THRESHOLD, int),
+                    cooldown=_setting(channel, 'COOLDOWN', COOLDOWN, float),
+                    half_open_probes=_setting(channel, 'HALF_OPEN_PROBES', HALF_OPEN_PROBES, int),
+                )
+    return breaker
+
+
+def get_stats():
+    """Get the state of every breaker of this process"""
+    return {channel: breaker.get_stats() for channel, breaker in list(_breakers.items())}
+
+
+@register_collector
+def _collect():
+    for channel, breaker in list(_breakers.items()):
+        state = breaker.state
+        for candidate in STATES:
+            set_gauge('circuit_breaker_state', 1 if candidate == state else 0, channel=channel, state=candidate)
@@ -0,0 +1,225 @@
+import gzip
+import os
+
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ENABLED = os.environ.get('COMPRESSION', 'true').lower() in ['true', 'on', '1']
+MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '5'))
+
+COMPRESSIBLE_TYPES = (
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'text/javascript',
+    'application/javascript', 'application/json', 'application/xml', 'image/svg+xml',
+)
+
+# Views may put a stable cache key for their body here (see utils.render_cache)
+# so the compressed bytes are computed once and reused.
+BODY_KEY_ENVIRON = 'beylerbeyi.body_key'
+
+
+def compress(data, encoding, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY):
+    if encoding == 'br':
+        return brotli.compress(data, quality=brotli_quality)
+    return gzip.compress(data, compresslevel=gzip_level, mtime=0)
+
+
+def negotiate(accept_encoding):
+    """Pick br or gzip from an Accept-Encoding header, None if neither is acceptable"""
+    if not accept_encoding:
+        return None
+    accepted = parse_accept_header(accept_encoding)
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+class _prefetch:
+    """Iterable that has already produced its first chunk but still closes the original"""
+
+    def __init__(self, app_iter):
+        self._app_iter = app_iter
+        self._iterator = iter(app_iter)
+        self._first = []
+        for chunk in self._iterator:
+            self._first.append(chunk)
+            break
+
+    def __iter__(self):
+        yield from self._first
+        yield from self._iterator
+
+    def close(self):
+        if hasattr(self._app_iter, 'close'):
+            self._app_iter.close()
+
+
+def _strip_etag_encodings(if_none_match):
+    """
+    Remove the encoding suffix _etag added from every tag in an If-None-Match
+    header so the app compares against the tags it issued. Returns the
+    stripped header and a map from bare tag to the suffixed tag the client sent.
+    """
+    sent = {}
+    tags = []
+    for tag in if_none_match.split(','):
+        tag = tag.strip()
+        for encoding in ('br', 'gzip'):
+            suffix = f'-{encoding}"'
+            if tag.endswith(suffix):
+                bare = tag[:-len(suffix)] + '"'
+                sent.setdefault(bare, tag)
+                tag = bare
+                break
+        tags.append(tag)
+    return ', '.join(tags), sent
+
+
+def _content_type(headers):
+    for name, value in headers:
+        if name.lower() == 'content-type':
+            return value.split(';', 1)[0].strip().lower()
+    return ''
+
+
+class CompressionMiddleware:
+    """
+    WSGI middleware compressing text responses with brotli or gzip.
+    Small bodies, non-200 responses, non-text types and responses that
+    already carry a Content-Encoding are passed through uncompressed.
+    Every text response gets Vary: Accept-Encoding, compressed or not, so
+    a shared cache never serves one client's variant to another.
+
+    Compressed responses carry their ETag with an encoding suffix. The suffix
+    is stripped from If-None-Match before the app sees it, and put back on
+    the ETag of the 304 the app answers with.
+    """
+
+    def __init__(self, app, min_size=MIN_SIZE, gzip_level=GZIP_LEVEL, brotli_quality=BROTLI_QUALITY, cache=None):
+        self.app = app
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        # cache(key, encoding, make) returns memoized compressed bytes
+        self.cache = cache
+
+    def _should_compress(self, status, headers, environ):
+        if not status.startswith('200') or environ.get('REQUEST_METHOD') == 'HEAD':
+            return False
+        for name, value in headers:
+            lower = name.lower()
+            if lower == 'content-encoding':
+                return False
+            if lower == 'cache-control' and 'no-transform' in value.lower():
+                return False
+            if lower == 'content-length' and value.isdigit() and int(value) < self.min_size:
+                return False
+        return _content_type(headers) in COMPRESSIBLE_TYPES
+
+    def _with_vary(self, headers):
+        if _content_type(headers) in COMPRESSIBLE_TYPES:
+            return self._vary(list(headers))
+        return headers
+
+    def _not_modified(self, headers, sent):
+        # A 304 for a compressed variant repeats the tag and Vary that variant had
+        headers = [(name, sent.get(value, value) if name.lower() == 'etag' else value)
+                   for name, value in headers]
+        return self._vary(headers)
+
+    def _conditional(self, start_response, sent):
+        def conditional_start_response(status, headers, exc_info=None):
+            if status.startswith('304'):
+                headers = self._not_modified(headers, sent)
+            return start_response(status, headers, exc_info)
+        return conditional_start_response
+
+    def __call__(self, environ, start_response):
+        if_none_match = environ.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            environ['HTTP_IF_NONE_MATCH'], sent = _strip_etag_encodings(if_none_match)
+            if sent:
+                start_response = self._conditional(start_response, sent)
+
+        encoding = negotiate(environ.get('HTTP_ACCEPT_ENCODING'))
+        if encoding is None:
+            def identity_start_response(status, headers, exc_info=None):
+                return start_response(status, self._with_vary(headers), exc_info)
+            return self.app(environ, identity_start_response)
+
+        captured = []
+        chunks = []
+
+        def capture(status, headers, exc_info=None):
+            captured[:] = [status, headers, exc_info]
+            return chunks.append
+
+        app_iter = self.app(environ, capture)
+        if not captured:
+            # start_response was deferred to the first iteration
+            app_iter = _prefetch(app_iter)
+        status, headers, exc_info = captured
+        if not self._should_compress(status, headers, environ):
+            # Stream uncompressed, replaying anything written through write()
+            write = start_response(status, self._with_vary(headers), exc_info)
+            for chunk in chunks:
+                write(chunk)
+            return app_iter
+
+        try:
+            chunks.extend(app_iter)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+        body = b''.join(chunks)
+
+        if len(body) < self.min_size:
+            start_response(status, self._with_vary(headers), exc_info)
+            return [body]
+
+        key = environ.get(BODY_KEY_ENVIRON)
+        make = lambda: compress(body, encoding, self.gzip_level, self.brotli_quality)
+        if key is not None and self.cache is not None:
+            data = self.cache(key, encoding, make)
+        else:
+            data = make()
+
+        headers = [(name, self._etag(value, encoding) if name.lower() == 'etag' else value)
+                   for name, value in headers if name.lower() != 'content-length']
+        headers = self._vary(headers) + [
+            ('Content-Encoding', encoding),
+            ('Content-Length', str(len(data))),
+        ]
+        start_response(status, headers, exc_info)
+        return [data]
+
+    @staticmethod
+    def _etag(value, encoding):
+        # A compressed body is a different representation, so it needs its own tag
+        if value.endswith('"'):
+            return f'{value[:-1]}-{encoding}"'
+        return value
+
+    @staticmethod
+    def _vary(headers):
+        for i, (name, value) in enumerate(headers):
+            if name.lower() == 'vary':
+                if 'accept-encoding' not in value.lower():
+                    headers[i] = (name, f'{value}, Accept-Encoding')
+                return headers
+        return headers + [('Vary', 'Accept-Encoding')]
+
+
+def init_app(app):
+    """Wrap app.wsgi_app with compression, reusing render cache bytes"""
+    if not ENABLED:
+        return
+    from utils.render_cache import compressed_body
+    app.wsgi_app = CompressionMiddleware(app.wsgi_app, cache=compressed_body)
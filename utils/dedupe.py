@@ -0,0 +1,197 @@
+import collections
+import logging
+import os
+import threading
+import time
+
+from utils import local_store
+
+logger = logging.getLogger(__name__)
+
+# A lead whose phone (or e-mail) was seen less than WINDOW seconds ago is a
+# duplicate of that earlier lead. Every hit slides the window forward.
+ENABLED = os.environ.get('LEAD_DEDUPE', 'true').lower() in ['true', 'on', '1']
+WINDOW = float(os.environ.get('LEAD_DEDUPE_WINDOW', '3600'))
+# Off by default: an agency or family address is shared by different people
+MATCH_EMAIL = os.environ.get('LEAD_DEDUPE_EMAIL', 'false').lower() in ['true', 'on', '1']
+# Keys held in each process's memory index (least recently seen evicted first)
+MAX_ENTRIES = int(os.environ.get('LEAD_DEDUPE_MAX_ENTRIES', '10000'))
+# memory: this process only; sqlite: shared with the other workers through utils.local_store
+BACKEND = os.environ.get('LEAD_DEDUPE_BACKEND', 'sqlite').lower()
+
+local_store.register_schema("""
+CREATE TABLE IF NOT EXISTS lead_dedupe (
+    key TEXT PRIMARY KEY,
+    lead_id TEXT NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS lead_dedupe_last_seen ON lead_dedupe (last_seen);
+""")
+
+
+def lead_keys(lead_data, match_email=MATCH_EMAIL):
+    """Dedupe keys of a lead: its E.164 phone and, optionally, its lower-cased e-mail"""
+    keys = [f"phone:{lead_data['phone']}"]
+    email = lead_data.get('email', '')
+    if match_email and email and email != 'Belirtilmedi':
+        keys.append(f"email:{email.strip().lower()}")
+    return keys
+
+
+class DedupeIndex:
+    """
+    Sliding-window index from dedupe keys to the lead that first used them.
+    The in-memory part is bounded and answers repeats seen by this process;
+    misses go to the shared SQLite table when one is configured.
+    """
+
+    def __init__(self, window=WINDOW, max_entries=MAX_ENTRIES, shared=True, store_path=None):
+        self.window = window
+        self.max_entries = max_entries
+        self.shared = shared
+        self.store_path = store_path
+        # key -> (lead_id, last_seen), least recently seen first
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._claims_since_prune = 0
+        self.stats = {'checked': 0, 'duplicates': 0, 'memory_hits': 0, 'store_hits': 0, 'errors': 0}
+
+    def _expire(self, now):
+        while self._entries:
+            key, (_, last_seen) = next(iter(self._entries.items()))
+            if now - last_seen < self.window and len(self._entries) <= self.max_entries:
+                return
+            self._entries.popitem(last=False)
+
+    def _remember(self, keys, lead_id, now):
+        for key in keys:
+            self._entries[key] = (lead_id, now)
+            self._entries.move_to_end(key)
+        self._expire(now)
+
+    def _claim_local(self, keys, now):
+        for key in keys:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.window:
+                return entry[0]
+        return None
+
+    def _claim_shared(self, keys, lead_id, now):
+        placeholders = ','.join('?' * len(keys))
+        with local_store.transaction(self.store_path) as conn:
+            row = conn.execute(
+                f"SELECT lead_id FROM lead_dedupe WHERE key IN ({placeholders}) AND last_seen > ? "
+                "ORDER BY last_seen LIMIT 1",
+                (*keys, now - self.window),
+            ).fetchone()
+            self._upsert(conn, keys, row[0] if row else lead_id, now)
+            self._claims_since_prune += 1
+            if self._claims_since_prune >= 100:
+                self._claims_since_prune = 0
+                self._prune(conn, now)
+        return row[0] if row else None
+
+    @staticmethod
+    def _upsert(conn, keys, owner, now):
+        conn.executemany(
+            "INSERT INTO lead_dedupe (key, lead_id, last_seen) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET lead_id = excluded.lead_id, last_seen = excluded.last_seen",
+            [(key, owner, now) for key in keys],
+        )
+
+    def _touch_shared(self, keys, owner, now):
+        # A repeat answered from memory still slides the window the other workers see
+        with local_store.transaction(self.store_path) as conn:
+            self._upsert(conn, keys, owner, now)
+
+    def _prune(self, conn, now):
+        conn.execute("DELETE FROM lead_dedupe WHERE last_seen <= ?", (now - self.window,))
+        conn.execute(
+            "DELETE FROM lead_dedupe WHERE key IN ("
+            "SELECT key FROM lead_dedupe ORDER BY last_seen DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+    def claim(self, keys, lead_id, now=None):
+        """
+        Register keys for lead_id and return None, or return the id of the
+        earlier lead that used one of the keys within the window.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            self.stats['checked'] += 1
+            owner = self._claim_local(keys, now)
+            if owner is not None:
+                self.stats['memory_hits'] += 1
+
+        if self.shared:
+            try:
+                if owner is None:
+                    owner = self._claim_shared(keys, lead_id, now)
+                    if owner is not None:
+                        with self._lock:
+                            self.stats['store_hits'] += 1
+                else:
+                    self._touch_shared(keys, owner, now)
+            except Exception as e:
+                # Better a second notification than a lost one
+                logger.error(f"Lead dedupe store error: {e}")
+                with self._lock:
+                    self.stats['errors'] += 1
+
+        with self._lock:
+            if owner is not None:
+                self.stats['duplicates'] += 1
+            self._remember(keys, owner or lead_id, now)
+        return owner
+
+    def release(self, keys, lead_id):
+        """
+        Drop the keys lead_id claimed, for a lead that could not be persisted,
+        so a resubmission is treated as new instead of merged into nothing
+        """
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == lead_id:
+                    del self._entries[key]
+        if self.shared:
+            placeholders = ','.join('?' * len(keys))
+            try:
+                with local_store.transaction(self.store_path) as conn:
+                    conn.execute(f"DELETE FROM lead_dedupe WHERE key IN ({placeholders}) AND lead_id = ?",
+                                 (*keys, lead_id))
+            except Exception as e:
+                logger.error(f"Lead dedupe store error: {e}")
+                with self._lock:
+                    self.stats['errors'] += 1
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._entries)
+        return stats
+
+
+_index = DedupeIndex(shared=BACKEND == 'sqlite')
+
+
+def find_duplicate(lead_data, lead_id):
+    """Return the id of an earlier lead this one duplicates, registering it otherwise"""
+    if not ENABLED:
+        return None
+    return _index.claim(lead_keys(lead_data), lead_id)
+
+
+def release(lead_data, lead_id):
+    """Forget the keys find_duplicate registered for lead_id"""
+    if ENABLED:
+        _index.release(lead_keys(lead_data), lead_id)
+
+
+def get_stats():
+    """Get dedupe counters of this process"""
+    stats = _index.get_stats()
+    stats['enabled'] = ENABLED
+    stats['window_seconds'] = WINDOW
+    return stats
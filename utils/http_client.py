@@ -0,0 +1,77 @@
+import os
+import threading
+
+# Shared outbound HTTP transport for notification channels (CallMeBot,
+# WhatsApp Business API, ...). One pooled keep-alive session per process.
+# requests is imported with the first session, not when the app boots.
+POOL_CONNECTIONS = int(os.environ.get('NOTIFY_HTTP_POOL_CONNECTIONS', '4'))
+POOL_MAXSIZE = int(os.environ.get('NOTIFY_HTTP_POOL_MAXSIZE', '10'))
+CONNECT_TIMEOUT = float(os.environ.get('NOTIFY_HTTP_CONNECT_TIMEOUT', '3.05'))
+READ_TIMEOUT = float(os.environ.get('NOTIFY_HTTP_READ_TIMEOUT', '15'))
+RETRIES = int(os.environ.get('NOTIFY_HTTP_RETRIES', '2'))
+RETRY_BACKOFF = float(os.environ.get('NOTIFY_HTTP_RETRY_BACKOFF', '0.5'))
+
+_lock = threading.Lock()
+_session = None
+_session_pid = None
+
+
+def _build_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+
+    # Only failed connections are retried here: the request never reached the
+    # upstream, so nothing can be delivered twice. Every call on this transport
+    # sends a message (CallMeBot's GET included) and a 5xx from a gateway may
+    # come after the message went out, so errors after connecting are left to
+    # the notification outbox (utils.outbox), which retries with backoff.
+    retry = Retry(
+        total=RETRIES,
+        connect=RETRIES,
+        read=0,
+        status=0,
+        other=0,
+        backoff_factor=RETRY_BACKOFF,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    """Get the pooled session for this process (rebuilt after fork)"""
+    global _session, _session_pid
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _lock:
+            if _session is None or _session_pid != pid:
+                _session = _build_session()
+                _session_pid = pid
+    return _session
+
+
+def request(method, url, read_timeout=None, **kwargs):
+    """Send a request over the shared transport with separate connect/read timeouts"""
+    kwargs.setdefault('timeout', (CONNECT_TIMEOUT, read_timeout or READ_TIMEOUT))
+    return get_session().request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return request('GET', url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request('POST', url, **kwargs)
+
+
+def close():
+    """Close pooled connections held by this process"""
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+            _session = None
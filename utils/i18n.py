@@ -1,20 +1,134 @@
+import hashlib
 import json
 import os
+import signal
+import threading
+import time
+from types import MappingProxyType
+
+LANG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lang')
+SUPPORTED_LANGUAGES = ('tr', 'en', 'ar')
+DEFAULT_LANGUAGE = 'tr'
+
+# How often (seconds) request threads may stat the language files for changes.
+# Set to 0 to disable mtime polling and rely on reload_translations()/signals.
+RELOAD_INTERVAL = float(os.environ.get('I18N_RELOAD_INTERVAL', '2'))
+
+_EMPTY = MappingProxyType({})
+
+
+class _Catalog:
+    """Immutable snapshot of all translation files"""
+
+    __slots__ = ('languages', 'mtimes', 'version', 'digest')
+
+    def __init__(self, languages, mtimes, version, digest):
+        self.languages = languages
+        self.mtimes = mtimes
+        self.version = version
+        self.digest = digest
+
+
+_catalog = None
+_reload_lock = threading.Lock()
+_next_check = 0.0
+# Set by the reload signal handler; the next lookup does the actual reload
+_reload_requested = False
+
+
+def _freeze(value):
+    """Recursively turn loaded JSON into read-only mappings and tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _file_mtimes():
+    mtimes = {}
+    for language in SUPPORTED_LANGUAGES:
+        try:
+            mtimes[language] = os.stat(os.path.join(LANG_DIR, f'{language}.json')).st_mtime_ns
+        except OSError:
+            mtimes[language] = None
+    return mtimes
+
+
+def _load_catalog(mtimes):
+    languages = {}
+    digest = hashlib.blake2b(digest_size=12)
+    for language in SUPPORTED_LANGUAGES:
+        try:
+            with open(os.path.join(LANG_DIR, f'{language}.json'), 'rb') as f:
+                raw = f.read()
+            languages[language] = _freeze(json.loads(raw.decode('utf-8')))
+            digest.update(language.encode() + b'\0' + raw)
+        except Exception:
+            # Missing or broken file: keep the previous snapshot for this language if any
+            previous = _catalog.languages.get(language) if _catalog else None
+            if previous is not None:
+                languages[language] = previous
+    version = _catalog.version + 1 if _catalog else 1
+    return _Catalog(MappingProxyType(languages), mtimes, version, digest.hexdigest())
+
+
+def reload_translations(force=True):
+    """Reload the catalog from disk and swap it in atomically.
+
+    With force=False the files are only re-read when their mtimes changed.
+    Returns the catalog version that is active afterwards.
+    """
+    global _catalog
+    with _reload_lock:
+        mtimes = _file_mtimes()
+        if force or _catalog is None or mtimes != _catalog.mtimes:
+            _catalog = _load_catalog(mtimes)
+        return _catalog.version
+
+
+def _current_catalog():
+    global _next_check, _reload_requested
+    if _reload_requested:
+        _reload_requested = False
+        reload_translations()
+    elif RELOAD_INTERVAL > 0:
+        now = time.monotonic()
+        if now >= _next_check:
+            _next_check = now + RELOAD_INTERVAL
+            reload_translations(force=False)
+    return _catalog
+
+
+def _request_reload(*_):
+    # Runs between bytecodes of the main thread, possibly while it holds
+    # _reload_lock, so it must not take the lock itself
+    global _reload_requested
+    _reload_requested = True
+
+
+def install_reload_signal(signum=signal.SIGUSR2):
+    """Reload translations on the next lookup after the process receives signum (main thread only)"""
+    signal.signal(signum, _request_reload)
+
+
+def get_catalog_digest():
+    """Get a content hash of the loaded translation files (identical across workers)"""
+    return _current_catalog().digest
+
 
 def get_translations(language='tr'):
     """Get translations for specified language"""
-    try:
-        file_path = os.path.join('lang', f'{language}.json')
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except:
+    languages = _current_catalog().languages
+    translations = languages.get(language)
+    if translations is None:
         # Fallback to Turkish if language file not found
-        try:
-            with open('lang/tr.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return {}
+        translations = languages.get(DEFAULT_LANGUAGE, _EMPTY)
+    return translations
 
 def get_supported_languages():
     """Get list of supported languages"""
     return ['tr', 'en', 'ar']
+
+
+reload_translations()
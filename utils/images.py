@@ -0,0 +1,125 @@
+import hashlib
+import json
+import logging
+import os
+
+from flask import url_for
+from markupsafe import Markup, escape
+
+logger = logging.getLogger(__name__)
+
+# Written by build_images.py; without it the helpers fall back to the originals
+MANIFEST_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'static', 'images', 'gallery', 'responsive', 'manifest.json')
+
+_manifest = {}
+# Content hash of the loaded manifest, part of page ETags
+manifest_digest = None
+
+
+def load_manifest(path=MANIFEST_PATH):
+    """Load the responsive image manifest (call again after rebuilding images)"""
+    global _manifest, manifest_digest
+    try:
+        with open(path, 'rb') as f:
+            raw = f.read()
+        _manifest = json.loads(raw.decode('utf-8'))
+        manifest_digest = hashlib.blake2b(raw, digest_size=12).hexdigest()
+    except FileNotFoundError:
+        _manifest = {}
+        manifest_digest = None
+    except Exception as e:
+        logger.error(f"Could not read image manifest {path}: {e}")
+        _manifest = {}
+        manifest_digest = None
+    return _manifest
+
+
+def _srcset(variants):
+    return ', '.join(f"{url_for('static', filename=v['file'])} {v['width']}w" for v in variants)
+
+
+def _closest(variants, width):
+    # Smallest variant at least as wide as requested, else the largest one
+    for variant in variants:
+        if variant['width'] >= width:
+            return variant
+    return variants[-1]
+
+
+def responsive_url(filename, width=1200, fmt='jpeg'):
+    """URL of the variant of filename closest to width (the original if not built)"""
+    entry = _manifest.get(filename)
+    if not entry:
+        return url_for('static', filename=filename)
+    return url_for('static', filename=_closest(entry[fmt], width)['file'])
+
+
+def responsive_image(filename, alt='', sizes='100vw', class_=None, loading='lazy'):
+    """Emit a <picture> with WebP and JPEG srcsets for a gallery image"""
+    attrs = f'alt="{escape(alt)}"'
+    if class_:
+        attrs += f' class="{escape(class_)}"'
+    if loading:
+        attrs += f' loading="{escape(loading)}" decoding="async"'
+
+    entry = _manifest.get(filename)
+    if not entry:
+        return Markup(f'<img src="{url_for("static", filename=filename)}" {attrs}>')
+
+    fallback = _closest(entry['jpeg'], 800)
+    height = round(entry['height'] * fallback['width'] / entry['width'])
+    return Markup(
+        '<picture>'
+        f'<source type="image/webp" srcset="{_srcset(entry["webp"])}" sizes="{escape(sizes)}">'
+        f'<img src="{url_for("static", filename=fallback["file"])}" srcset="{_srcset(entry["jpeg"])}" '
+        f'sizes="{escape(sizes)}" width="{fallback["width"]}" height="{height}" {attrs}>'
+        '</picture>'
+    )
+
+
+def _image_set(webp, jpeg):
+    webp = url_for('static', filename=webp['file'])
+    jpeg = url_for('static', filename=jpeg['file'])
+    return (f"background-image: url('{jpeg}'); "
+            f"background-image: image-set(url('{webp}') type('image/webp'), url('{jpeg}') type('image/jpeg'));")
+
+
+def background_image(filename, width=1200):
+    """CSS background-image declarations preferring WebP, for elements that cannot use srcset"""
+    entry = _manifest.get(filename)
+    if not entry:
+        return Markup(f"background-image: url('{url_for('static', filename=filename)}');")
+    return Markup(_image_set(_closest(entry['webp'], width), _closest(entry['jpeg'], width)))
+
+
+def background_style(selector, filename):
+    """
+    Emit a <style> block giving selector a background image sized to the
+    viewport: the smallest variant by default, each larger one from a
+    min-width media query once the viewport is wider than the previous one.
+    """
+    entry = _manifest.get(filename)
+    if not entry:
+        return Markup(f'<style>{selector} {{ {background_image(filename)} }}</style>')
+
+    rules = []
+    previous = None
+    for webp, jpeg in zip(entry['webp'], entry['jpeg']):
+        rule = f'{selector} {{ {_image_set(webp, jpeg)} }}'
+        if previous is not None:
+            rule = f'@media (min-width: {previous["width"] + 1}px) {{ {rule} }}'
+        rules.append(rule)
+        previous = jpeg
+    return Markup('<style>' + ' '.join(rules) + '</style>')
+
+
+def init_app(app):
+    """Register the responsive image helpers as Jinja globals"""
+    load_manifest()
+    app.jinja_env.globals.update(
+        responsive_image=responsive_image,
+        responsive_url=responsive_url,
+        background_image=background_image,
+        background_style=background_style,
+    )
@@ -0,0 +1,258 @@
+"""
+Append-only journal of submitted leads (JSON lines).
+
+Every record is written by a single writer thread that batches whatever is
+queued, writes it in one go and fsyncs once for the whole batch (group
+commit). Callers block until their record is on disk, but concurrent
+submissions share a single fsync instead of queueing behind each other.
+
+Usage from the command line:
+    python -m utils.journal export [--format csv|jsonl] [--since 2025-01-01]
+    python -m utils.journal replay --lead-id <id> [--lead-id <id> ...]
+"""
+
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOURNAL_PATH = os.environ.get('LEAD_JOURNAL_PATH', os.path.join(ROOT_DIR, 'instance', 'leads.jsonl'))
+# Extra time (seconds) the writer waits to let concurrent records join a batch
+COMMIT_DELAY = float(os.environ.get('LEAD_JOURNAL_COMMIT_DELAY', '0.002'))
+MAX_BATCH = int(os.environ.get('LEAD_JOURNAL_MAX_BATCH', '256'))
+WRITE_TIMEOUT = float(os.environ.get('LEAD_JOURNAL_WRITE_TIMEOUT', '5'))
+
+_queue = queue.Queue()
+_lock = threading.Lock()
+_writer_pid = [None]
+_stats = {'records': 0, 'batches': 0, 'fsyncs': 0, 'errors': 0}
+
+
+class JournalError(Exception):
+    pass
+
+
+class _Pending:
+    __slots__ = ('line', 'done', 'error')
+
+    def __init__(self, line):
+        self.line = line
+        self.done = threading.Event()
+        self.error = None
+
+
+def _open(path):
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    created = not os.path.exists(path)
+    f = open(path, 'ab')
+    if created:
+        # Make the new directory entry itself durable
+        dir_fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+    else:
+        _end_torn_line(f, path)
+    return f
+
+
+def _end_torn_line(f, path):
+    # A crash mid-write leaves a last line without its newline. End it before
+    # appending, or the next record would be glued onto it and be skipped too.
+    size = os.fstat(f.fileno()).st_size
+    if not size:
+        return
+    with open(path, 'rb') as tail:
+        tail.seek(size - 1)
+        if tail.read(1) == b'\n':
+            return
+    logger.warning(f"Lead journal {path} ends with a torn record; starting a new line")
+    f.write(b'\n')
+    f.flush()
+    os.fsync(f.fileno())
+
+
+def _write_batch(f, batch):
+    f.write(b''.join(pending.line for pending in batch))
+    f.flush()
+    os.fsync(f.fileno())
+    with _lock:
+        _stats['records'] += len(batch)
+        _stats['batches'] += 1
+        _stats['fsyncs'] += 1
+
+
+def _writer(path):
+    f = None
+    while True:
+        batch = [_queue.get()]
+        if COMMIT_DELAY:
+            time.sleep(COMMIT_DELAY)
+        while len(batch) < MAX_BATCH:
+            try:
+                batch.append(_queue.get_nowait())
+            except queue.Empty:
+                break
+
+        try:
+            if f is None:
+                f = _open(path)
+            _write_batch(f, batch)
+        except Exception as e:
+            logger.error(f"Lead journal write error: {e}")
+            with _lock:
+                _stats['errors'] += 1
+            for pending in batch:
+                pending.error = e
+            if f is not None:
+                f.close()
+                f = None
+        for pending in batch:
+            pending.done.set()
+
+
+def _ensure_writer():
+    pid = os.getpid()
+    if _writer_pid[0] == pid:
+        return
+    with _lock:
+        if _writer_pid[0] != pid:
+            threading.Thread(target=_writer, args=(JOURNAL_PATH,), name='lead-journal', daemon=True).start()
+            _writer_pid[0] = pid
+
+
+def append(record_type, data, record_id=None):
+    """
+    Durably append a record and return its id once it has been fsynced.
+    Raises JournalError if the write failed or did not finish in time.
+    """
+    record_id = record_id or uuid.uuid4().hex
+    record = {
+        'id': record_id,
+        'type': record_type,
+        'ts': datetime.now().isoformat(timespec='milliseconds'),
+        'data': data,
+    }
+    line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+    _ensure_writer()
+    pending = _Pending(line)
+    _queue.put(pending)
+    if not pending.done.wait(WRITE_TIMEOUT):
+        raise JournalError(f"Lead journal write timed out after {WRITE_TIMEOUT}s")
+    if pending.error is not None:
+        raise JournalError(str(pending.error))
+    return record_id
+
+
+def append_lead(lead_data, lead_id=None):
+    """Journal a submitted lead and return its lead id"""
+    return append('lead', lead_data, lead_id)
+
+
+def append_merge(lead_data, merged_into):
+    """Journal a repeat submission of the lead merged_into and return its record id"""
+    return append('merge', {**lead_data, 'merged_into': merged_into})
+
+
+def iter_journal(path=None, record_type=None, since=None):
+    """
+    Iterate over journal records in write order. A torn last line from a
+    crash mid-write is skipped, as is any other line that is not valid JSON.
+    """
+    path = path or JOURNAL_PATH
+    if not os.path.exists(path):
+        return
+    with open(path, 'rb') as f:
+        for number, line in enumerate(f, 1):
+            try:
+                record = json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping unreadable lead journal line {number} in {path}")
+                continue
+            if record_type and record.get('type') != record_type:
+                continue
+            if since and record.get('ts', '') < since:
+                continue
+            yield record
+
+
+def iter_leads(path=None, since=None):
+    """Iterate over journaled leads as lead_data dicts with their lead_id"""
+    for record in iter_journal(path, record_type='lead', since=since):
+        lead_data = dict(record['data'])
+        lead_data['lead_id'] = record['id']
+        yield lead_data
+
+
+def get_stats():
+    """Get journal write counters"""
+    with _lock:
+        stats = dict(_stats)
+    stats['pending'] = _queue.qsize()
+    return stats
+
+
+def _export(args):
+    import csv
+    import sys
+
+    leads = iter_leads(args.path, since=args.since)
+    if args.format == 'jsonl':
+        for lead_data in leads:
+            sys.stdout.write(json.dumps(lead_data, ensure_ascii=False) + '\n')
+        return
+
+    writer = None
+    for lead_data in leads:
+        if writer is None:
+            writer = csv.DictWriter(sys.stdout, fieldnames=list(lead_data), extrasaction='ignore', restval='')
+            writer.writeheader()
+        writer.writerow(lead_data)
+
+
+def _replay(args):
+    from utils.mail import send_whatsapp_notification_simple
+
+    wanted = set(args.lead_id or [])
+    for lead_data in iter_leads(args.path, since=args.since):
+        if wanted and lead_data['lead_id'] not in wanted:
+            continue
+        ok = send_whatsapp_notification_simple(lead_data)
+        print(f"{lead_data['lead_id']} {lead_data['name']} {'sent' if ok else 'FAILED'}")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Export or replay the lead journal')
+    parser.add_argument('--path', default=JOURNAL_PATH, help='journal file (default: %(default)s)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    export = sub.add_parser('export', help='write journaled leads to stdout')
+    export.add_argument('--format', choices=['csv', 'jsonl'], default='csv')
+    export.add_argument('--since', help='only leads journaled at or after this ISO timestamp')
+    export.set_defaults(func=_export)
+
+    replay = sub.add_parser('replay', help='re-send WhatsApp notifications for journaled leads')
+    replay.add_argument('--lead-id', action='append', help='lead id to replay (repeatable)')
+    replay.add_argument('--since', help='only leads journaled at or after this ISO timestamp')
+    replay.set_defaults(func=_replay)
+
+    args = parser.parse_args(argv)
+    if args.func is _replay and not (args.lead_id or args.since):
+        parser.error('replay needs --lead-id or --since')
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+import logging
+import uuid
+from datetime import datetime
+
+from utils import outbox
+from utils.dedupe import find_duplicate, release as release_duplicate_keys
+from utils.journal import append_lead as journal_lead, append_merge as journal_merge
+from utils.validation import validate_email, normalize_phone, get_validation_error_message
+
+logger = logging.getLogger(__name__)
+
+
+class LeadError(ValueError):
+    """A form submission that cannot become a lead; str() is the message for the visitor"""
+
+
+def lead_from_form(form, remote_addr, user_agent):
+    """
+    Validate a /submit-lead form and build its lead_data dict
+    Raises LeadError with a translated message when a field is missing or invalid
+    """
+    name = form.get('name', '').strip()
+    phone = form.get('phone', '').strip()
+    email = form.get('email', '').strip()
+    language = form.get('language', 'tr')
+    whatsapp_optin = form.get('whatsapp_optin') == 'on'
+    marketing_consent = form.get('marketing_consent') == 'on'
+    kvkk_consent = form.get('kvkk_consent') == 'on'
+
+    if not name or not phone:
+        raise LeadError(get_validation_error_message('required_name' if not name else 'required_phone', language))
+
+    normalized_phone = normalize_phone(phone)
+    if not normalized_phone.valid:
+        raise LeadError(get_validation_error_message('invalid_phone', language))
+
+    if email and not validate_email(email):
+        raise LeadError(get_validation_error_message('invalid_email', language))
+
+    if not kvkk_consent:
+        raise LeadError('KVKK consent is required')
+
+    return {
+        'name': name,
+        'phone': normalized_phone.e164,
+        'email': email or 'Belirtilmedi',
+        'language': language,
+        'unit_interest': form.get('unit_interest', '') or 'Belirtilmedi',
+        'budget_range': form.get('budget_range', '') or 'Belirtilmedi',
+        'timeline': form.get('timeline', '') or 'Belirtilmedi',
+        'best_call_time': form.get('best_call_time', '') or 'Belirtilmedi',
+        'whatsapp_optin': 'Evet' if whatsapp_optin else 'Hayir',
+        'marketing_consent': 'Evet' if marketing_consent else 'Hayir',
+        'kvkk_consent': 'Evet',
+        'utm_source': form.get('utm_source', '') or 'Direkt',
+        'utm_medium': form.get('utm_medium', '') or 'Yok',
+        'utm_campaign': form.get('utm_campaign', '') or 'Yok',
+        'utm_content': form.get('utm_content', '') or 'Yok',
+        'utm_term': form.get('utm_term', '') or 'Yok',
+        'ip_address': remote_addr,
+        'user_agent': user_agent,
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def callback_from_form(form, remote_addr, user_agent):
+    """
+    Validate a /callback-request form and build its lead_data dict
+    Raises LeadError with a translated message when a field is missing or invalid
+    """
+    name = form.get('callback_name', '').strip()
+    phone = form.get('callback_phone', '').strip()
+    language = form.get('language', 'tr')
+
+    if not name or not phone:
+        raise LeadError(get_validation_error_message('required_name' if not name else 'required_phone', language))
+
+    normalized_phone = normalize_phone(phone)
+    if not normalized_phone.valid:
+        raise LeadError(get_validation_error_message('invalid_phone', language))
+
+    return {
+        'name': name,
+        'phone': normalized_phone.e164,
+        'email': 'Belirtilmedi',
+        'language': language,
+        'unit_interest': 'callback_request',
+        'budget_range': 'Belirtilmedi',
+        'timeline': 'Belirtilmedi',
+        'best_call_time': 'Belirtilmedi',
+        'whatsapp_optin': 'Hayir',
+        'marketing_consent': 'Hayir',
+        'kvkk_consent': 'Evet',  # Implied for callback
+        'utm_source': 'Direkt',
+        'utm_medium': 'Yok',
+        'utm_campaign': 'Yok',
+        'utm_content': 'Yok',
+        'utm_term': 'Yok',
+        'ip_address': remote_addr,
+        'user_agent': user_agent,
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    }
+
+
+def record_lead(lead_data):
+    """
+    Keep a durable copy of the lead before notifying anyone (sets lead_data['lead_id'])
+    Returns False when the same phone or e-mail was submitted within the dedupe
+    window: the submission is journaled as a merge into that earlier lead
+    (lead_data['merged_into']) and sales should not be notified again.
+    """
+    lead_id = uuid.uuid4().hex
+    merged_into = find_duplicate(lead_data, lead_id)
+    if merged_into is not None:
+        try:
+            journal_merge(lead_data, merged_into)
+        except Exception as e:
+            logger.error(f"Lead journal error: {e}")
+        lead_data['lead_id'] = lead_data['merged_into'] = merged_into
+        logger.info("Duplicate lead merged", extra={'lead_id': merged_into})
+        return False
+
+    try:
+        lead_data['lead_id'] = journal_lead(lead_data, lead_id)
+    except Exception as e:
+        logger.error(f"Lead journal error: {e}")
+    # Retried from the outbox until the notification goes out (sets lead_data['outbox_id'])
+    try:
+        lead_data['outbox_id'] = outbox.add(lead_data)
+    except Exception as e:
+        logger.error(f"Outbox error: {e}")
+        # Nothing will retry this lead, so a resubmission must not be merged into it
+        release_duplicate_keys(lead_data, lead_id)
+    return True
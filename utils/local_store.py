@@ -0,0 +1,59 @@
+import contextlib
+import os
+import sqlite3
+import threading
+
+# One SQLite file per host, shared by all gunicorn workers (WAL mode lets
+# readers and a writer work concurrently). Modules register their tables
+# with register_schema() and use connect()/transaction().
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_PATH = os.environ.get('LOCAL_STORE_PATH', os.path.join(ROOT_DIR, 'instance', 'local_store.sqlite3'))
+# Seconds a writer waits for another process's transaction before giving up
+BUSY_TIMEOUT = float(os.environ.get('LOCAL_STORE_BUSY_TIMEOUT', '5'))
+SYNCHRONOUS = os.environ.get('LOCAL_STORE_SYNCHRONOUS', 'NORMAL').upper()
+
+_schemas = []
+_local = threading.local()
+
+
+def register_schema(sql):
+    """Add CREATE ... IF NOT EXISTS statements to run on every new connection"""
+    _schemas.append(sql)
+
+
+def connect(path=None):
+    """Get this thread's connection (opened lazily, reopened after fork)"""
+    path = path or STORE_PATH
+    pid = os.getpid()
+    connections = getattr(_local, 'connections', None)
+    if connections is None or _local.pid != pid:
+        connections = _local.connections = {}
+        _local.pid = pid
+    entry = connections.get(path)
+    if entry is None:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Autocommit mode; transaction() issues BEGIN/COMMIT explicitly
+        conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA synchronous={SYNCHRONOUS}')
+        entry = connections[path] = [conn, 0]
+    conn, applied = entry
+    # Schemas of modules imported after this connection was opened
+    if applied < len(_schemas):
+        for sql in _schemas[applied:]:
+            conn.executescript(sql)
+        entry[1] = len(_schemas)
+    return conn
+
+
+@contextlib.contextmanager
+def transaction(path=None):
+    """Write transaction that takes the database lock up front (BEGIN IMMEDIATE)"""
+    conn = connect(path)
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        yield conn
+    except BaseException:
+        conn.execute('ROLLBACK')
+        raise
+    conn.execute('COMMIT')
@@ -0,0 +1,215 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+from datetime import datetime, timezone
+
+# LOG_LEVELS overrides single loggers, e.g. "utils.mail=DEBUG,urllib3=WARNING".
+# LOG_SAMPLE keeps only a fraction of sub-WARNING records per logger prefix,
+# e.g. "utils.notify_digest=0.1"; warnings and errors are never sampled out.
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = os.environ.get('LOG_LEVELS', '')
+LOG_SAMPLE = os.environ.get('LOG_SAMPLE', '')
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json').lower()
+# Records beyond this many waiting for the writer thread are dropped, never waited on
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', '10000'))
+
+REDACTED = '[REDACTED]'
+_SECRET_FIELD = re.compile(r'api_?key|token|secret|password|authorization|cookie', re.IGNORECASE)
+_SECRET_PARAM = re.compile(r'((?:api_?key|token|secret|password)=)[^&\s\'"]+', re.IGNORECASE)
+# The CallMeBot query string carries the whole lead message
+_MESSAGE_PARAM = re.compile(r'([?&]text=)[^&\s\'"]+')
+_BEARER = re.compile(r'(Bearer\s+)\S+', re.IGNORECASE)
+_EMAIL = re.compile(r'\b([\w.+-])[\w.+-]*@([\w-]+(?:\.[\w-]+)+)')
+# 10-15 digit runs, optionally spaced or dashed, not part of a longer token or a timestamp.
+# URL-encoded numbers (%2B905551234567, %20 between groups) come from logged query strings.
+_PHONE = re.compile(r'(?<![\w:.-])(\+|%2[Bb])?(\d(?:(?:[ -]|%20)?\d){2})((?:(?:[ -]|%20)?\d){5,10})((?:(?:[ -]|%20)?\d){2})(?![\w:])')
+_PHONE_DIGIT = re.compile(r'(%20)|[0-9]')
+_PII_FIELDS = {'phone': 'phone', 'email': 'email', 'lead_name': 'name'}
+
+# Attributes every LogRecord has; anything else came in through extra=
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'taskName'}
+
+_stats = {'dropped': 0, 'sampled_out': 0}
+_state = {'handler': None, 'listener': None, 'pid': None}
+_lock = threading.Lock()
+
+
+def _mask_phone(match):
+    hidden = _PHONE_DIGIT.sub(lambda m: m.group(1) or '*', match.group(3))
+    return f"{match.group(1) or ''}{match.group(2)}{hidden}{match.group(4)}"
+
+
+def redact(text):
+    """Mask API keys, bearer tokens, phone numbers and e-mail addresses in free text"""
+    if not text:
+        return text
+    text = _SECRET_PARAM.sub(lambda m: m.group(1) + REDACTED, text)
+    text = _MESSAGE_PARAM.sub(lambda m: m.group(1) + REDACTED, text)
+    text = _BEARER.sub(lambda m: m.group(1) + REDACTED, text)
+    text = _EMAIL.sub(r'\1***@\2', text)
+    return _PHONE.sub(_mask_phone, text)
+
+
+def _redact_field(key, value):
+    if _SECRET_FIELD.search(key):
+        return REDACTED
+    kind = _PII_FIELDS.get(key)
+    if kind == 'name' and value:
+        return f'{str(value)[0]}***'
+    if isinstance(value, str):
+        return redact(value)
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, extra fields, exc"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': redact(record.getMessage()),
+            'pid': record.process,
+            'thread': record.threadName,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = _redact_field(key, value)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc'] = redact(record.exc_text)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human readable lines for local development, with the same redaction"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        return redact(super().format(record))
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of sub-WARNING records for the configured logger prefixes"""
+
+    def __init__(self, rates):
+        super().__init__()
+        # Longest prefix first so "utils.mail.x" beats "utils"
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + '.'):
+                if random.random() < rate:
+                    return True
+                with _lock:
+                    _stats['sampled_out'] += 1
+                return False
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that drops records instead of blocking when the writer falls
+    behind, and restarts the writer thread in forked gunicorn workers.
+    """
+
+    def prepare(self, record):
+        # Merge args and render any traceback now, but leave JSON formatting
+        # and redaction to the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if _state['pid'] != os.getpid():
+            _start_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with _lock:
+                _stats['dropped'] += 1
+
+
+def _parse_pairs(spec, convert):
+    pairs = {}
+    for item in spec.split(','):
+        name, sep, value = item.partition('=')
+        if sep and name.strip():
+            try:
+                pairs[name.strip()] = convert(value.strip())
+            except ValueError:
+                pass
+    return pairs
+
+
+def _start_listener():
+    # Threads do not survive fork, so each worker process needs its own writer
+    with _lock:
+        pid = os.getpid()
+        if _state['pid'] == pid:
+            return
+        handler = _state['handler']
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(TextFormatter() if LOG_FORMAT == 'text' else JsonFormatter())
+        handler.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        listener = logging.handlers.QueueListener(handler.queue, stream)
+        listener.start()
+        _state['listener'] = listener
+        _state['pid'] = pid
+
+
+def configure_logging():
+    """Route all logging through a bounded queue to a JSON (or text) stdout writer"""
+    if _state['handler'] is not None:
+        return
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    sample_rates = _parse_pairs(LOG_SAMPLE, float)
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+    _state['handler'] = handler
+    _start_listener()
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL)
+    for name, level in _parse_pairs(LOG_LEVELS, str.upper).items():
+        logging.getLogger(name).setLevel(level)
+
+
+def get_stats():
+    """Get counts of records dropped on a full queue or removed by sampling"""
+    with _lock:
+        stats = dict(_stats)
+    handler = _state['handler']
+    stats['queued'] = handler.queue.qsize() if handler is not None else 0
+    return stats
+
+
+@atexit.register
+def _stop_listener():
+    # Flush whatever is still queued before the process exits
+    listener = _state['listener']
+    if listener is not None and _state['pid'] == os.getpid():
+        listener.stop()
+        _state['pid'] = None
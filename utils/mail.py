@@ -1,40 +1,21 @@
-from flask_mail import Message
-from app import mail
 import os
-import requests
-import json
+import logging
+import time
+from utils import http_client, mail_dispatch, notify_templates
+from utils.circuit_breaker import get_breaker
+from utils.metrics import record_notification
+
+logger = logging.getLogger(__name__)
 
 WHATSAPP_NUMBER = "+905525242866"
+CALLMEBOT_API_URL = os.environ.get('CALLMEBOT_API_URL', 'https://api.callmebot.com/whatsapp.php')
 
 def send_whatsapp_notification(lead):
     """Send WhatsApp notification for new lead"""
     try:
-        # Format the message with simple formatting to avoid encoding issues
-        message = f"""YENI MUSTERI BASVURUSU - Beylerbeyi Residences
-
-Isim: {lead.name}
-Telefon: {lead.phone}
-Email: {lead.email or 'Belirtilmedi'}
-Dil: {lead.language}
-Ilgilendigi Unite: {lead.unit_interest or 'Belirtilmedi'}
-Butce: {lead.budget_range or 'Belirtilmedi'}
-Zaman Cizelgesi: {lead.timeline or 'Belirtilmedi'}
-En Iyi Arama Saati: {lead.best_call_time or 'Belirtilmedi'}
-WhatsApp Izni: {'Evet' if lead.whatsapp_optin else 'Hayir'}
-Pazarlama Izni: {'Evet' if lead.marketing_consent else 'Hayir'}
-
-UTM Bilgileri:
-- Kaynak: {lead.utm_source or 'Direkt'}
-- Medium: {lead.utm_medium or 'Yok'}
-- Kampanya: {lead.utm_campaign or 'Yok'}
+        message = notify_templates.render('whatsapp', lead)
 
-Tarih: {lead.created_at}
-IP: {lead.ip_address}
-
-Lutfen musteriyle en kisa surede iletisime gecin!"""
-
-        print(f"\n🚨 NEW LEAD SUBMISSION for {WHATSAPP_NUMBER}")
-        print(f"Lead: {lead.name} - {lead.phone}")
+        logger.info("New lead submission", extra={'lead_name': lead.name, 'phone': lead.phone})
         
         # Try sending methods in order of preference
         success = False
@@ -54,91 +35,140 @@ Lutfen musteriyle en kisa surede iletisime gecin!"""
         return success
         
     except Exception as e:
-        print(f"❌ Error sending WhatsApp notification: {e}")
+        logger.error(f"Error sending WhatsApp notification: {e}")
         # Always try the fallback URL method
         try:
             return create_whatsapp_web_url(f"Error in automated sending. Lead: {lead.name} - {lead.phone}")
         except:
             return False
 
+def whatsapp_api_configured():
+    return bool(os.environ.get('WHATSAPP_API_TOKEN') and os.environ.get('WHATSAPP_PHONE_NUMBER_ID'))
+
+def whatsapp_api_request(message):
+    """URL, headers and JSON body for a WhatsApp Business API send, or None when not configured"""
+    if not whatsapp_api_configured():
+        return None
+    token = os.environ.get('WHATSAPP_API_TOKEN')
+    phone_number_id = os.environ.get('WHATSAPP_PHONE_NUMBER_ID')
+    
+    url = f"https://graph.facebook.com/v17.0/{phone_number_id}/messages"
+    
+    headers = {
+        'Authorization': f'Bearer {token}',
+        'Content-Type': 'application/json'
+    }
+    
+    data = {
+        "messaging_product": "whatsapp",
+        "to": WHATSAPP_NUMBER.replace("+", ""),
+        "text": {"body": message}
+    }
+    return url, headers, data
+
+def channel_available(channel):
+    """Ask the channel's circuit breaker whether to send; counts a skipped send if not"""
+    if get_breaker(channel).allow():
+        return True
+    record_notification(channel, 'skipped')
+    return False
+
+def channel_failed(channel, elapsed):
+    """Count a send that raised (timeout, connection error) against the channel"""
+    get_breaker(channel).record(False)
+    record_notification(channel, 'error', elapsed)
+
+def whatsapp_api_result(response, elapsed):
+    """Count a WhatsApp Business API response; True if the message was accepted"""
+    sent = response.status_code == 200
+    get_breaker('whatsapp_api').record(sent)
+    record_notification('whatsapp_api', 'sent' if sent else 'rejected', elapsed)
+    return sent
+
 def send_via_whatsapp_business_api(message):
     """Send via WhatsApp Business API"""
+    started = time.perf_counter()
     try:
-        token = os.environ.get('WHATSAPP_API_TOKEN')
-        phone_number_id = os.environ.get('WHATSAPP_PHONE_NUMBER_ID')
-        
-        if not token or not phone_number_id:
+        request = whatsapp_api_request(message)
+        if request is None:
+            return False
+        url, headers, data = request
+        # Skip instantly while the API keeps failing
+        if not channel_available('whatsapp_api'):
             return False
         
-        url = f"https://graph.facebook.com/v17.0/{phone_number_id}/messages"
-        
-        headers = {
-            'Authorization': f'Bearer {token}',
-            'Content-Type': 'application/json'
-        }
-        
-        data = {
-            "messaging_product": "whatsapp",
-            "to": WHATSAPP_NUMBER.replace("+", ""),
-            "text": {"body": message}
-        }
-        
-        response = requests.post(url, headers=headers, json=data, timeout=10)
-        return response.status_code == 200
+        started = time.perf_counter()
+        response = http_client.post(url, headers=headers, json=data, read_timeout=10)
+        return whatsapp_api_result(response, time.perf_counter() - started)
         
     except Exception as e:
-        print(f"WhatsApp Business API error: {e}")
+        channel_failed('whatsapp_api', time.perf_counter() - started)
+        logger.error(f"WhatsApp Business API error: {e}")
         return False
 
+_callmebot_setup_logged = False
+
+def _log_callmebot_setup():
+    global _callmebot_setup_logged
+    _callmebot_setup_logged = True
+    logger.warning(
+        "CallMeBot setup required: add the CallMeBot number from "
+        "https://www.callmebot.com/blog/free-api-whatsapp-messages/ to your phone contacts, "
+        "send it 'I allow callmebot to send me messages', then set CALLMEBOT_API_KEY "
+        "to the key you receive. Using the WhatsApp Web URL fallback for now."
+    )
+
+def callmebot_params(message):
+    """Query parameters for a CallMeBot send, or None when no API key is configured"""
+    # CallMeBot API requires phone number registration and API key
+    api_key = os.environ.get('CALLMEBOT_API_KEY')
+    if not api_key:
+        # If no API key is set, show instructions (once per process)
+        if not _callmebot_setup_logged:
+            _log_callmebot_setup()
+        record_notification('callmebot', 'unconfigured')
+        return None
+    
+    # Don't manually encode - let the HTTP client handle it properly
+    return {
+        'phone': WHATSAPP_NUMBER.replace("+", ""),  # Remove + from phone number
+        'text': message,  # Send raw message, the client will handle encoding
+        'apikey': api_key
+    }
+
+def callmebot_result(response, elapsed):
+    """Log and count a CallMeBot response; True if the message was accepted"""
+    if response.status_code == 200:
+        logger.info("WhatsApp message sent via CallMeBot", extra={'duration_ms': round(elapsed * 1000, 1)})
+        get_breaker('callmebot').record(True)
+        record_notification('callmebot', 'sent', elapsed)
+        return True
+    logger.error(f"CallMeBot API error: status {response.status_code}",
+                 extra={'response_text': response.text[:200], 'duration_ms': round(elapsed * 1000, 1)})
+    get_breaker('callmebot').record(False)
+    record_notification('callmebot', 'rejected', elapsed)
+    return False
+
 def send_via_callmebot(message):
     """Send via CallMeBot API (free service)"""
+    started = time.perf_counter()
     try:
-        # CallMeBot API requires phone number registration and API key
-        api_key = os.environ.get('CALLMEBOT_API_KEY')
-        if not api_key:
-            # If no API key is set, show instructions
-            print("\n" + "="*60)
-            print("📱 CALLMEBOT SETUP REQUIRED")
-            print("="*60)
-            print("To enable automatic WhatsApp sending to +905525242866:")
-            print("")
-            print("1. Add +34 684 73 40 44 to your phone contacts")
-            print("2. Send: 'I allow callmebot to send me messages'")
-            print("3. Wait for API key from CallMeBot")
-            print("4. Add CALLMEBOT_API_KEY=your_key to .env file")
-            print("")
-            print("For now, using WhatsApp Web URL fallback...")
-            print("="*60)
+        params = callmebot_params(message)
+        if params is None:
+            return False
+        # Skip instantly while CallMeBot keeps failing
+        if not channel_available('callmebot'):
             return False
-            
-        # CallMeBot API endpoint
-        url = "https://api.callmebot.com/whatsapp.php"
-        
-        # Don't manually encode - let requests handle it properly
-        params = {
-            'phone': WHATSAPP_NUMBER.replace("+", ""),  # Remove + from phone number
-            'text': message,  # Send raw message, requests will handle encoding
-            'apikey': api_key
-        }
-        
-        print(f"📤 Sending WhatsApp via CallMeBot to {WHATSAPP_NUMBER}...")
-        print(f"🔑 Using API Key: {api_key}")
-        print(f"� Message Preview: {message[:100]}...")
         
-        response = requests.get(url, params=params, timeout=15)
+        logger.debug("Sending WhatsApp via CallMeBot", extra={'message_chars': len(message)})
         
-        print(f"📊 Response Status: {response.status_code}")
-        print(f"📝 Response Text: {response.text}")
+        started = time.perf_counter()
+        response = http_client.get(CALLMEBOT_API_URL, params=params)
+        return callmebot_result(response, time.perf_counter() - started)
         
-        if response.status_code == 200:
-            print("✅ WhatsApp message sent successfully via CallMeBot!")
-            return True
-        else:
-            print(f"❌ CallMeBot API error: Status {response.status_code}")
-            return False
-            
     except Exception as e:
-        print(f"❌ CallMeBot API error: {e}")
+        channel_failed('callmebot', time.perf_counter() - started)
+        logger.error(f"CallMeBot API error: {e}")
         return False
 
 def create_whatsapp_web_url(message):
@@ -151,146 +181,86 @@ def create_whatsapp_web_url(message):
         encoded_message = urllib.parse.quote(message)
         whatsapp_url = f"https://wa.me/{WHATSAPP_NUMBER.replace('+', '')}?text={encoded_message}"
         
-        # Log the URL for manual use
-        print(f"\n=== WHATSAPP NOTIFICATION ===")
-        print(f"Manual WhatsApp URL: {whatsapp_url}")
-        print("=== END WHATSAPP NOTIFICATION ===\n")
+        # The URL carries the whole lead, so it is only logged at DEBUG
+        logger.info("WhatsApp Web URL created for manual sending")
+        logger.debug(f"Manual WhatsApp URL: {whatsapp_url}")
         
         return True
         
     except Exception as e:
-        print(f"WhatsApp Web URL error: {e}")
+        logger.error(f"WhatsApp Web URL error: {e}")
         return False
 
+def _lead_field(lead, name):
+    return lead.get(name) if isinstance(lead, dict) else getattr(lead, name, None)
+
 def send_lead_notification(lead):
-    """Send lead notification to sales team"""
+    """Send lead notification to sales team (lead is a lead_data dict or a lead record)"""
     try:
         sales_email = os.environ.get('SALES_EMAIL', 'info@queenvillaofficial.com')
         
-        subject = f"New Lead: {lead.name} - Beylerbeyi Residences"
-        
-        body = f"""
-New lead received for Beylerbeyi Bosphorus Residences:
-
-Name: {lead.name}
-Phone: {lead.phone}
-Email: {lead.email or 'Not provided'}
-Language: {lead.language}
-Unit Interest: {lead.unit_interest or 'Not specified'}
-Budget Range: {lead.budget_range or 'Not specified'}
-Timeline: {lead.timeline or 'Not specified'}
-Best Call Time: {lead.best_call_time or 'Not specified'}
-WhatsApp Opt-in: {'Yes' if lead.whatsapp_optin else 'No'}
-Marketing Consent: {'Yes' if lead.marketing_consent else 'No'}
-
-UTM Data:
-Source: {lead.utm_source or 'Direct'}
-Medium: {lead.utm_medium or 'None'}
-Campaign: {lead.utm_campaign or 'None'}
-
-Submitted: {lead.created_at}
-IP: {lead.ip_address}
-        """
+        subject = notify_templates.render('email_subject', lead, 'en')
+        body = notify_templates.render('email', lead, 'en')
         
+        from flask_mail import Message
         msg = Message(
             subject=subject,
             recipients=[sales_email],
             body=body
         )
         
-        mail.send(msg)
-        return True
+        # Queued for the worker's persistent SMTP session (utils/mail_dispatch.py)
+        return mail_dispatch.send(msg)
         
     except Exception as e:
-        print(f"Error sending lead notification: {e}")
+        record_notification('email', 'error')
+        logger.error(f"Error sending lead notification: {e}")
         return False
 
 def send_auto_reply(lead):
     """Send auto-reply to lead"""
     try:
-        if not lead.email:
+        email = _lead_field(lead, 'email')
+        if not email or email == notify_templates.LEAD_PLACEHOLDERS['email']:
             return False
-            
-        translations = {
-            'tr': {
-                'subject': 'Beylerbeyi Boğaz Rezidansları - Bilgileriniz Alındı',
-                'greeting': f'Sayın {lead.name},',
-                'message': 'Beylerbeyi Boğaz Rezidansları ile ilgili gösterdiğiniz ilgi için teşekkür ederiz. Uzmanlarımız en kısa sürede sizinle iletişime geçecektir.',
-                'signature': 'Beylerbeyi Boğaz Rezidansları Satış Ekibi'
-            },
-            'en': {
-                'subject': 'Beylerbeyi Bosphorus Residences - Information Received',
-                'greeting': f'Dear {lead.name},',
-                'message': 'Thank you for your interest in Beylerbeyi Bosphorus Residences. Our specialists will contact you shortly.',
-                'signature': 'Beylerbeyi Bosphorus Residences Sales Team'
-            },
-            'ar': {
-                'subject': 'مساكن بوسفور بييلربيي - تم استلام معلوماتك',
-                'greeting': f'عزيزي {lead.name}،',
-                'message': 'شكراً لك على اهتمامك بمساكن بوسفور بييلربيي. سيتواصل معك فريق الخبراء لدينا قريباً.',
-                'signature': 'فريق مبيعات مساكن بوسفور بييلربيي'
-            }
-        }
         
-        lang_data = translations.get(lead.language, translations['en'])
-        
-        subject = lang_data['subject']
-        body = f"""
-{lang_data['greeting']}
-
-{lang_data['message']}
-
-{lang_data['signature']}
-        """
+        language = _lead_field(lead, 'language')
+        subject = notify_templates.render('auto_reply_subject', lead, language)
+        body = notify_templates.render('auto_reply', lead, language)
         
+        from flask_mail import Message
         msg = Message(
             subject=subject,
-            recipients=[lead.email],
+            recipients=[email],
             body=body
         )
         
-        mail.send(msg)
-        return True
+        # Queued for the worker's persistent SMTP session (utils/mail_dispatch.py)
+        return mail_dispatch.send(msg)
         
     except Exception as e:
-        print(f"Error sending auto-reply: {e}")
+        record_notification('email', 'error')
+        logger.error(f"Error sending auto-reply: {e}")
         return False
 
+def format_lead_message(lead_data):
+    """Format the sales WhatsApp message for a single lead"""
+    return notify_templates.render('whatsapp', lead_data)
+
+def format_digest_message(leads):
+    """Format one WhatsApp message summarising several leads"""
+    return notify_templates.render_digest(leads)
+
 def send_whatsapp_notification_simple(lead_data):
     """Send WhatsApp notification for new lead without database dependency"""
     try:
-        # Format the message with simple formatting to avoid encoding issues
-        message = f"""YENI MUSTERI BASVURUSU - Beylerbeyi Residences
-
-Isim: {lead_data['name']}
-Telefon: {lead_data['phone']}
-Email: {lead_data['email']}
-Dil: {lead_data['language']}
-Ilgilendigi Unite: {lead_data['unit_interest']}
-Butce: {lead_data['budget_range']}
-Zaman Cizelgesi: {lead_data['timeline']}
-En Iyi Arama Saati: {lead_data['best_call_time']}
-WhatsApp Izni: {lead_data['whatsapp_optin']}
-Pazarlama Izni: {lead_data['marketing_consent']}
-
-UTM Bilgileri:
-- Kaynak: {lead_data['utm_source']}
-- Medium: {lead_data['utm_medium']}
-- Kampanya: {lead_data['utm_campaign']}
-
-Tarih: {lead_data['timestamp']}
-IP: {lead_data['ip_address']}
-
-Lutfen musteriyle en kisa surede iletisime gecin!"""
+        message = format_lead_message(lead_data)
         
-        print(f"🚨 NEW LEAD SUBMISSION for {WHATSAPP_NUMBER}")
-        print(f"Lead: {lead_data['name']} - {lead_data['phone']}")
+        logger.info("New lead submission", extra={'lead_name': lead_data['name'], 'phone': lead_data['phone']})
         
         # Use CallMeBot API
-        send_via_callmebot(message)
-        
-        return True
+        return send_via_callmebot(message)
         
     except Exception as e:
-        print(f"Error sending WhatsApp notification: {e}")
+        logger.error(f"Error sending WhatsApp notification: {e}")
         return False
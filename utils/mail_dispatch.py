@@ -0,0 +1,200 @@
+import atexit
+import logging
+import os
+import queue
+import smtplib
+import threading
+import time
+
+from flask import current_app
+
+from utils.metrics import record_notification
+
+logger = logging.getLogger(__name__)
+
+# E-mails go out from one background thread per worker over a single SMTP
+# session that stays open between messages (TLS and AUTH happen once, not per
+# message). The session is closed after IDLE_TIMEOUT seconds without mail,
+# before most servers would drop it, and reopened on the next message.
+ENABLED = os.environ.get('EMAIL_DISPATCHER', 'true').lower() in ['true', 'on', '1']
+MAX_PENDING = int(os.environ.get('EMAIL_MAX_PENDING', '1000'))
+# Messages taken from the queue at once and sent back to back on the session
+BATCH_SIZE = int(os.environ.get('EMAIL_BATCH_SIZE', '50'))
+IDLE_TIMEOUT = float(os.environ.get('EMAIL_IDLE_TIMEOUT', '30'))
+SHUTDOWN_TIMEOUT = float(os.environ.get('EMAIL_SHUTDOWN_TIMEOUT', '10'))
+
+# The server turned down this message, but the session is still usable
+_MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+class EmailDispatcher:
+    """Queue of Flask-Mail messages delivered over a reused SMTP connection"""
+
+    def __init__(self, max_pending=MAX_PENDING, batch_size=BATCH_SIZE, idle_timeout=IDLE_TIMEOUT):
+        self.batch_size = batch_size
+        self.idle_timeout = idle_timeout
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._owner_pid = None
+        self._app = None
+        self._connection = None
+        self.stats = {'queued': 0, 'sent': 0, 'failed': 0, 'overflow': 0, 'sessions': 0, 'reconnects': 0}
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def _connect(self):
+        if self._connection is None:
+            connection = get_mail(self._app).connect()
+            # Opens the SMTP session (STARTTLS, login); _disconnect() closes it
+            connection.__enter__()
+            self._connection = connection
+            self._count('sessions')
+        return self._connection
+
+    def _disconnect(self):
+        connection, self._connection = self._connection, None
+        if connection is None or connection.host is None:
+            return
+        try:
+            connection.host.quit()
+        except Exception:
+            # Already dropped by the server
+            connection.host.close()
+
+    def _send(self, message):
+        started = time.perf_counter()
+        for attempt in range(2):
+            try:
+                self._connect().send(message)
+            except _MESSAGE_ERRORS as e:
+                error = e
+            except OSError as e:
+                # Dropped session, timeout, connection refused (SMTPException is an OSError too)
+                self._disconnect()
+                if attempt == 0:
+                    self._count('reconnects')
+                    continue
+                error = e
+            except Exception as e:
+                # Bad header, no recipients...: the session itself is still fine
+                error = e
+            else:
+                record_notification('email', 'sent', time.perf_counter() - started)
+                self._count('sent')
+                return True
+            record_notification('email', 'error', time.perf_counter() - started)
+            self._count('failed')
+            logger.error(f"Email delivery error: {error}")
+            return False
+
+    def _run(self):
+        with self._app.app_context():
+            while True:
+                try:
+                    # Without an open session there is nothing to time out
+                    message = self._queue.get(timeout=self.idle_timeout if self._connection else None)
+                except queue.Empty:
+                    self._disconnect()
+                    continue
+                batch = [message]
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                for message in batch:
+                    try:
+                        self._send(message)
+                    finally:
+                        self._queue.task_done()
+
+    def _ensure_thread(self):
+        # Threads (and SMTP sockets) do not survive fork
+        pid = os.getpid()
+        if self._owner_pid == pid:
+            return
+        with self._lock:
+            if self._owner_pid != pid:
+                self._app = current_app._get_current_object()
+                self._connection = None
+                threading.Thread(target=self._run, name='email-dispatcher', daemon=True).start()
+                self._owner_pid = pid
+
+    def submit(self, message):
+        """
+        Queue a Flask-Mail Message (call with an app context) and return True;
+        sends it inline over a fresh session when the queue is full.
+        """
+        self._ensure_thread()
+        self._count('queued')
+        try:
+            self._queue.put_nowait(message)
+            return True
+        except queue.Full:
+            self._count('overflow')
+            logger.warning("Email queue full, sending inline")
+        return _send_now(message)
+
+    def drain(self, timeout=SHUTDOWN_TIMEOUT):
+        """Wait until queued e-mails are sent, up to timeout seconds"""
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and self._owner_pid == os.getpid():
+            if time.monotonic() >= deadline:
+                logger.warning(f"{self._queue.unfinished_tasks} e-mails still queued at shutdown")
+                return False
+            time.sleep(0.05)
+        return True
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['depth'] = self._queue.qsize()
+        stats['connected'] = self._connection is not None
+        return stats
+
+
+_dispatcher = EmailDispatcher()
+_setup_lock = threading.Lock()
+
+
+def get_mail(app):
+    """
+    Get the app's Flask-Mail state, registering the extension on first use
+    so that booting a worker does not import flask_mail (and the email package).
+    """
+    mail = app.extensions.get('mail')
+    if mail is None:
+        from flask_mail import Mail
+        with _setup_lock:
+            mail = app.extensions.get('mail') or Mail().init_app(app)
+    return mail
+
+
+def _send_now(message):
+    # One SMTP session for this message, as Mail.send() does
+    started = time.perf_counter()
+    get_mail(current_app).send(message)
+    record_notification('email', 'sent', time.perf_counter() - started)
+    return True
+
+
+def send(message):
+    """
+    Send a Flask-Mail message through the dispatcher (True once queued), or
+    directly when EMAIL_DISPATCHER is off. Errors of a direct send propagate.
+    """
+    if ENABLED:
+        return _dispatcher.submit(message)
+    return _send_now(message)
+
+
+def get_stats():
+    """Get e-mail dispatcher counters of this process"""
+    stats = _dispatcher.get_stats()
+    stats['enabled'] = ENABLED
+    return stats
+
+
+atexit.register(_dispatcher.drain)
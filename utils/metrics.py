@@ -0,0 +1,360 @@
+import atexit
+import contextlib
+import fcntl
+import glob
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+# Each worker writes its snapshot here and /metrics sums them all ('' = this process only)
+METRICS_DIR = os.environ.get(
+    'METRICS_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'instance', 'metrics'))
+FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', '5'))
+# Gauges from snapshots older than this are ignored (their worker is gone or stuck)
+GAUGE_MAX_AGE = max(3 * FLUSH_INTERVAL, 15)
+# Counters and histograms of exited workers are folded into this file so their
+# snapshots can go before the pid is reused
+RETIRED_FILE = 'retired.json'
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+NOTIFICATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# name -> (type, help, buckets)
+_definitions = {}
+# (name, labels) -> float for counters and gauges, [per-bucket counts..., +Inf count, sum] for histograms
+_values = {}
+_collectors = []
+# Gauges every worker reads from the same shared state; merged with max() instead of summed
+_host_wide = set()
+_lock = threading.Lock()
+_owner_pid = [None]
+# Tells this process's snapshots apart from an earlier process with the same pid
+_process = {'pid': None, 'started': None, 'checked': False}
+
+
+def define(name, kind, help_text, buckets=None, host_wide=False):
+    """Declare a counter, gauge or histogram before recording into it"""
+    _definitions[name] = (kind, help_text, tuple(buckets) if buckets else None)
+    if host_wide:
+        _host_wide.add(name)
+
+
+define('http_requests_total', 'counter', 'HTTP requests by endpoint, method and status code')
+define('http_request_duration_seconds', 'histogram', 'Time spent handling HTTP requests', REQUEST_BUCKETS)
+define('http_requests_in_flight', 'gauge', 'HTTP requests currently being handled')
+define('notifications_total', 'counter', 'Notification sends by channel and outcome')
+define('notification_send_duration_seconds', 'histogram', 'Time spent calling notification providers',
+       NOTIFICATION_BUCKETS)
+
+
+def _key(name, labels):
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name, amount=1, **labels):
+    key = _key(name, labels)
+    with _lock:
+        _values[key] = _values.get(key, 0) + amount
+
+
+def set_gauge(name, value, **labels):
+    with _lock:
+        _values[_key(name, labels)] = value
+
+
+def observe(name, value, **labels):
+    buckets = _definitions[name][2]
+    key = _key(name, labels)
+    with _lock:
+        series = _values.get(key)
+        if series is None:
+            series = _values[key] = [0] * (len(buckets) + 2)
+        for i, bound in enumerate(buckets):
+            if value <= bound:
+                series[i] += 1
+                break
+        else:
+            series[len(buckets)] += 1
+        series[-1] += value
+
+
+def register_collector(func):
+    """Call func() before every snapshot, e.g. to set gauges from module state"""
+    _collectors.append(func)
+    return func
+
+
+def record_notification(channel, outcome, seconds=None):
+    """Count a notification send and, when it reached the provider, its latency"""
+    inc('notifications_total', channel=channel, outcome=outcome)
+    if seconds is not None:
+        observe('notification_send_duration_seconds', seconds, channel=channel)
+
+
+def _started():
+    pid = os.getpid()
+    if _process['pid'] != pid:
+        _process.update(pid=pid, started=time.time(), checked=False)
+    return _process['started']
+
+
+def snapshot():
+    for collector in _collectors:
+        try:
+            collector()
+        except Exception as e:
+            logger.error(f"Metrics collector {getattr(collector, '__name__', collector)} failed: {e}")
+    with _lock:
+        series = [[name, list(labels), list(value) if isinstance(value, list) else value]
+                  for (name, labels), value in _values.items()]
+    return {'pid': os.getpid(), 'started': _started(), 'time': time.time(), 'series': series}
+
+
+def _snapshot_path(pid):
+    return os.path.join(METRICS_DIR, f'{pid}.json')
+
+
+@contextlib.contextmanager
+def _retire_lock():
+    # Serializes folding snapshots into RETIRED_FILE across processes
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    with open(os.path.join(METRICS_DIR, '.lock'), 'a') as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _read(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write(path, data):
+    tmp = f'{path}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def _retire(path, data):
+    """Add the counters and histograms of an exited process to RETIRED_FILE and drop its snapshot (lock held)"""
+    retired_path = os.path.join(METRICS_DIR, RETIRED_FILE)
+    retired = _read(retired_path) or {'pid': None, 'time': 0, 'series': []}
+    # A zero time marks both as not live, so _merge leaves their gauges out
+    merged = _merge([dict(retired, time=0), dict(data, time=0)])
+    series = [[name, [list(pair) for pair in labels], value] for (name, labels), value in merged.items()]
+    _write(retired_path, {'pid': None, 'time': 0, 'series': series})
+    os.remove(path)
+
+
+def write_snapshot():
+    if not METRICS_DIR:
+        return
+    data = snapshot()
+    path = _snapshot_path(data['pid'])
+    try:
+        os.makedirs(METRICS_DIR, exist_ok=True)
+        if not _process['checked']:
+            # An earlier process with this pid left a snapshot: keep its totals before overwriting
+            with _retire_lock():
+                previous = _read(path)
+                if previous is not None and previous.get('started') != data['started']:
+                    _retire(path, previous)
+            _process['checked'] = True
+        _write(path, data)
+    except OSError as e:
+        logger.error(f"Could not write metrics snapshot {path}: {e}")
+
+
+def clear_snapshots():
+    """Remove snapshots of earlier runs (gunicorn calls this when the master starts)"""
+    if METRICS_DIR:
+        for path in glob.glob(os.path.join(METRICS_DIR, '*.json')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _load_snapshots():
+    """
+    This process's fresh snapshot, the latest one written by every other
+    live worker and the retired totals of the exited ones
+    """
+    own = snapshot()
+    snapshots = [own]
+    if not METRICS_DIR:
+        return snapshots
+    retired_path = os.path.join(METRICS_DIR, RETIRED_FILE)
+    try:
+        # Under the lock so a snapshot is never counted both in its file and in RETIRED_FILE
+        with _retire_lock():
+            for path in glob.glob(os.path.join(METRICS_DIR, '*.json')):
+                if path == retired_path:
+                    continue
+                data = _read(path)
+                if data is None:
+                    continue
+                pid = data.get('pid')
+                if not isinstance(pid, int):
+                    continue
+                if pid == own['pid'] and data.get('started') == own['started']:
+                    continue
+                if pid == own['pid'] or not _pid_alive(pid):
+                    _retire(path, data)
+                else:
+                    snapshots.append(data)
+            retired = _read(retired_path)
+    except OSError as e:
+        logger.error(f"Could not read metrics snapshots in {METRICS_DIR}: {e}")
+        return snapshots
+    if retired is not None:
+        snapshots.append(retired)
+    return snapshots
+
+
+def _merge(snapshots):
+    now = time.time()
+    merged = {}
+    for data in snapshots:
+        live = now - data.get('time', 0) <= GAUGE_MAX_AGE and _pid_alive(data.get('pid', 0))
+        for name, labels, value in data.get('series', ()):
+            definition = _definitions.get(name)
+            if definition is None:
+                continue
+            # Counters and histograms of exited workers still count; their gauges do not
+            if definition[0] == 'gauge' and not live:
+                continue
+            key = (name, tuple(tuple(pair) for pair in labels))
+            if isinstance(value, list):
+                current = merged.get(key)
+                merged[key] = value if current is None else [a + b for a, b in zip(current, value)]
+            elif name in _host_wide:
+                merged[key] = max(merged.get(key, value), value)
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render():
+    """All workers' metrics in the Prometheus text exposition format"""
+    merged = _merge(_load_snapshots())
+    lines = []
+    for name, (kind, help_text, buckets) in _definitions.items():
+        series = sorted((labels, value) for (series_name, labels), value in merged.items() if series_name == name)
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for labels, value in series:
+            if kind != 'histogram':
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets + (math.inf,), value):
+                cumulative += count
+                lines.append(f'{name}_bucket{_labels(labels + (("le", _number(bound)),))} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {_number(value[-1])}')
+            lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+def _flusher():
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        write_snapshot()
+
+
+def _ensure_flusher():
+    # Threads do not survive fork, so a preloaded master must not own the flusher
+    pid = os.getpid()
+    if _owner_pid[0] == pid or not METRICS_DIR:
+        return
+    with _lock:
+        if _owner_pid[0] == pid:
+            return
+        threading.Thread(target=_flusher, name='metrics-flusher', daemon=True).start()
+        _owner_pid[0] = pid
+
+
+def _before_request():
+    _ensure_flusher()
+    g.metrics_started = time.perf_counter()
+    inc('http_requests_in_flight', 1)
+
+
+def _record_request(status):
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+    # Unrouted paths share one label so scanners cannot blow up the series count
+    endpoint = request.endpoint or 'unmatched'
+    inc('http_requests_in_flight', -1)
+    inc('http_requests_total', endpoint=endpoint, method=request.method, status=status)
+    observe('http_request_duration_seconds', time.perf_counter() - started,
+            endpoint=endpoint, method=request.method)
+
+
+def _after_request(response):
+    _record_request(response.status_code)
+    return response
+
+
+def _teardown_request(exc):
+    # Only reached with the timer still set when after_request never ran
+    _record_request(500)
+
+
+def init_app(app):
+    """Time every request and keep the in-flight gauge"""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+
+def _final_snapshot():
+    # Only processes that served requests leave a snapshot behind
+    if _owner_pid[0] == os.getpid():
+        write_snapshot()
+
+
+atexit.register(_final_snapshot)
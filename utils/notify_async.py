@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import os
+import time
+
+from utils import async_http, mail
+from utils.notify_digest import get_aggregator
+
+logger = logging.getLogger(__name__)
+
+# Also e-mail each lead to SALES_EMAIL through Flask-Mail (off by default, as on the sync path)
+EMAIL_ENABLED = os.environ.get('NOTIFY_EMAIL', 'false').lower() in ['true', 'on', '1']
+SHUTDOWN_TIMEOUT = float(os.environ.get('NOTIFY_SHUTDOWN_TIMEOUT', '10'))
+# Leads notified at once per event loop; the rest wait their turn instead of
+# queueing inside the HTTP client's connection pool (and timing out there)
+CONCURRENCY = int(os.environ.get('NOTIFY_ASYNC_CONCURRENCY', '10'))
+
+_tasks = set()
+_semaphores = {}
+
+
+async def send_via_callmebot(message):
+    """Async version of utils.mail.send_via_callmebot"""
+    started = time.perf_counter()
+    try:
+        params = mail.callmebot_params(message)
+        if params is None or not mail.channel_available('callmebot'):
+            return False
+        started = time.perf_counter()
+        response = await async_http.get(mail.CALLMEBOT_API_URL, params=params)
+        return mail.callmebot_result(response, time.perf_counter() - started)
+    except Exception as e:
+        mail.channel_failed('callmebot', time.perf_counter() - started)
+        logger.error(f"CallMeBot API error: {e}")
+        return False
+
+
+async def send_via_whatsapp_business_api(message):
+    """Async version of utils.mail.send_via_whatsapp_business_api"""
+    started = time.perf_counter()
+    try:
+        request = mail.whatsapp_api_request(message)
+        if request is None or not mail.channel_available('whatsapp_api'):
+            return False
+        url, headers, data = request
+        started = time.perf_counter()
+        response = await async_http.post(url, headers=headers, json=data, read_timeout=10)
+        return mail.whatsapp_api_result(response, time.perf_counter() - started)
+    except Exception as e:
+        mail.channel_failed('whatsapp_api', time.perf_counter() - started)
+        logger.error(f"WhatsApp Business API error: {e}")
+        return False
+
+
+async def _whatsapp(lead_data):
+    # Same rate limit and digest buffer as the sync path; buffered leads go
+    # out with the next digest from the aggregator's flusher thread.
+    # admit() and record() write to the local_store SQLite file (and may wait
+    # on its lock), so like record_lead in asgi.py they run off the event loop
+    loop = asyncio.get_running_loop()
+    aggregator = get_aggregator()
+    if not await loop.run_in_executor(None, aggregator.admit, lead_data):
+        return True
+    message = aggregator.format_batch([lead_data])
+    ok = await send_via_callmebot(message)
+    # The Business API only stands in when CallMeBot failed, as in
+    # utils.mail.send_whatsapp_notification; the outbox is settled on either
+    if not ok and mail.whatsapp_api_configured():
+        ok = await send_via_whatsapp_business_api(message)
+    await loop.run_in_executor(None, aggregator.record, [lead_data], ok)
+    return ok
+
+
+def _send_email(lead_data):
+    from app import app
+    with app.app_context():
+        return mail.send_lead_notification(lead_data)
+
+
+async def notify_lead(lead_data):
+    """Notify sales about a lead over WhatsApp and, when enabled, e-mail at once"""
+    logger.info("New lead submission", extra={'lead_name': lead_data['name'], 'phone': lead_data['phone'],
+                                               'lead_id': lead_data.get('lead_id')})
+    channels = {'whatsapp': _whatsapp(lead_data)}
+    if EMAIL_ENABLED:
+        channels['email'] = asyncio.get_running_loop().run_in_executor(None, _send_email, lead_data)
+
+    results = await asyncio.gather(*channels.values(), return_exceptions=True)
+    for channel, result in zip(channels, results):
+        if isinstance(result, Exception):
+            logger.error(f"Notification channel {channel} failed: {result}")
+    return any(result is True for result in results)
+
+
+async def _notify_when_free(lead_data):
+    loop = asyncio.get_running_loop()
+    semaphore = _semaphores.get(loop)
+    if semaphore is None:
+        semaphore = _semaphores[loop] = asyncio.Semaphore(CONCURRENCY)
+    async with semaphore:
+        return await notify_lead(lead_data)
+
+
+def schedule(lead_data):
+    """Notify in the background of the running event loop and return immediately"""
+    task = asyncio.get_running_loop().create_task(_notify_when_free(lead_data))
+    # The loop only keeps weak references to tasks
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return task
+
+
+def pending():
+    return len(_tasks)
+
+
+async def drain(timeout=SHUTDOWN_TIMEOUT):
+    """Wait for scheduled notifications, up to timeout seconds"""
+    if not _tasks:
+        return True
+    done, still_pending = await asyncio.wait(set(_tasks), timeout=timeout)
+    if still_pending:
+        logger.warning(f"{len(still_pending)} notifications still pending at shutdown")
+    return not still_pending
@@ -0,0 +1,255 @@
+import atexit
+import collections
+import logging
+import os
+import threading
+import time
+
+from utils import local_store, outbox
+
+logger = logging.getLogger(__name__)
+
+# At most RATE_LIMIT WhatsApp messages per RATE_WINDOW seconds go upstream.
+# Leads arriving faster than that are buffered and sent as digests of up to
+# DIGEST_SIZE leads, at least every FLUSH_INTERVAL seconds.
+RATE_LIMIT = int(os.environ.get('NOTIFY_RATE_LIMIT', '6'))
+RATE_WINDOW = float(os.environ.get('NOTIFY_RATE_WINDOW', '60'))
+DIGEST_SIZE = int(os.environ.get('NOTIFY_DIGEST_SIZE', '10'))
+FLUSH_INTERVAL = float(os.environ.get('NOTIFY_DIGEST_FLUSH_INTERVAL', '30'))
+MAX_BUFFERED = int(os.environ.get('NOTIFY_DIGEST_MAX_BUFFERED', '500'))
+# sqlite: the rate limit counts the sends of every worker on the host through
+# utils.local_store (CallMeBot throttles the one WHATSAPP_NUMBER, not a
+# process); memory: per worker
+RATE_BACKEND = os.environ.get('NOTIFY_RATE_BACKEND', 'sqlite').lower()
+
+local_store.register_schema("""
+CREATE TABLE IF NOT EXISTS notify_sends (
+    key TEXT NOT NULL,
+    sent_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS notify_sends_key ON notify_sends (key, sent_at);
+""")
+
+
+class DigestAggregator:
+    """
+    Sends one message per lead while under the rate limit and switches to
+    digest messages while a burst lasts. With a rate_key the send times live
+    in the shared local_store table under that key, so the limit holds for
+    all workers together.
+    """
+
+    def __init__(self, send, format_single, format_digest, rate_limit=RATE_LIMIT,
+                 rate_window=RATE_WINDOW, digest_size=DIGEST_SIZE,
+                 flush_interval=FLUSH_INTERVAL, max_buffered=MAX_BUFFERED,
+                 rate_key=None, store_path=None):
+        self.send = send
+        self.format_single = format_single
+        self.format_digest = format_digest
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.digest_size = digest_size
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.rate_key = rate_key
+        self.store_path = store_path
+
+        self._sent_at = collections.deque()
+        self._buffer = collections.deque()
+        # Outbox ids of the buffered leads: a relay that claims one of them
+        # again must not buffer a second copy
+        self._held = set()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher_pid = None
+        self.stats = {
+            'submitted': 0,
+            'sent_single': 0,
+            'sent_digests': 0,
+            'coalesced': 0,
+            'dropped': 0,
+            'failed': 0,
+            'already_held': 0,
+            'rate_store_errors': 0,
+        }
+
+    def _take_shared_token(self):
+        # Same sliding window, over the rows of every process; at most
+        # rate_limit rows per key survive the DELETE
+        now = time.time()
+        with local_store.transaction(self.store_path) as conn:
+            conn.execute("DELETE FROM notify_sends WHERE key = ? AND sent_at <= ?",
+                         (self.rate_key, now - self.rate_window))
+            sent = conn.execute("SELECT COUNT(*) FROM notify_sends WHERE key = ?", (self.rate_key,)).fetchone()[0]
+            if sent >= self.rate_limit:
+                return False
+            conn.execute("INSERT INTO notify_sends (key, sent_at) VALUES (?, ?)", (self.rate_key, now))
+        return True
+
+    def _take_token(self):
+        if self.rate_key is not None:
+            try:
+                return self._take_shared_token()
+            except Exception as e:
+                # Keep limiting per worker while the shared store is unavailable
+                logger.error(f"Notification rate store error: {e}")
+                self.stats['rate_store_errors'] += 1
+        # Sliding window over the send times of the last rate_window seconds
+        now = time.monotonic()
+        while self._sent_at and now - self._sent_at[0] >= self.rate_window:
+            self._sent_at.popleft()
+        if len(self._sent_at) < self.rate_limit:
+            self._sent_at.append(now)
+            return True
+        return False
+
+    def _deliver(self, batch):
+        try:
+            ok = bool(self.send(self.format_batch(batch)))
+        except Exception as e:
+            logger.error(f"Notification send error: {e}")
+            ok = False
+        self.record(batch, ok)
+        return ok
+
+    def format_batch(self, batch):
+        if len(batch) == 1:
+            return self.format_single(batch[0])
+        return self.format_digest(batch)
+
+    def record(self, batch, ok):
+        """Count the outcome of sending a batch (for callers that send admitted leads themselves)"""
+        with self._lock:
+            if not ok:
+                self.stats['failed'] += len(batch)
+            elif len(batch) == 1:
+                self.stats['sent_single'] += 1
+            else:
+                self.stats['sent_digests'] += 1
+                self.stats['coalesced'] += len(batch)
+        # Delivered leads leave the outbox; failed ones are retried from it with backoff
+        outbox.record_result(batch, ok)
+        if not ok:
+            lead_ids = ', '.join(lead_data.get('lead_id') or lead_data['phone'] for lead_data in batch)
+            logger.error(f"WhatsApp notification failed for {len(batch)} lead(s): {lead_ids}")
+
+    def admit(self, lead_data):
+        """
+        Take a rate token for the lead and return True if the caller should send it now;
+        otherwise buffer it for the next digest and return False
+        """
+        outbox_id = lead_data.get('outbox_id')
+        with self._lock:
+            if outbox_id is not None and outbox_id in self._held:
+                self.stats['already_held'] += 1
+                return False
+            self.stats['submitted'] += 1
+            # Once a burst has started, keep ordering by queueing behind it
+            if not self._buffer and self._take_token():
+                return True
+            self._buffer.append(lead_data)
+            if outbox_id is not None:
+                self._held.add(outbox_id)
+            if len(self._buffer) > self.max_buffered:
+                dropped = self._buffer.popleft()
+                self._held.discard(dropped.get('outbox_id'))
+                self.stats['dropped'] += 1
+                logger.error(f"Digest buffer full, dropped notification for {dropped.get('lead_id') or dropped['phone']}"
+                             " (the outbox retries it once its lease runs out)")
+            full = len(self._buffer) >= self.digest_size
+
+        self._ensure_flusher()
+        if full:
+            self._wakeup.set()
+        return False
+
+    def submit(self, lead_data):
+        """Send a lead right away if the rate allows, otherwise buffer it for the next digest"""
+        if self.admit(lead_data):
+            return self._deliver([lead_data])
+        return True
+
+    def flush(self, ignore_rate=False):
+        """Send buffered leads as digests for as long as the rate allows"""
+        while True:
+            with self._lock:
+                if not self._buffer or not (ignore_rate or self._take_token()):
+                    return
+                batch = [self._buffer.popleft() for _ in range(min(self.digest_size, len(self._buffer)))]
+            self._deliver(batch)
+            with self._lock:
+                self._held.difference_update(lead_data.get('outbox_id') for lead_data in batch)
+
+    def _renew_leases(self):
+        # Keep the outbox relays from claiming buffered leads again while a
+        # long burst drains (MAX_BUFFERED leads take minutes at RATE_LIMIT)
+        with self._lock:
+            held = list(self._held)
+        if not held:
+            return
+        try:
+            outbox.renew(held)
+        except Exception as e:
+            logger.error(f"Outbox lease renewal error: {e}")
+
+    def _flusher(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+            self._renew_leases()
+
+    def _ensure_flusher(self):
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        with self._lock:
+            if self._flusher_pid != pid:
+                threading.Thread(target=self._flusher, name='notify-digest', daemon=True).start()
+                self._flusher_pid = pid
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['buffered'] = len(self._buffer)
+        return stats
+
+
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+
+def get_aggregator():
+    """Get the process-wide aggregator sending through CallMeBot"""
+    global _aggregator
+    if _aggregator is None:
+        with _aggregator_lock:
+            if _aggregator is None:
+                from utils.mail import send_via_callmebot, format_lead_message, format_digest_message
+                _aggregator = DigestAggregator(send_via_callmebot, format_lead_message, format_digest_message,
+                                               rate_key='callmebot' if RATE_BACKEND == 'sqlite' else None)
+    return _aggregator
+
+
+def notify_lead(lead_data):
+    """Notify sales about a lead, coalescing into digests during bursts"""
+    logger.info("New lead submission", extra={'lead_name': lead_data['name'], 'phone': lead_data['phone'],
+                                               'lead_id': lead_data.get('lead_id')})
+    return get_aggregator().submit(lead_data)
+
+
+def get_stats():
+    """Get coalescing counters (all zero until the first lead)"""
+    if _aggregator is None:
+        return {'submitted': 0, 'sent_single': 0, 'sent_digests': 0, 'coalesced': 0,
+                'dropped': 0, 'failed': 0, 'already_held': 0, 'rate_store_errors': 0, 'buffered': 0}
+    return _aggregator.get_stats()
+
+
+@atexit.register
+def _flush_at_exit():
+    if _aggregator is not None:
+        # Let queued submissions reach the buffer before the final digest
+        from utils import notify_queue
+        notify_queue.drain()
+        _aggregator.flush(ignore_rate=True)
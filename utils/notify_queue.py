@@ -0,0 +1,130 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Number of background threads delivering notifications (0 = send inline)
+WORKERS = int(os.environ.get('NOTIFY_WORKERS', '2'))
+MAX_PENDING = int(os.environ.get('NOTIFY_MAX_PENDING', '1000'))
+# Seconds a stopping worker process waits for queued notifications to go out
+SHUTDOWN_TIMEOUT = float(os.environ.get('NOTIFY_SHUTDOWN_TIMEOUT', '10'))
+
+_queue = queue.Queue(maxsize=MAX_PENDING)
+_lock = threading.Lock()
+_threads = []
+_owner_pid = [None]
+
+_stats = {
+    'enqueued': 0,
+    'completed': 0,
+    'failed': 0,
+    'overflow': 0,
+    'in_progress': 0,
+    'wait_seconds_total': 0.0,
+    'wait_seconds_max': 0.0,
+    'send_seconds_total': 0.0,
+    'send_seconds_max': 0.0,
+}
+
+
+def _record(started, finished, enqueued_at, ok):
+    wait = started - enqueued_at
+    send = finished - started
+    with _lock:
+        _stats['in_progress'] -= 1
+        _stats['completed' if ok else 'failed'] += 1
+        _stats['wait_seconds_total'] += wait
+        _stats['wait_seconds_max'] = max(_stats['wait_seconds_max'], wait)
+        _stats['send_seconds_total'] += send
+        _stats['send_seconds_max'] = max(_stats['send_seconds_max'], send)
+
+
+def _run(func, args, enqueued_at):
+    started = time.monotonic()
+    with _lock:
+        _stats['in_progress'] += 1
+    ok = False
+    try:
+        ok = func(*args) is not False
+    except Exception as e:
+        logger.error(f"Notification worker error in {getattr(func, '__name__', func)}: {e}")
+    _record(started, time.monotonic(), enqueued_at, ok)
+
+
+def _worker():
+    while True:
+        func, args, enqueued_at = _queue.get()
+        try:
+            _run(func, args, enqueued_at)
+        finally:
+            _queue.task_done()
+
+
+def _ensure_workers():
+    # Threads do not survive fork, so a preloaded master must not own them
+    pid = os.getpid()
+    if _owner_pid[0] == pid:
+        return
+    with _lock:
+        if _owner_pid[0] == pid:
+            return
+        _threads.clear()
+        for i in range(WORKERS):
+            thread = threading.Thread(target=_worker, name=f'notify-worker-{i}', daemon=True)
+            thread.start()
+            _threads.append(thread)
+        _owner_pid[0] = pid
+
+
+def enqueue(func, *args):
+    """
+    Run func(*args) on the notification thread pool and return immediately.
+    Falls back to calling it inline when the pool is disabled or full,
+    so a lead is never dropped just because the queue is busy.
+    """
+    enqueued_at = time.monotonic()
+    with _lock:
+        _stats['enqueued'] += 1
+
+    if WORKERS > 0:
+        _ensure_workers()
+        try:
+            _queue.put_nowait((func, args, enqueued_at))
+            return True
+        except queue.Full:
+            with _lock:
+                _stats['overflow'] += 1
+            logger.warning("Notification queue full, sending inline")
+
+    _run(func, args, enqueued_at)
+    return False
+
+
+def get_stats():
+    """Get queue depth and latency counters"""
+    with _lock:
+        stats = dict(_stats)
+    stats['depth'] = _queue.qsize()
+    stats['workers'] = len(_threads) if _owner_pid[0] == os.getpid() else 0
+    finished = stats['completed'] + stats['failed']
+    stats['wait_seconds_avg'] = stats['wait_seconds_total'] / finished if finished else 0.0
+    stats['send_seconds_avg'] = stats['send_seconds_total'] / finished if finished else 0.0
+    return stats
+
+
+def drain(timeout=SHUTDOWN_TIMEOUT):
+    """Wait until queued notifications are sent, up to timeout seconds"""
+    deadline = time.monotonic() + timeout
+    while _queue.unfinished_tasks and _owner_pid[0] == os.getpid():
+        if time.monotonic() >= deadline:
+            logger.warning(f"{_queue.unfinished_tasks} notifications still pending at shutdown")
+            return False
+        time.sleep(0.05)
+    return True
+
+
+atexit.register(drain)
@@ -0,0 +1,272 @@
+"""
+Message templates for every notification channel, prepared once per
+channel and language.
+
+A template is plain text with {field} placeholders, turned into a
+%-format once when it is registered; rendering reads the fields straight
+from a lead_data dict (see utils/leads.py) without copying it. lead_data
+already holds Turkish values ("Belirtilmedi", "Evet"...), so Turkish
+templates use them as they are; other languages swap them for their own
+through one small lookup table per field. Every channel shows a lead the
+same way. Rendering still costs a little more than the inline f-strings
+it replaced (see benchmarks/bench_templates.py); the registry is there for
+consistency, not speed. Attribute-style lead records of the old database
+model are converted to lead_data first.
+"""
+
+import operator
+import string
+
+# Fields shown as they are
+REQUIRED_FIELDS = ('name', 'phone', 'language', 'ip_address', 'timestamp')
+OPTIONAL_FIELDS = ('email', 'unit_interest', 'budget_range', 'timeline', 'best_call_time',
+                   'utm_source', 'utm_medium', 'utm_campaign')
+CONSENT_FIELDS = ('whatsapp_optin', 'marketing_consent')
+
+LOCALES = {
+    'tr': {
+        'missing': {
+            'email': 'Belirtilmedi', 'unit_interest': 'Belirtilmedi', 'budget_range': 'Belirtilmedi',
+            'timeline': 'Belirtilmedi', 'best_call_time': 'Belirtilmedi',
+            'utm_source': 'Direkt', 'utm_medium': 'Yok', 'utm_campaign': 'Yok',
+        },
+        'yes': 'Evet',
+        'no': 'Hayir',
+    },
+    'en': {
+        'missing': {
+            'email': 'Not provided', 'unit_interest': 'Not specified', 'budget_range': 'Not specified',
+            'timeline': 'Not specified', 'best_call_time': 'Not specified',
+            'utm_source': 'Direct', 'utm_medium': 'None', 'utm_campaign': 'None',
+        },
+        'yes': 'Yes',
+        'no': 'No',
+    },
+}
+# What utils/leads.py stores for missing fields and consents
+LEAD_PLACEHOLDERS = LOCALES['tr']['missing']
+LEAD_YES, LEAD_NO = LOCALES['tr']['yes'], LOCALES['tr']['no']
+# Arabic templates only use the name, so English placeholders are fine there
+LOCALES['ar'] = LOCALES['en']
+
+
+def _getter(fields):
+    # operator.itemgetter, always returning a tuple
+    if not fields:
+        return lambda lead_data: ()
+    if len(fields) == 1:
+        field, = fields
+        return lambda lead_data: (lead_data[field],)
+    return operator.itemgetter(*fields)
+
+
+class MessageTemplate:
+    """
+    Text with {field} placeholders prepared for one language. render(lead)
+    takes a lead_data dict; fields that are not lead fields (e.g. {count})
+    are further arguments of render(), in template order.
+    """
+
+    __slots__ = ('text', 'language', 'fields', 'extras', '_format', '_values', '_translations', '_order')
+
+    def __init__(self, text, language):
+        self.text = text
+        self.language = language
+        locale = LOCALES.get(language, LOCALES['en'])
+        yes_no = {LEAD_YES: locale['yes'], LEAD_NO: locale['no']}
+
+        # The text as a %-format with one %s per placeholder. Lead fields are
+        # read straight from lead_data with one itemgetter call, no copy.
+        pieces = []
+        fields = []
+        lead_fields = []
+        extras = []
+        # (index in lead_fields, {lead_data value: shown value}) for the
+        # fields this language shows differently from the Turkish lead_data
+        translations = []
+        # Per placeholder: (is an extra, index into the extras or lead_fields)
+        order = []
+        for literal, field, spec, conversion in string.Formatter().parse(text):
+            pieces.append(literal.replace('%', '%%'))
+            if field is None:
+                continue
+            if spec or conversion:
+                raise ValueError(f"Format specs are not supported in templates: {{{field}}}")
+            pieces.append('%s')
+            fields.append(field)
+            if field in OPTIONAL_FIELDS:
+                if locale['missing'][field] != LEAD_PLACEHOLDERS[field]:
+                    translations.append((len(lead_fields), {LEAD_PLACEHOLDERS[field]: locale['missing'][field]}))
+            elif field in CONSENT_FIELDS:
+                if (locale['yes'], locale['no']) != (LEAD_YES, LEAD_NO):
+                    translations.append((len(lead_fields), yes_no))
+            elif field not in REQUIRED_FIELDS:
+                if not field.isidentifier():
+                    raise ValueError(f"Invalid template field: {{{field}}}")
+                if field not in extras:
+                    extras.append(field)
+                order.append((True, extras.index(field)))
+                continue
+            order.append((False, len(lead_fields)))
+            lead_fields.append(field)
+
+        self.fields = tuple(fields)
+        self.extras = tuple(extras)
+        self._format = ''.join(pieces)
+        self._values = _getter(lead_fields)
+        self._translations = tuple(translations)
+        # Extras used once each, ahead of every lead field (digest items,
+        # headers), go in front of the lead values; elsewhere they are merged
+        # placeholder by placeholder
+        extras_first = order == [(True, index) for index in range(len(extras))] + order[len(extras):] \
+            and len(order) == len(extras) + len(lead_fields)
+        self._order = None if extras_first else tuple(order)
+
+    def render(self, lead_data, *args, **kwargs):
+        """The message for lead_data, with extra fields given by position or name"""
+        values = self._values(lead_data)
+        if self._translations:
+            values = list(values)
+            for index, mapping in self._translations:
+                value = values[index]
+                values[index] = mapping.get(value, value)
+            values = tuple(values)
+        if self.extras:
+            if len(args) == len(self.extras):
+                extra_values = args
+            else:
+                extra_values = args + tuple(kwargs.get(name) for name in self.extras[len(args):])
+            if self._order is None:
+                values = extra_values + values
+            else:
+                values = tuple(extra_values[index] if is_extra else values[index] for is_extra, index in self._order)
+        return self._format % values
+
+
+# (channel, language) -> MessageTemplate, and each channel's default language
+_templates = {}
+_fallback = {}
+
+
+def register(channel, texts, fallback):
+    """Compile texts ({language: text}) for a channel"""
+    for language, text in texts.items():
+        _templates[channel, language] = MessageTemplate(text, language)
+    _fallback[channel] = fallback
+
+
+def get_template(channel, language=None):
+    """A channel's template in language, or in the channel's default language"""
+    template = _templates.get((channel, language))
+    return template if template is not None else _templates[channel, _fallback[channel]]
+
+
+def _as_lead_data(lead):
+    # Attribute-style lead record: None for missing fields, booleans for consents
+    lead_data = {name: getattr(lead, name, None) for name in REQUIRED_FIELDS if name != 'timestamp'}
+    lead_data['timestamp'] = lead.created_at
+    lead_data.update((name, getattr(lead, name, None) or LEAD_PLACEHOLDERS[name]) for name in OPTIONAL_FIELDS)
+    lead_data.update((name, LEAD_YES if getattr(lead, name, False) else LEAD_NO) for name in CONSENT_FIELDS)
+    return lead_data
+
+
+def render(channel, lead, language=None):
+    """Render a channel's message for a lead (lead_data dict or attribute-style lead)"""
+    template = _templates.get((channel, language)) or _templates[channel, _fallback[channel]]
+    return template.render(lead if isinstance(lead, dict) else _as_lead_data(lead))
+
+
+def render_digest(leads, language='tr'):
+    """One WhatsApp message summarising several leads"""
+    item = get_template('whatsapp_digest_item', language).render
+    parts = [item(lead if isinstance(lead, dict) else _as_lead_data(lead), number)
+             for number, lead in enumerate(leads, 1)]
+    return '\n'.join((get_template('whatsapp_digest_header', language).render({}, count=len(leads)),
+                      *parts, get_template('whatsapp_digest_footer', language).render({})))
+
+
+# WhatsApp message to the sales team (Turkish, ASCII only to avoid encoding issues)
+register('whatsapp', {'tr': """YENI MUSTERI BASVURUSU - Beylerbeyi Residences
+
+Isim: {name}
+Telefon: {phone}
+Email: {email}
+Dil: {language}
+Ilgilendigi Unite: {unit_interest}
+Butce: {budget_range}
+Zaman Cizelgesi: {timeline}
+En Iyi Arama Saati: {best_call_time}
+WhatsApp Izni: {whatsapp_optin}
+Pazarlama Izni: {marketing_consent}
+
+UTM Bilgileri:
+- Kaynak: {utm_source}
+- Medium: {utm_medium}
+- Kampanya: {utm_campaign}
+
+Tarih: {timestamp}
+IP: {ip_address}
+
+Lutfen musteriyle en kisa surede iletisime gecin!"""}, fallback='tr')
+
+register('whatsapp_digest_header', {'tr': "YENI MUSTERI BASVURULARI ({count}) - Beylerbeyi Residences\n"},
+         fallback='tr')
+register('whatsapp_digest_item', {'tr': """{number}) {name} - {phone}
+   Unite: {unit_interest} | Butce: {budget_range} | Kaynak: {utm_source}
+   Tarih: {timestamp}"""}, fallback='tr')
+register('whatsapp_digest_footer', {'tr': "\nLutfen musterilerle en kisa surede iletisime gecin!"}, fallback='tr')
+
+# E-mail to the sales team
+register('email_subject', {'en': "New Lead: {name} - Beylerbeyi Residences"}, fallback='en')
+register('email', {'en': """
+New lead received for Beylerbeyi Bosphorus Residences:
+
+Name: {name}
+Phone: {phone}
+Email: {email}
+Language: {language}
+Unit Interest: {unit_interest}
+Budget Range: {budget_range}
+Timeline: {timeline}
+Best Call Time: {best_call_time}
+WhatsApp Opt-in: {whatsapp_optin}
+Marketing Consent: {marketing_consent}
+
+UTM Data:
+Source: {utm_source}
+Medium: {utm_medium}
+Campaign: {utm_campaign}
+
+Submitted: {timestamp}
+IP: {ip_address}
+        """}, fallback='en')
+
+# Auto-reply to the lead, in the lead's language
+register('auto_reply_subject', {
+    'tr': 'Beylerbeyi Boğaz Rezidansları - Bilgileriniz Alındı',
+    'en': 'Beylerbeyi Bosphorus Residences - Information Received',
+    'ar': 'مساكن بوسفور بييلربيي - تم استلام معلوماتك',
+}, fallback='en')
+register('auto_reply', {
+    'tr': """
+Sayın {name},
+
+Beylerbeyi Boğaz Rezidansları ile ilgili gösterdiğiniz ilgi için teşekkür ederiz. Uzmanlarımız en kısa sürede sizinle iletişime geçecektir.
+
+Beylerbeyi Boğaz Rezidansları Satış Ekibi
+        """,
+    'en': """
+Dear {name},
+
+Thank you for your interest in Beylerbeyi Bosphorus Residences. Our specialists will contact you shortly.
+
+Beylerbeyi Bosphorus Residences Sales Team
+        """,
+    'ar': """
+عزيزي {name}،
+
+شكراً لك على اهتمامك بمساكن بوسفور بييلربيي. سيتواصل معك فريق الخبراء لدينا قريباً.
+
+فريق مبيعات مساكن بوسفور بييلربيي
+        """,
+}, fallback='en')
@@ -0,0 +1,333 @@
+"""
+Crash-safe outbox of lead notifications (SQLite, via utils.local_store).
+
+record_lead() adds a row for every new lead before its notification is
+queued, and the row is deleted once the WhatsApp message went out. Sends
+that fail are retried with jittered exponential backoff by a relay thread
+in each worker; rows still pending after a crash are picked up once their
+lease runs out. Leads that exhaust OUTBOX_MAX_ATTEMPTS move to a
+dead-letter table.
+
+Usage from the command line:
+    python -m utils.outbox status
+    python -m utils.outbox dead
+    python -m utils.outbox replay [--id <id> ...] [--send]
+"""
+
+import json
+import logging
+import os
+import random
+import threading
+import time
+
+from utils import local_store
+from utils.metrics import define, observe, set_gauge, register_collector
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get('NOTIFY_OUTBOX', 'true').lower() in ['true', 'on', '1']
+MAX_ATTEMPTS = int(os.environ.get('OUTBOX_MAX_ATTEMPTS', '8'))
+# Retry n waits about RETRY_BASE * 2**(n-1) seconds (between half and all of it), at most RETRY_MAX_DELAY
+RETRY_BASE = float(os.environ.get('OUTBOX_RETRY_BASE', '30'))
+RETRY_MAX_DELAY = float(os.environ.get('OUTBOX_RETRY_MAX_DELAY', '3600'))
+# Seconds a row belongs to whoever is sending it (the request's own queue or
+# a relay). Rows waiting in a digest buffer have their lease renewed by the
+# buffer's flusher (renew()), so the lease only has to outlast one send.
+LEASE = float(os.environ.get('OUTBOX_LEASE', '300'))
+POLL_INTERVAL = float(os.environ.get('OUTBOX_POLL_INTERVAL', '10'))
+BATCH_SIZE = int(os.environ.get('OUTBOX_BATCH_SIZE', '20'))
+
+DELIVERY_BUCKETS = (1, 5, 15, 30, 60, 300, 900, 3600, 21600, 86400)
+
+define('notification_delivery_seconds', 'histogram', 'Time from lead submission to delivered notification',
+       DELIVERY_BUCKETS)
+define('notification_outbox_pending', 'gauge', 'Lead notifications waiting in the outbox', host_wide=True)
+define('notification_outbox_dead', 'gauge', 'Lead notifications in the dead-letter table', host_wide=True)
+define('notification_outbox_oldest_seconds', 'gauge', 'Age of the oldest pending lead notification',
+       host_wide=True)
+
+local_store.register_schema("""
+CREATE TABLE IF NOT EXISTS outbox (
+    -- AUTOINCREMENT: an id is never handed out twice, even once the outbox ran empty
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    lead_id TEXT,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    next_attempt REAL NOT NULL,
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS outbox_next_attempt ON outbox (next_attempt);
+CREATE TABLE IF NOT EXISTS outbox_dead (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    outbox_id INTEGER,
+    lead_id TEXT,
+    payload TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    created REAL NOT NULL,
+    failed_at REAL NOT NULL,
+    last_error TEXT
+);
+""")
+
+_lock = threading.Lock()
+_relay_pid = [None]
+_stats = {'added': 0, 'delivered': 0, 'retries_scheduled': 0, 'dead_lettered': 0, 'relayed': 0, 'errors': 0}
+
+
+def _count(key, amount=1):
+    with _lock:
+        _stats[key] += amount
+
+
+def retry_delay(attempts):
+    """Seconds to wait after the given number of failed attempts (equal jitter)"""
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE * 2 ** (attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def add(lead_data):
+    """Store a lead's pending notification and return its outbox id (None when disabled)"""
+    if not ENABLED:
+        return None
+    now = time.time()
+    payload = json.dumps(lead_data, ensure_ascii=False, separators=(',', ':'))
+    with local_store.transaction() as conn:
+        outbox_id = conn.execute(
+            "INSERT INTO outbox (lead_id, payload, created, next_attempt) VALUES (?, ?, ?, ?)",
+            (lead_data.get('lead_id'), payload, now, now + LEASE),
+        ).lastrowid
+    _count('added')
+    ensure_relay()
+    return outbox_id
+
+
+def _in(ids):
+    return ','.join('?' * len(ids))
+
+
+def delivered(ids):
+    """Drop delivered rows and record how long their leads waited"""
+    now = time.time()
+    with local_store.transaction() as conn:
+        rows = conn.execute(f"SELECT created FROM outbox WHERE id IN ({_in(ids)})", ids).fetchall()
+        conn.execute(f"DELETE FROM outbox WHERE id IN ({_in(ids)})", ids)
+    for (created,) in rows:
+        observe('notification_delivery_seconds', now - created)
+    _count('delivered', len(rows))
+
+
+def renew(ids):
+    """Extend the lease of rows that are still held for sending (e.g. in a digest buffer)"""
+    if not ids:
+        return
+    with local_store.transaction() as conn:
+        conn.execute(f"UPDATE outbox SET next_attempt = MAX(next_attempt, ?) WHERE id IN ({_in(ids)})",
+                     (time.time() + LEASE, *ids))
+
+
+def failed(ids, error):
+    """Schedule another attempt for each row, or move it to the dead-letter table"""
+    now = time.time()
+    dead = []
+    with local_store.transaction() as conn:
+        rows = conn.execute(f"SELECT id, attempts FROM outbox WHERE id IN ({_in(ids)})", ids).fetchall()
+        for outbox_id, attempts in rows:
+            attempts += 1
+            if attempts >= MAX_ATTEMPTS:
+                conn.execute(
+                    "INSERT INTO outbox_dead (outbox_id, lead_id, payload, attempts, created, failed_at, last_error) "
+                    "SELECT id, lead_id, payload, ?, created, ?, ? FROM outbox WHERE id = ?",
+                    (attempts, now, error, outbox_id))
+                conn.execute("DELETE FROM outbox WHERE id = ?", (outbox_id,))
+                dead.append(outbox_id)
+            else:
+                conn.execute("UPDATE outbox SET attempts = ?, next_attempt = ?, last_error = ? WHERE id = ?",
+                             (attempts, now + retry_delay(attempts), error, outbox_id))
+    if dead:
+        logger.error(f"Lead notifications moved to the dead-letter table after {MAX_ATTEMPTS} attempts: "
+                     f"{', '.join(map(str, dead))} (python -m utils.outbox replay)")
+    _count('dead_lettered', len(dead))
+    _count('retries_scheduled', len(rows) - len(dead))
+
+
+def record_result(batch, ok, error='send failed'):
+    """Settle the outbox rows of a sent batch of lead_data dicts; errors are logged, not raised"""
+    ids = [lead_data['outbox_id'] for lead_data in batch if lead_data.get('outbox_id')]
+    if not ids:
+        return
+    try:
+        if ok:
+            delivered(ids)
+        else:
+            failed(ids, error)
+    except Exception as e:
+        _count('errors')
+        logger.error(f"Outbox update error: {e}")
+
+
+def claim_due(limit=BATCH_SIZE, now=None):
+    """Lease up to limit rows whose next attempt is due and return them as lead_data dicts"""
+    now = time.time() if now is None else now
+    with local_store.transaction() as conn:
+        rows = conn.execute("SELECT id, payload FROM outbox WHERE next_attempt <= ? ORDER BY next_attempt LIMIT ?",
+                            (now, limit)).fetchall()
+        conn.executemany("UPDATE outbox SET next_attempt = ? WHERE id = ?", [(now + LEASE, row[0]) for row in rows])
+    leads = []
+    for outbox_id, payload in rows:
+        lead_data = json.loads(payload)
+        lead_data['outbox_id'] = outbox_id
+        leads.append(lead_data)
+    return leads
+
+
+def relay_due():
+    """Hand due rows to the WhatsApp aggregator (rate limit, digests and breaker included)"""
+    from utils.notify_digest import get_aggregator
+
+    leads = claim_due()
+    aggregator = get_aggregator()
+    for lead_data in leads:
+        aggregator.submit(lead_data)
+    _count('relayed', len(leads))
+    return len(leads)
+
+
+def _relay():
+    while True:
+        time.sleep(POLL_INTERVAL)
+        try:
+            # Keep going while full batches come back
+            while relay_due() >= BATCH_SIZE:
+                pass
+        except Exception as e:
+            _count('errors')
+            logger.error(f"Outbox relay error: {e}")
+
+
+def ensure_relay():
+    """Start this process's relay thread (threads do not survive fork)"""
+    if not ENABLED:
+        return
+    pid = os.getpid()
+    if _relay_pid[0] == pid:
+        return
+    with _lock:
+        if _relay_pid[0] != pid:
+            threading.Thread(target=_relay, name='notify-outbox', daemon=True).start()
+            _relay_pid[0] = pid
+
+
+def init_app(app):
+    """Start the relay with the first request, so a restarted worker resumes pending rows"""
+    app.before_request(ensure_relay)
+
+
+def backlog(now=None):
+    now = time.time() if now is None else now
+    conn = local_store.connect()
+    pending, oldest, due = conn.execute(
+        "SELECT COUNT(*), MIN(created), SUM(next_attempt <= ?) FROM outbox", (now,)).fetchone()
+    dead = conn.execute("SELECT COUNT(*) FROM outbox_dead").fetchone()[0]
+    return {
+        'pending': pending,
+        'due': due or 0,
+        'dead': dead,
+        'oldest_seconds': round(now - oldest, 1) if oldest else 0.0,
+    }
+
+
+def get_stats():
+    """Get outbox counters of this process and the host-wide backlog"""
+    with _lock:
+        stats = dict(_stats)
+    stats['enabled'] = ENABLED
+    if ENABLED:
+        try:
+            stats.update(backlog())
+        except Exception as e:
+            stats['backlog_error'] = str(e)
+    return stats
+
+
+@register_collector
+def _collect():
+    if not ENABLED:
+        return
+    current = backlog()
+    set_gauge('notification_outbox_pending', current['pending'])
+    set_gauge('notification_outbox_dead', current['dead'])
+    set_gauge('notification_outbox_oldest_seconds', current['oldest_seconds'])
+
+
+def _status(args):
+    for key, value in backlog().items():
+        print(f"{key}: {value}")
+
+
+def replay(dead_ids=None, claim=False):
+    """
+    Move dead letters (all, or the given dead-letter ids) back to the outbox
+    under new outbox ids, with their attempts reset. With claim=True the rows
+    are leased to the caller; returns them as lead_data dicts.
+    """
+    with local_store.transaction() as conn:
+        where = f"WHERE id IN ({_in(dead_ids)})" if dead_ids else ""
+        rows = conn.execute(f"SELECT id, lead_id, payload, created FROM outbox_dead {where} ORDER BY id",
+                            dead_ids or ()).fetchall()
+        now = time.time()
+        leads = []
+        for dead_id, lead_id, payload, created in rows:
+            outbox_id = conn.execute(
+                "INSERT INTO outbox (lead_id, payload, created, next_attempt) VALUES (?, ?, ?, ?)",
+                (lead_id, payload, created, now + LEASE if claim else now),
+            ).lastrowid
+            conn.execute("DELETE FROM outbox_dead WHERE id = ?", (dead_id,))
+            lead_data = json.loads(payload)
+            lead_data['outbox_id'] = outbox_id
+            leads.append(lead_data)
+    return leads
+
+
+def _dead(args):
+    conn = local_store.connect()
+    for dead_id, outbox_id, lead_id, attempts, failed_at, error in conn.execute(
+            "SELECT id, outbox_id, lead_id, attempts, failed_at, last_error FROM outbox_dead ORDER BY id"):
+        failed_on = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(failed_at))
+        print(f"{dead_id} outbox={outbox_id} lead={lead_id} attempts={attempts} failed_at={failed_on} error={error}")
+
+
+def _replay(args):
+    leads = replay(args.id, claim=args.send)
+    if not args.send:
+        print(f"{len(leads)} notification(s) queued for the running workers")
+        return
+
+    from utils.mail import send_whatsapp_notification_simple
+    for lead_data in leads:
+        ok = send_whatsapp_notification_simple(lead_data)
+        record_result([lead_data], ok)
+        print(f"{lead_data['outbox_id']} {lead_data.get('lead_id')} {'sent' if ok else 'FAILED'}")
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Inspect the notification outbox and replay dead letters')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('status', help='pending, due and dead-lettered counts').set_defaults(func=_status)
+    sub.add_parser('dead', help='list dead-lettered notifications').set_defaults(func=_dead)
+
+    replay_parser = sub.add_parser('replay', help='move dead-lettered notifications back to the outbox')
+    replay_parser.add_argument('--id', type=int, action='append',
+                               help='dead-letter id to replay, as listed by `dead` (repeatable, default all)')
+    replay_parser.add_argument('--send', action='store_true', help='send them from this process instead of the workers')
+    replay_parser.set_defaults(func=_replay)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+import functools
+import json
+import logging
+import math
+import os
+import threading
+import time
+
+from flask import request
+from werkzeug.wrappers import Response
+
+from utils import local_store
+from utils.metrics import define, inc
+from utils.validation import get_validation_error_message
+
+logger = logging.getLogger(__name__)
+
+# Token buckets per client IP: a rule "capacity/period" allows bursts of
+# `capacity` requests and refills at capacity/period tokens per second.
+ENABLED = os.environ.get('RATE_LIMIT', 'true').lower() in ['true', 'on', '1']
+# sqlite: buckets shared by all workers through utils.local_store; memory: per worker
+BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'sqlite').lower()
+SHARDS = int(os.environ.get('RATE_LIMIT_SHARDS', '16'))
+# Buckets kept per memory shard; the least recently used go first once full
+MAX_KEYS_PER_SHARD = int(os.environ.get('RATE_LIMIT_MAX_KEYS_PER_SHARD', '4096'))
+# Acquires between sweeps of refilled buckets from the shared table
+PRUNE_EVERY = int(os.environ.get('RATE_LIMIT_PRUNE_EVERY', '1000'))
+
+
+def parse_rule(value):
+    """'10/60' -> (10.0, 60.0)"""
+    capacity, period = value.split('/')
+    return float(capacity), float(period)
+
+
+RULES = {
+    'leads': parse_rule(os.environ.get('RATE_LIMIT_LEADS', '10/60')),
+    'admin': parse_rule(os.environ.get('RATE_LIMIT_ADMIN', '3/60')),
+}
+
+define('rate_limited_total', 'counter', 'Requests rejected by the rate limiter by rule')
+
+local_store.register_schema("""
+CREATE TABLE IF NOT EXISTS rate_limit (
+    key TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL,
+    full_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rate_limit_full_at ON rate_limit (full_at);
+""")
+
+
+def _take(tokens, updated, capacity, rate, now):
+    # Refill, then take a token if there is one: (tokens left, seconds until one is available)
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate)
+    if tokens >= 1:
+        return tokens - 1, 0.0
+    return tokens, (1 - tokens) / rate
+
+
+class _Shard:
+    __slots__ = ('lock', 'buckets')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # key -> (tokens, updated, full_at), least recently used first
+        self.buckets = {}
+
+
+class MemoryBuckets:
+    """
+    Token buckets of this process, spread over independently locked shards
+    so concurrent requests from different clients rarely wait on each other.
+    Buckets that have refilled completely carry no state and are dropped.
+    """
+
+    def __init__(self, shards=SHARDS, max_keys_per_shard=MAX_KEYS_PER_SHARD):
+        self.max_keys_per_shard = max_keys_per_shard
+        self._shards = [_Shard() for _ in range(shards)]
+
+    def acquire(self, key, capacity, rate, now=None):
+        """Take a token for key and return 0, or the seconds to wait for one"""
+        now = time.monotonic() if now is None else now
+        shard = self._shards[hash(key) % len(self._shards)]
+        with shard.lock:
+            buckets = shard.buckets
+            # Re-inserting keeps the dict in least recently used order
+            bucket = buckets.pop(key, None)
+            tokens, updated = (bucket[0], bucket[1]) if bucket else (capacity, now)
+            tokens, retry_after = _take(tokens, updated, capacity, rate, now)
+            buckets[key] = (tokens, now, now + (capacity - tokens) / rate)
+            self._evict(buckets, now)
+        return retry_after
+
+    def _evict(self, buckets, now):
+        # Amortized O(1): each bucket is removed at most once after being added
+        while buckets:
+            key = next(iter(buckets))
+            if buckets[key][2] > now and len(buckets) <= self.max_keys_per_shard:
+                return
+            del buckets[key]
+
+    def __len__(self):
+        return sum(len(shard.buckets) for shard in self._shards)
+
+
+class SharedBuckets:
+    """Token buckets in the local_store SQLite file, shared by every worker on the host"""
+
+    def __init__(self, store_path=None, prune_every=PRUNE_EVERY):
+        self.store_path = store_path
+        self.prune_every = prune_every
+        self._acquires = 0
+
+    def acquire(self, key, capacity, rate, now=None):
+        """Take a token for key and return 0, or the seconds to wait for one"""
+        # Wall clock, since the buckets are compared across processes
+        now = time.time() if now is None else now
+        with local_store.transaction(self.store_path) as conn:
+            row = conn.execute("SELECT tokens, updated FROM rate_limit WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens, retry_after = _take(tokens, updated, capacity, rate, now)
+            conn.execute(
+                "INSERT OR REPLACE INTO rate_limit (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)",
+                (key, tokens, now, now + (capacity - tokens) / rate),
+            )
+            self._acquires += 1
+            if self._acquires >= self.prune_every:
+                self._acquires = 0
+                conn.execute("DELETE FROM rate_limit WHERE full_at <= ?", (now,))
+        return retry_after
+
+
+_memory = MemoryBuckets()
+_shared = SharedBuckets() if BACKEND == 'sqlite' else None
+_lock = threading.Lock()
+_stats = {'allowed': 0, 'limited': 0, 'errors': 0}
+
+
+def check(rule, client):
+    """
+    Take a token from client's bucket for rule and return 0 if the request
+    may proceed, else the seconds until it may be retried.
+    """
+    if not ENABLED:
+        return 0.0
+    capacity, period = RULES[rule]
+    key = f'{rule}:{client}'
+    retry_after = None
+    if _shared is not None:
+        try:
+            retry_after = _shared.acquire(key, capacity, capacity / period)
+        except Exception as e:
+            # Keep limiting per worker while the shared store is unavailable
+            logger.error(f"Rate limit store error: {e}")
+            with _lock:
+                _stats['errors'] += 1
+    if retry_after is None:
+        retry_after = _memory.acquire(key, capacity, capacity / period)
+
+    with _lock:
+        _stats['limited' if retry_after else 'allowed'] += 1
+    if retry_after:
+        inc('rate_limited_total', rule=rule)
+    return retry_after
+
+
+def too_many_requests(retry_after, language='tr', as_json=False):
+    """429 response asking the client to come back in retry_after seconds"""
+    message = get_validation_error_message('rate_limited', language)
+    if as_json:
+        response = Response(json.dumps({'success': False, 'message': message}), status=429,
+                            mimetype='application/json')
+    else:
+        response = Response(message, status=429, mimetype='text/plain')
+    response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def rate_limited(rule, as_json=False):
+    """Decorator for views: answer 429 once the client IP has used up its bucket for rule"""
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            # request.remote_addr is the client's address behind ProxyFix (see app.py)
+            retry_after = check(rule, request.remote_addr)
+            if retry_after:
+                language = request.form.get('language') or request.args.get('lang', 'tr')
+                return too_many_requests(retry_after, language, as_json)
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def get_stats():
+    """Get rate limiter counters of this process"""
+    with _lock:
+        stats = dict(_stats)
+    stats['enabled'] = ENABLED
+    stats['backend'] = 'sqlite' if _shared is not None else 'memory'
+    stats['memory_buckets'] = len(_memory)
+    return stats
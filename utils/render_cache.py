@@ -0,0 +1,165 @@
+import hashlib
+import os
+import threading
+import time
+
+from flask import current_app, render_template, request, session
+
+from utils import assets, images
+from utils.compression import BODY_KEY_ENVIRON
+from utils.i18n import get_catalog_digest, get_translations, get_supported_languages
+
+ENABLED = os.environ.get('RENDER_CACHE', 'true').lower() in ['true', 'on', '1']
+MAX_ENTRIES = int(os.environ.get('RENDER_CACHE_MAX_ENTRIES', '256'))
+# How often (seconds) the templates folder is checked for edits
+CHECK_INTERVAL = float(os.environ.get('RENDER_CACHE_CHECK_INTERVAL', '2'))
+
+_entries = {}
+_compressed = {}
+_inflight = {}
+_guard = threading.Lock()
+_state = {'template_files': None, 'template_digest': None, 'next_check': 0.0, 'versions': None}
+
+
+def _templates_digest():
+    """
+    Get a content hash of the templates folder. Checked every CHECK_INTERVAL
+    seconds and only re-hashed when a file's mtime moved.
+    """
+    now = time.monotonic()
+    if now < _state['next_check']:
+        return _state['template_digest']
+    _state['next_check'] = now + CHECK_INTERVAL
+
+    folder = os.path.join(current_app.root_path, current_app.template_folder)
+    try:
+        files = sorted((entry.path, entry.stat().st_mtime_ns) for entry in os.scandir(folder) if entry.is_file())
+    except OSError:
+        return _state['template_digest']
+
+    if files != _state['template_files']:
+        digest = hashlib.blake2b(digest_size=12)
+        for path, _ in files:
+            with open(path, 'rb') as f:
+                digest.update(os.path.basename(path).encode() + b'\0' + f.read())
+        _state['template_digest'] = digest.hexdigest()
+        _state['template_files'] = files
+    return _state['template_digest']
+
+
+def get_versions():
+    """
+    Get the (templates, translations, static build) versions, clearing the
+    cache when they change. They are content hashes, so every worker and
+    every deployment of the same code computes the same values.
+    """
+    versions = (_templates_digest(), get_catalog_digest(), assets.manifest_digest, images.manifest_digest)
+    if versions != _state['versions']:
+        with _guard:
+            _entries.clear()
+            _compressed.clear()
+            _state['versions'] = versions
+    return versions
+
+
+def clear():
+    """Drop every cached page"""
+    with _guard:
+        _entries.clear()
+        _compressed.clear()
+
+
+def _store(key, body):
+    with _guard:
+        if len(_entries) >= MAX_ENTRIES:
+            # Oldest insertion goes first; stale versions age out the same way
+            evicted = next(iter(_entries))
+            del _entries[evicted]
+            for encoding in ('br', 'gzip'):
+                _compressed.pop((evicted, encoding), None)
+        _entries[key] = body
+
+
+def compressed_body(key, encoding, make):
+    """Get the compressed bytes of a cached page, compressing it at most once per encoding"""
+    if key not in _entries:
+        return make()
+    data = _compressed.get((key, encoding))
+    if data is None:
+        data = make()
+        with _guard:
+            if key in _entries:
+                _compressed[(key, encoding)] = data
+    return data
+
+
+def _etag(key):
+    return hashlib.blake2b(repr(key).encode('utf-8'), digest_size=12).hexdigest()
+
+
+def _set_cache_headers(response, lang):
+    response.headers['Content-Language'] = lang
+    response.cache_control.no_cache = True
+    # The compression middleware serves br, gzip and identity variants of the same page
+    response.vary.add('Accept-Encoding')
+    # Pages that set a cookie must not be shared by a CDN
+    if session.modified:
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+
+
+def _render_body(key, template_name, lang, show_success_message):
+    context = {
+        'translations': get_translations(lang),
+        'current_lang': lang,
+        'supported_languages': get_supported_languages(),
+        'show_success_message': show_success_message,
+    }
+    if not ENABLED:
+        return render_template(template_name, **context).encode('utf-8')
+
+    request.environ[BODY_KEY_ENVIRON] = key
+    body = _entries.get(key)
+    if body is not None:
+        return body
+
+    with _guard:
+        lock = _inflight.setdefault(key, threading.Lock())
+    try:
+        with lock:
+            body = _entries.get(key)
+            if body is None:
+                body = render_template(template_name, **context).encode('utf-8')
+                _store(key, body)
+    finally:
+        with _guard:
+            if _inflight.get(key) is lock:
+                del _inflight[key]
+    return body
+
+
+def render_page(template_name, lang, show_success_message=False):
+    """
+    Render a landing page template for lang, reusing previously rendered bytes.
+    Only one thread renders a missing page; concurrent requests for the same
+    page wait for it instead of all running Jinja at once.
+
+    The response carries a strong ETag built from the template, language,
+    flags and content versions; a matching If-None-Match gets a 304 without
+    rendering.
+    """
+    key = (template_name, lang, bool(show_success_message), request.base_url) + get_versions()
+    etag = _etag(key)
+
+    # utils.compression strips its encoding suffix from If-None-Match and
+    # adds it back to the 304, so only the bare tag is compared here
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+    else:
+        response = current_app.response_class(_render_body(key, template_name, lang, show_success_message),
+                                              mimetype='text/html')
+        response.set_etag(etag)
+    _set_cache_headers(response, lang)
+    return response
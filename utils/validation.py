@@ -1,4 +1,10 @@
 import re
+from collections import namedtuple
+
+# Basic email regex pattern
+_EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+
+_WHITESPACE_RUN = re.compile(r'\s+')
 
 def validate_email(email):
     """
@@ -10,11 +16,8 @@ def validate_email(email):
     
     email = email.strip()
     
-    # Basic email regex pattern
-    email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    
     # Check if email matches pattern
-    if not re.match(email_pattern, email):
+    if not _EMAIL_PATTERN.match(email):
         return False
     
     # Additional checks
@@ -29,38 +32,81 @@ def validate_email(email):
     
     return True
 
-def validate_phone(phone):
+def normalize_name(name):
     """
-    Validate phone number format
-    Accepts Turkish phone numbers in various formats
-    Returns True if valid, False otherwise
+    Collapse whitespace in a person's name
+    Returns the cleaned name, or an empty string if nothing is left
+    """
+    if not name:
+        return ''
+    return _WHITESPACE_RUN.sub(' ', name).strip()
+
+# Separators people type into phone fields are deleted; Arabic-Indic and
+# Persian digits are mapped to ASCII so the patterns below see plain digits.
+# A + is kept: it marks an international number just like 00.
+_PHONE_TRANSLATION = str.maketrans(
+    {**{ord(ch): None for ch in ' \t\n\r\f\v\u00a0\u2009\u202f-().'},
+     **{0x0660 + i: str(i) for i in range(10)},
+     **{0x06F0 + i: str(i) for i in range(10)}}
+)
+
+# One pass over the cleaned input: Turkish numbers (10 national digits
+# starting with a 2-5 area or mobile code) with no prefix, a 0 trunk prefix
+# or the country code 90 (also as +90 or 0090, optionally followed by the
+# trunk 0); otherwise a 10-15 digit number after + or 00, or an 11-15 digit
+# number without a prefix. Country codes never start with 0.
+_PHONE_PATTERN = re.compile(
+    r'(?:(?:\+|00)?900?|0)?(?P<national>[2-5][0-9]{9})'
+    r'|(?:\+|00)(?P<dialled>[1-9][0-9]{9,14})'
+    r'|(?P<international>[1-9][0-9]{10,14})'
+)
+
+# Turkish mobile operator by the first two digits of the national number
+_TR_MOBILE_OPERATORS = {
+    '50': 'Türk Telekom',
+    '53': 'Turkcell',
+    '54': 'Vodafone',
+    '55': 'Türk Telekom',
+    '56': 'Türk Telekom',
+}
+
+class PhoneNumber(namedtuple('PhoneNumber', ['valid', 'e164', 'is_national', 'operator'])):
+    """
+    Result of normalize_phone():
+    valid -- whether the input is an acceptable phone number
+    e164 -- canonical +<country><number> form, None when invalid
+    is_national -- True for Turkish (+90) numbers
+    operator -- Turkish mobile operator for 5xx numbers, else None
+    """
+    __slots__ = ()
+
+_INVALID_PHONE = PhoneNumber(False, None, False, None)
+
+def normalize_phone(phone):
+    """
+    Parse a phone number into its canonical E.164 form
+    Accepts the same inputs as validate_phone, including Arabic-Indic digits
     """
     if not phone:
-        return False  # Phone is required
-    
-    phone = phone.strip()
+        return _INVALID_PHONE
     
-    # Remove common separators and spaces
-    clean_phone = re.sub(r'[\s\-\(\)\+\.]', '', phone)
+    match = _PHONE_PATTERN.fullmatch(phone.translate(_PHONE_TRANSLATION))
+    if match is None:
+        return _INVALID_PHONE
     
-    # Turkish phone number patterns
-    patterns = [
-        r'^90[0-9]{10}$',        # +905551234567 -> 905551234567
-        r'^0[0-9]{10}$',         # 05551234567
-        r'^5[0-9]{9}$',          # 5551234567
-        r'^[0-9]{10}$',          # 5551234567 (10 digits)
-    ]
+    national = match.group('national')
+    if national is None:
+        return PhoneNumber(True, '+' + (match.group('dialled') or match.group('international')), False, None)
     
-    # Check if phone matches any valid Turkish pattern
-    for pattern in patterns:
-        if re.match(pattern, clean_phone):
-            return True
-    
-    # Also accept international formats (basic validation)
-    if len(clean_phone) >= 10 and len(clean_phone) <= 15 and clean_phone.isdigit():
-        return True
-    
-    return False
+    return PhoneNumber(True, '+90' + national, True, _TR_MOBILE_OPERATORS.get(national[:2]))
+
+def validate_phone(phone):
+    """
+    Validate phone number format
+    Accepts Turkish phone numbers in various formats
+    Returns True if valid, False otherwise
+    """
+    return normalize_phone(phone).valid
 
 def get_validation_error_message(field, lang='tr'):
     """
@@ -71,19 +117,22 @@ def get_validation_error_message(field, lang='tr'):
             'invalid_email': 'Geçersiz e-posta adresi formatı',
             'invalid_phone': 'Geçersiz telefon numarası formatı. Lütfen Türk telefon numarası formatında giriniz (örn: 0555 123 45 67)',
             'required_phone': 'Telefon numarası gereklidir',
-            'required_name': 'İsim gereklidir'
+            'required_name': 'İsim gereklidir',
+            'rate_limited': 'Çok fazla istek gönderildi. Lütfen biraz sonra tekrar deneyin.'
         },
         'en': {
             'invalid_email': 'Invalid email address format',
             'invalid_phone': 'Invalid phone number format. Please enter a valid Turkish phone number (e.g., 0555 123 45 67)',
             'required_phone': 'Phone number is required',
-            'required_name': 'Name is required'
+            'required_name': 'Name is required',
+            'rate_limited': 'Too many requests. Please try again shortly.'
         },
         'ar': {
             'invalid_email': 'تنسيق عنوان البريد الإلكتروني غير صحيح',
             'invalid_phone': 'تنسيق رقم الهاتف غير صحيح. يرجى إدخال رقم هاتف تركي صحيح',
             'required_phone': 'رقم الهاتف مطلوب',
-            'required_name': 'الاسم مطلوب'
+            'required_name': 'الاسم مطلوب',
+            'rate_limited': 'طلبات كثيرة جدًا. يرجى المحاولة مرة أخرى بعد قليل.'
         }
     }
     